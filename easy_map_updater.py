@@ -49,6 +49,9 @@ from lib import data_pack
 from lib import resource_pack
 from lib import option_manager
 from lib import json_manager
+from lib import translation_cache
+from lib import update_context
+from lib import update_report
 from lib.data_pack_files import command
 from lib.data_pack_files import json_text_component
 from lib.data_pack_files import breakpoints
@@ -74,6 +77,7 @@ from lib.region_files import entity_extractor
 from lib.region_files import fix_world
 from lib.region_files import stats_scanner
 from lib.region_files import illegal_chunk
+from lib.region_files import world_traversal
 from lib.region_files import structure
 
 
@@ -147,6 +151,7 @@ class Action(Enum):
     CLEAN = "clean"
 
     VERSION = "version"
+    CACHE_CLEAR = "cache.clear"
     LICENSE = "license"
     EXIT = "exit"
 
@@ -197,6 +202,49 @@ def default_update_progress() -> UpdateProgressDefinition:
     }
 update_progress: UpdateProgressDefinition = default_update_progress()
 
+UPDATE_SECTION_NAMES = {
+    0:   "Original copy",
+    100: "Scan world",
+    200: "Resource pack",
+    300: "Data packs",
+    400: "Optimize world",
+    500: "Fix world",
+    600: "Command blocks",
+    700: "Restore old behavior",
+    800: "Finalize map",
+}
+UPDATE_ACTION_NAMES = {
+    0:   "Prepare original copy",
+    100: "Scan world",
+    200: "Update resource pack",
+    300: "Rename data pack directories",
+    301: "Fix disabled vanilla",
+    302: "Disable advancements and recipes",
+    303: "Prepare source copy",
+    304: "Update data packs",
+    400: "Optimize world",
+    500: "Extract entities",
+    501: "Fix world",
+    600: "Read commands",
+    601: "Update commands",
+    602: "Write commands",
+    700: "Spawner bossbar",
+    701: "Old adventure mode",
+    702: "Area effect cloud killer",
+    703: "Firework damage canceler",
+    704: "Tag replacements",
+    705: "Illegal chunk",
+    706: "Ore fixer",
+    707: "Unwaterloggable leaves",
+    708: "Attribute reset",
+    709: "Lock fixer",
+    800: "Remove player scores",
+    801: "Finalize map",
+    802: "Zip data packs",
+    803: "Export resource pack",
+    804: "Prepare play copy",
+}
+
 
 
 # Define functions
@@ -365,6 +413,7 @@ def action_reset():
         Action.CLEAN.value:                 { "show": False, "function": action_clean_up, "name": "Clean up files (remove worlds and resource pack)" },
 
         Action.VERSION.value:               { "show": True,  "function": action_set_version, "name": "Edit source version" },
+        Action.CACHE_CLEAR.value:           { "show": True,  "function": action_clear_translation_cache, "name": "Clear translation cache" },
         Action.LICENSE.value:               { "show": True,  "function": action_license, "name": "Show software license" },
         Action.EXIT.value:                  { "show": True,  "function": action_exit, "name": "Exit program" },
 
@@ -418,6 +467,9 @@ def action_update(): # Needs confirmation
             reset_update_progress()
         else:
             log("Resuming update")
+
+    # Time each stage of the update
+    update_report.start()
     
     # Reload world if original world exists
     if update_progress["stage"] == 0:
@@ -510,23 +562,26 @@ def action_update(): # Needs confirmation
         confirm = input("Confirm when it has been optimized, decline to cancel (Y/N): ")
         if confirm not in ["y", "Y"]:
             log("Updated canceled")
+            update_report.finish(version)
             return
         next_update_progress_section()
 
-    # Fix world
+    # Fix world, command blocks are read in the same pass over the world
+    command_reader = command_blocks.CommandReader(world)
     if update_progress["stage"] == 500:
         if version <= 1605:
             action_entity_extract(False)
         next_update_progress()
     if update_progress["stage"] == 501:
-        fix_world_flags = action_fix_world(False)
+        fix_world_flags = action_fix_world(False, [command_reader])
         for key in fix_world_flags:
             progress_flags[key] = fix_world_flags[key]
         next_update_progress_section()
 
     # Update command blocks
     if update_progress["stage"] == 600:
-        action_read_commands(False)
+        if not command_reader.finished:
+            action_read_commands(False)
         next_update_progress()
     if update_progress["stage"] == 601:
         action_update_commands(False)
@@ -613,6 +668,7 @@ def action_update(): # Needs confirmation
         action_prepare_play_copy(False)
         next_update_progress_section()
 
+    update_report.finish(version)
     print("")
     log("Map updated")
     log("Join the play copy of the world and playtest it", True)
@@ -628,13 +684,19 @@ def reset_update_progress():
     save_session()
 
 def next_update_progress():
+    finish_update_action()
     update_progress["stage"] += 1
     save_session()
 
 def next_update_progress_section():
+    finish_update_action()
     update_progress["stage"] = (update_progress["stage"] + 100)//100*100
     save_session()
 
+def finish_update_action():
+    stage = update_progress["stage"]
+    update_report.finish_action(stage, UPDATE_ACTION_NAMES.get(stage, ""), UPDATE_SECTION_NAMES.get(stage//100*100, ""))
+
 
 
 def action_scan_world():
@@ -1133,12 +1195,13 @@ def action_illegal_chunk():
         MINECRAFT_PATH / "saves" / option_manager.get_map_name()
     )
 
-def action_fix_world(manual: bool = True): # Needs confirmation
+def action_fix_world(manual: bool = True, visitors: list[world_traversal.ChunkVisitor] = []): # Needs confirmation
     booleans = fix_world.fix(
         MINECRAFT_PATH / "saves" / option_manager.get_map_name(),
         MINECRAFT_PATH / "saves" / f'{option_manager.get_map_name()}_source',
         option_manager.get_version(),
-        manual
+        manual,
+        visitors
     )
 
     if manual:
@@ -1209,6 +1272,16 @@ def action_set_version():
 def print_version():
     log(f'Source: {utils.get_version_string(option_manager.get_version())}, Target: {utils.get_version_string(defaults.PACK_VERSION)}')
 
+def action_clear_translation_cache(): # Needs confirmation
+    log(f'This action will delete: {translation_cache.CACHE_PATH.as_posix()}')
+    confirm = input("Is this okay? (Y/N): ")
+    if confirm not in ["Y", "y"]:
+        log("Action canceled")
+        return
+
+    translation_cache.clear()
+    log("Translation cache cleared")
+
 
 
 def action_license():
@@ -1243,7 +1316,8 @@ def action_update_single_command():
             break
         print("")
         log(f'Old command: {test_command}')
-        log(f'New command: {command.update(test_command, option_manager.get_version(), "test_command")}')
+        context = update_context.UpdateContext(option_manager.get_version(), "test_command")
+        log(f'New command: {context.update_command(test_command)}')
         print("")
 
 def action_update_json_text_component():
@@ -1253,7 +1327,8 @@ def action_update_json_text_component():
             break
         print("")
         log(f'Old component: {test_component}')
-        log(f'New component: {json_text_component.update(test_component, option_manager.get_version(), [], {"mangled": False, "pack": True})}')
+        context = update_context.UpdateContext(option_manager.get_version())
+        log(f'New component: {context.update_text_component(test_component, {"mangled": False, "pack": True})}')
         print("")
 
 def retrieve_file_path(message: str) -> Path | None:
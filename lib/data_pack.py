@@ -8,10 +8,15 @@
 import os
 import shutil
 import json
-from typing import cast
+import hashlib
+from typing import cast, Any
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import util as multiprocessing_util
+from contextvars import ContextVar
 from nbt import nbt as NBT
 from pathlib import Path
 from lib.log import log
+from lib import log as log_module
 from lib.data_pack_files import command # This import is necessary to prevent circular loading
 from lib.data_pack_files import advancement
 from lib.data_pack_files import predicate
@@ -26,13 +31,35 @@ from lib import finalize
 from lib import json_manager
 from lib import defaults
 from lib import utils
+from lib import option_manager
+from lib import side_effects
+from lib import translation_cache
+from lib import update_report
 
 
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 PACK_FORMAT = defaults.DATA_PACK_FORMAT
+PARALLEL_FILE_COUNT = 100
+
+# Each task is the kind of file, the source path, the destination path, and the namespace, function ID or tag type
+DataPackTask = tuple[str, Path, Path, str]
+
+# Folders are updated in this order within each namespace, tags also carry their tag type
+NAMESPACE_FOLDERS = [
+    ("function", "function", ""),
+    ("advancement", "advancement", ""),
+    ("predicate", "predicate", ""),
+    ("loot_table", "loot_table", ""),
+    ("recipe", "recipe", ""),
+    ("item_modifier", "item_modifier", ""),
+    ("tags/block", "tag", "block"),
+    ("tags/item", "tag", "item"),
+    ("tags/entity_type", "tag", "entity"),
+    ("structure", "structure", ""),
+]
 
 DIRECTORY_RENAMES = [
     ("advancements", "advancement"),
@@ -61,8 +88,7 @@ def update(world: Path, version: int):
     source_world = world.parent / f'{world.name}_source'
 
     # Set pack version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Check for errors
     if not world.exists():
@@ -79,18 +105,22 @@ def update(world: Path, version: int):
         return
 
     # Update data packs
-    for data_pack in (source_world / "datapacks").iterdir():
-        if data_pack.is_file():
-            continue
-        try:
-            update_data_pack(
-                world / "datapacks" / data_pack.name,
-                source_world / "datapacks" / data_pack.name,
-                data_pack.name
-            )
-        except Exception:
-            log(f"An error was thrown while updating the data pack: {data_pack.name}")
-            utils.log_error()
+    command.reset_cache_stats()
+    data_packs = [data_pack for data_pack in (source_world / "datapacks").iterdir() if not data_pack.is_file()]
+    workers = option_manager.get_workers()
+    if workers > 1:
+        update_data_packs_parallel(world, source_world, data_packs, workers)
+    else:
+        for data_pack in data_packs:
+            try:
+                update_data_pack(
+                    world / "datapacks" / data_pack.name,
+                    source_world / "datapacks" / data_pack.name,
+                    data_pack.name
+                )
+            except Exception:
+                log(f"An error was thrown while updating the data pack: {data_pack.name}")
+                utils.log_error()
 
     # Replace behavior restoring data packs if they have been updated
     if version <= 2104:
@@ -106,6 +136,8 @@ def update(world: Path, version: int):
                 break
 
     # Log completion
+    translation_cache.flush()
+    command.log_cache_stats()
     log("Data packs updated")
 
 
@@ -170,189 +202,217 @@ def update_pack_mcmeta(pack: Path, source_pack: Path):
 
 
 def update_namespaces(pack: Path, source_pack: Path):
+    for task in get_namespace_tasks(pack, source_pack):
+        update_file(task)
+
+def get_namespace_tasks(pack: Path, source_pack: Path) -> list[DataPackTask]:
     # Skip if the data folder does not exist
     if not (source_pack / "data").exists():
-        return
+        return []
 
     # Iterate through namespaces
+    tasks: list[DataPackTask] = []
     for namespace in (source_pack / "data").iterdir():
         # Skip if not a folder
         if not namespace.is_dir():
             continue
 
-        # Update functions
-        folder = pack / "data" / namespace.name / "function"
-        source_folder = namespace / "function"
-        if source_folder.exists():
-            update_functions(folder, source_folder, namespace.name)
-
-        # Update advancements
-        folder = pack / "data" / namespace.name / "advancement"
-        source_folder = namespace / "advancement"
-        if source_folder.exists():
-            update_advancements(folder, source_folder)
-
-        # Update predicates
-        folder = pack / "data" / namespace.name / "predicate"
-        source_folder = namespace / "predicate"
-        if source_folder.exists():
-            update_predicates(folder, source_folder)
-
-        # Update loot tables
-        folder = pack / "data" / namespace.name / "loot_table"
-        source_folder = namespace / "loot_table"
-        if source_folder.exists():
-            update_loot_tables(folder, source_folder)
-
-        # Update recipes
-        folder = pack / "data" / namespace.name / "recipe"
-        source_folder = namespace / "recipe"
-        if source_folder.exists():
-            update_recipes(folder, source_folder)
-
-        # Update item modifiers
-        folder = pack / "data" / namespace.name / "item_modifier"
-        source_folder = namespace / "item_modifier"
-        if source_folder.exists():
-            update_item_modifiers(folder, source_folder)
-
-        # Update block tags
-        folder = pack / "data" / namespace.name / "tags" / "block"
-        source_folder = namespace / "tags" / "block"
-        if source_folder.exists():
-            update_tags(folder, source_folder, "block")
-
-        # Update item tags
-        folder = pack / "data" / namespace.name / "tags" / "item"
-        source_folder = namespace / "tags" / "item"
-        if source_folder.exists():
-            update_tags(folder, source_folder, "item")
-
-        # Update entity tags
-        folder = pack / "data" / namespace.name / "tags" / "entity_type"
-        source_folder = namespace / "tags" / "entity_type"
-        if source_folder.exists():
-            update_tags(folder, source_folder, "entity")
-
-        # Update structures
-        folder = pack / "data" / namespace.name / "structure"
-        source_folder = namespace / "structure"
-        if source_folder.exists():
-            update_structures(folder, source_folder, namespace.name)
-
-
-
-def update_functions(folder: Path, source_folder: Path, namespace: str):
-    for source_file_path in source_folder.glob("**/*.mcfunction"):
-        if not source_file_path.is_file():
-            continue
-        pack_subdir = source_file_path.as_posix()[len(source_folder.as_posix()) + 1:]
-        file_path = folder / pack_subdir
+        # Collect the files of each folder
+        for folder_name, kind, tag_type in NAMESPACE_FOLDERS:
+            folder = pack / "data" / namespace.name / folder_name
+            source_folder = namespace / folder_name
+            if not source_folder.exists():
+                continue
+            pattern = "**/*.json"
+            if kind == "function":
+                pattern = "**/*.mcfunction"
+            if kind == "structure":
+                pattern = "**/*.nbt"
+            for source_file_path in source_folder.glob(pattern):
+                if not source_file_path.is_file():
+                    continue
+                pack_subdir = source_file_path.as_posix()[len(source_folder.as_posix()) + 1:]
+                argument = tag_type
+                if kind == "function":
+                    argument = namespace.name + ":" + pack_subdir.split(".")[0].replace("\\", "/")
+                if kind == "structure":
+                    argument = f"{namespace.name}:{pack_subdir[:-4]}"
+                tasks.append((kind, source_file_path, folder / pack_subdir, argument))
+
+    return tasks
+
+def update_file(task: DataPackTask):
+    kind, source_file_path, file_path, argument = task
+
+    # Structures always get a new data version, so they never stay the same
+    if kind == "structure":
+        update_file_contents(task)
+        return
+
+    # Files that an earlier update left as they were are copied straight from the source pack
+    try:
+        contents = source_file_path.read_bytes()
+    except:
+        update_file_contents(task)
+        return
+    # The source hash is part of the key, so that files are translated again once the translators change
+    unchanged_key = [kind, argument, hashlib.sha256(contents).hexdigest(), pack_version.get(), translation_cache.get_source_hash()]
+    if translation_cache.get("unchanged_file", unchanged_key):
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source_file_path, file_path)
+        update_report.count("files_read")
+        update_report.count("files_written")
+        update_report.count("bytes_read", len(contents))
+        update_report.count("bytes_written", len(contents))
+        update_report.count("unchanged_files_copied")
+        return
+
+    # Files are only copied next time if updating them didn't log anything or change other files
+    side_effects.start_recording()
+    try:
+        update_file_contents(task)
+    finally:
+        effects = side_effects.stop_recording()
+    if not effects and file_path.is_file() and file_path.read_bytes() == contents:
+        translation_cache.put("unchanged_file", unchanged_key, True)
+
+def update_file_contents(task: DataPackTask):
+    kind, source_file_path, file_path, argument = task
+    if kind == "function":
         try:
-            mcfunction.update(file_path, source_file_path, pack_version, namespace + ":" + pack_subdir.split(".")[0].replace("\\", "/"))
+            mcfunction.update(file_path, source_file_path, pack_version.get(), argument)
         except Exception:
             log(f"ERROR: An error occurred while updating the function: {source_file_path.as_posix()}")
             utils.log_error()
 
-
-
-def update_advancements(folder: Path, source_folder: Path):
-    for source_file_path in source_folder.glob("**/*.json"):
-        if not source_file_path.is_file():
-            continue
-        pack_subdir = source_file_path.as_posix()[len(source_folder.as_posix()) + 1:]
-        file_path = folder / pack_subdir
+    if kind == "advancement":
         try:
-            advancement.update(file_path, source_file_path, pack_version)
+            advancement.update(file_path, source_file_path, pack_version.get())
         except Exception:
             log(f"ERROR: An error occurred when updating advancement: {source_file_path.as_posix()}")
             utils.log_error()
 
-
-
-def update_predicates(folder: Path, source_folder: Path):
-    for source_file_path in source_folder.glob("**/*.json"):
-        if not source_file_path.is_file():
-            continue
-        pack_subdir = source_file_path.as_posix()[len(source_folder.as_posix()) + 1:]
-        file_path = folder / pack_subdir
+    if kind == "predicate":
         try:
-            predicate.update(file_path, source_file_path, pack_version)
+            predicate.update(file_path, source_file_path, pack_version.get())
         except Exception:
             log(f"ERROR: An error occurred when updating predicate: {source_file_path.as_posix()}")
             utils.log_error()
 
-
-
-def update_loot_tables(folder: Path, source_folder: Path):
-    for source_file_path in source_folder.glob("**/*.json"):
-        if not source_file_path.is_file():
-            continue
-        pack_subdir = source_file_path.as_posix()[len(source_folder.as_posix()) + 1:]
-        file_path = folder / pack_subdir
+    if kind == "loot_table":
         try:
-            loot_table.update(file_path, source_file_path, pack_version)
+            loot_table.update(file_path, source_file_path, pack_version.get())
         except Exception:
             log(f"ERROR: An error occurred when updating loot table: {source_file_path.as_posix()}")
             utils.log_error()
 
-
-
-def update_recipes(folder: Path, source_folder: Path):
-    for source_file_path in source_folder.glob("**/*.json"):
-        if not source_file_path.is_file():
-            continue
-        pack_subdir = source_file_path.as_posix()[len(source_folder.as_posix()) + 1:]
-        file_path = folder / pack_subdir
+    if kind == "recipe":
         try:
-            recipe.update(file_path, source_file_path, pack_version)
+            recipe.update(file_path, source_file_path, pack_version.get())
         except Exception:
             log(f"ERROR: An error occurred when updating recipe: {source_file_path.as_posix()}")
             utils.log_error()
 
-
-
-def update_item_modifiers(folder: Path, source_folder: Path):
-    for source_file_path in source_folder.glob("**/*.json"):
-        if not source_file_path.is_file():
-            continue
-        pack_subdir = source_file_path.as_posix()[len(source_folder.as_posix()) + 1:]
-        file_path = folder / pack_subdir
+    if kind == "item_modifier":
         try:
-            item_modifier.update(file_path, source_file_path, pack_version)
+            item_modifier.update(file_path, source_file_path, pack_version.get())
         except Exception:
             log(f"ERROR: An error occurred when updating item modifier: {source_file_path.as_posix()}")
             utils.log_error()
 
-
-
-def update_tags(folder: Path, source_folder: Path, tag_type: str):
-    for source_file_path in source_folder.glob("**/*.json"):
-        if not source_file_path.is_file():
-            continue
-        pack_subdir = source_file_path.as_posix()[len(source_folder.as_posix()) + 1:]
-        file_path = folder / pack_subdir
+    if kind == "tag":
         try:
-            tags.update(file_path, source_file_path, pack_version, tag_type)
+            tags.update(file_path, source_file_path, pack_version.get(), argument)
         except Exception:
             log(f"ERROR: An error occurred when updating tag: {source_file_path.as_posix()}")
             utils.log_error()
 
+    if kind == "structure":
+        log(f" Fixing structure {argument}")
+        try:
+            structure.update(file_path, source_file_path, pack_version.get())
+        except Exception:
+            log(f"ERROR: An error occurred when updating structure: {source_file_path.as_posix()}")
+            utils.log_error()
 
 
-def update_structures(folder: Path, source_folder: Path, namespace: str):
-    for source_file_path in source_folder.glob("**/*.nbt"):
-        if not source_file_path.is_file():
-            continue
-        pack_subdir = source_file_path.as_posix()[len(source_folder.as_posix()) + 1:]
-        file_path = folder / pack_subdir
-        log(f" Fixing structure {namespace}:{pack_subdir[:-4]}")
+
+def update_data_packs_parallel(world: Path, source_world: Path, data_packs: list[Path], workers: int):
+    # Collect the files of every pack first, so that they can all be spread over the workers
+    pack_tasks: list[tuple[Path, list[DataPackTask]]] = []
+    for data_pack in data_packs:
         try:
-            structure.update(file_path, source_file_path, pack_version)
+            pack_tasks.append((data_pack, get_namespace_tasks(world / "datapacks" / data_pack.name, data_pack)))
         except Exception:
-            log(f"ERROR: An error occurred when updating structure: {source_file_path.as_posix()}")
+            log(f"An error was thrown while updating the data pack: {data_pack.name}")
             utils.log_error()
-        
+    tasks = [task for data_pack, data_pack_tasks in pack_tasks for task in data_pack_tasks]
+
+    # Small packs aren't worth starting the workers for
+    if len(tasks) < PARALLEL_FILE_COUNT:
+        for data_pack, data_pack_tasks in pack_tasks:
+            try:
+                update_data_pack(world / "datapacks" / data_pack.name, data_pack, data_pack.name)
+            except Exception:
+                log(f"An error was thrown while updating the data pack: {data_pack.name}")
+                utils.log_error()
+        return
+
+    log(f" Using {workers} workers")
+
+    # Workers open their own connection to the translation cache
+    translation_cache.close()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=initialize_update_worker,
+        initargs=(pack_version.get(), option_manager.FIXES, defaults.DEBUG_MODE)
+    ) as executor:
+        # Files are returned in order, so their messages and changes to shared files are replayed in the same order as a serial run
+        results = executor.map(update_file_worker, tasks, chunksize=max(1, len(tasks)//(workers*16)))
+        for data_pack, data_pack_tasks in pack_tasks:
+            pack = world / "datapacks" / data_pack.name
+            try:
+                log(f"Updating {data_pack.name}")
+                pack.mkdir(exist_ok=True, parents=True)
+                update_pack_mcmeta(pack, data_pack)
+            except Exception:
+                log(f"An error was thrown while updating the data pack: {data_pack.name}")
+                utils.log_error()
+            for task in data_pack_tasks:
+                effects, cache_hits, cache_misses, counters = next(results)
+                side_effects.replay(effects)
+                command.cache_hits += cache_hits
+                command.cache_misses += cache_misses
+                update_report.add_counters(counters)
+
+def initialize_update_worker(version: int, fixes: dict[str, Any], debug_mode: bool):
+    # Worker processes may not inherit the state of the main process
+    pack_version.set(version)
+    option_manager.FIXES = fixes
+    defaults.DEBUG_MODE = debug_mode
+
+    # Leave messages and changes to shared files for the main process, so that only it creates and logs data packs
+    side_effects.deferred.set(True)
+    log_module.muted.set(True)
+
+    # New cache entries are written in batches, the rest are written when the worker exits
+    multiprocessing_util.Finalize(None, translation_cache.flush, exitpriority=10)
+
+def update_file_worker(task: DataPackTask) -> tuple[list[side_effects.Effect], int, int, dict[str, int]]:
+    cache_hits = command.cache_hits
+    cache_misses = command.cache_misses
+    counters = update_report.get_counters()
+    side_effects.start_recording()
+    try:
+        update_file(task)
+    except Exception:
+        # Errors are logged with the file, so that the other files are still updated
+        log(f"An error was thrown while updating the file: {task[1].as_posix()}")
+        utils.log_error()
+    finally:
+        effects = side_effects.stop_recording()
+    return effects, command.cache_hits - cache_hits, command.cache_misses - cache_misses, update_report.get_counter_changes(counters)
+
 
 
 def rename_directories(world: Path, get_conformation: bool):
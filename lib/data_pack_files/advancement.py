@@ -8,6 +8,7 @@
 import json
 from pathlib import Path
 from typing import Any
+from contextvars import ContextVar
 from lib import defaults
 from lib import utils
 from lib import json_manager
@@ -19,15 +20,14 @@ from lib.data_pack_files import miscellaneous
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
 # Define functions
 
 def update(file_path: Path, source_file_path: Path, version: int):
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Read file
     contents, load_bool = json_manager.safe_load(source_file_path)
@@ -40,8 +40,7 @@ def update(file_path: Path, source_file_path: Path, version: int):
 
 
 def advancement(contents: dict[str, Any], version: int) -> dict[str, Any]:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Update criteria
     if "criteria" in contents:
@@ -124,51 +123,51 @@ def update_criterion(criterion: dict[str, Any]):
         for key in ["bystander", "child", "entity", "lightning", "parent", "player", "projectile", "shooter", "source", "villager", "zombie"]:
             if key in criterion["conditions"]:
                 if isinstance(criterion["conditions"][key], dict):
-                    predicate.predicate_entity(criterion["conditions"][key], pack_version)
+                    predicate.predicate_entity(criterion["conditions"][key], pack_version.get())
                 if isinstance(criterion["conditions"][key], list):
                     for entity in criterion["conditions"][key]:
-                        predicate.predicate(entity, pack_version)
+                        predicate.predicate(entity, pack_version.get())
 
         if "victims" in criterion["conditions"]:
             for victim in criterion["conditions"]["victims"]:
                 if isinstance(victim, dict):
-                    predicate.predicate_entity(victim, pack_version)
+                    predicate.predicate_entity(victim, pack_version.get())
                 if isinstance(victim, list):
                     for entity in victim:
-                        predicate.predicate(entity, pack_version)
+                        predicate.predicate(entity, pack_version.get())
 
 
         # Update damage objects
 
         if "killing_blow" in criterion["conditions"]:
             if "direct_entity" in criterion["conditions"]["killing_blow"]:
-                predicate.predicate_entity(criterion["conditions"]["killing_blow"]["direct_entity"], pack_version)
+                predicate.predicate_entity(criterion["conditions"]["killing_blow"]["direct_entity"], pack_version.get())
             if "source_entity" in criterion["conditions"]["killing_blow"]:
-                predicate.predicate_entity(criterion["conditions"]["killing_blow"]["source_entity"], pack_version)
+                predicate.predicate_entity(criterion["conditions"]["killing_blow"]["source_entity"], pack_version.get())
 
         if "damage" in criterion["conditions"]:
             if "source_entity" in criterion["conditions"]["damage"]:
-                predicate.predicate_entity(criterion["conditions"]["damage"]["source_entity"], pack_version)
+                predicate.predicate_entity(criterion["conditions"]["damage"]["source_entity"], pack_version.get())
 
 
         # Update item predicates
         for key in ["fired_from_weapon", "item", "rod"]:
             if key in criterion["conditions"]:
                 if isinstance(criterion["conditions"][key], dict):
-                    predicate.predicate_item(criterion["conditions"][key], pack_version)
+                    predicate.predicate_item(criterion["conditions"][key], pack_version.get())
 
         for key in ["ingredients", "items"]:
             if key in criterion["conditions"]:
                 if isinstance(criterion["conditions"][key], list):
                     for item in criterion["conditions"][key]:
-                        predicate.predicate_item(item, pack_version)
+                        predicate.predicate_item(item, pack_version.get())
 
 
         # Update location predicate
         if "start_position" in criterion["conditions"]:
-            predicate.predicate_location(criterion["conditions"]["start_position"], pack_version)
+            predicate.predicate_location(criterion["conditions"]["start_position"], pack_version.get())
 
         if "location" in criterion["conditions"]:
             if isinstance(criterion["conditions"]["location"], list):
                 for location in criterion["conditions"]["location"]:
-                    predicate.predicate(location, pack_version)
\ No newline at end of file
+                    predicate.predicate(location, pack_version.get())
\ No newline at end of file
@@ -3,6 +3,24 @@
 
 
 
+# Import things
+
+import re
+
+
+
+# Initialize variables
+
+BRACKETS = {
+    "[": 1, "]": -1,
+    "{": 1, "}": -1,
+    "(": 1, ")": -1,
+}
+
+token_patterns: dict[tuple[tuple[str, ...], tuple[str, ...], bool], re.Pattern[str]] = {}
+
+
+
 # Define functions
 
 def parse(string: str, separator: str, allow_single_quotes: bool) -> list[str]:
@@ -15,106 +33,147 @@ def parse(string: str, separator: str, allow_single_quotes: bool) -> list[str]:
         return parse_with_quotes(string, separator, allow_single_quotes)
     return parse_without_quotes(string, separator)
 
-def parse_with_quotes(string: str, separator: str | list[str], allow_single_quotes: bool, spare_separator: str | list[str] = []) -> list[str]:
-    # Initialize variables
-    arguments: list[str] = []
-    argument = ""
-    bracket_count = 0
-    in_string = False
-    char_escaped = False
-    string_type = ""
+def get_token_pattern(separator: list[str], spare_separator: list[str], allow_single_quotes: bool) -> re.Pattern[str]:
+    # Match every character that can end an argument or change the bracket or string state
+    key = (tuple(separator), tuple(spare_separator), allow_single_quotes)
+    if key not in token_patterns:
+        chars = set(BRACKETS) | {'"'}
+        if allow_single_quotes:
+            chars.add("'")
+        for char in separator + spare_separator:
+            if len(char) == 1:
+                chars.add(char)
+        token_patterns[key] = re.compile("[" + "".join(re.escape(char) for char in sorted(chars)) + "]")
+    return token_patterns[key]
 
+def parse_with_quotes(string: str, separator: str | list[str], allow_single_quotes: bool, spare_separator: str | list[str] = []) -> list[str]:
     if isinstance(separator, str):
         separator = [separator]
     if isinstance(spare_separator, str):
         spare_separator = [spare_separator]
+    split_every_char = "" in separator
+    token_pattern = get_token_pattern(separator, spare_separator, allow_single_quotes)
 
-    # Iterate through string
-    for char in string:
-        # Manage end separator
-        if char in spare_separator and bracket_count == 0 and not in_string:
-            if argument:
-                arguments.append(argument)
-            argument = ""
-
-        # Check separator conditions
-        if char in separator and bracket_count == 0 and not in_string:
-            if argument:
-                arguments.append(argument)
-            argument = ""
-            continue
-
-        # Count brackets
-        char_list = ["[", "]", "{", "}", "(", ")"]
-        if not in_string and char in char_list:
-            bracket_count += [1, -1][char_list.index(char) % 2]
-
-        # Add character to argument
-        if bracket_count >= 0:
-            argument += char
-
-        # Manage string state
-        if in_string:
-            if char_escaped:
-                char_escaped = False
-            else:
-                if char == "\\":
-                    char_escaped = True
-                elif string_type == "single" and char == "'":
-                    in_string = False
-                    string_type = ""
-                elif string_type == "double" and char == '"':
-                    in_string = False
-                    string_type = ""
+    # Arguments are sliced out of the string, they only need to be pieced together
+    # when an unmatched closing bracket leaves characters out of them
+    arguments: list[str] = []
+    pieces: list[str] = []
+    start: int | None = 0
+    bracket_count = 0
+    index = 0
+    length = len(string)
+
+    while index < length:
+        # Jump to the next character that matters, every character matters if each one is an argument
+        if not split_every_char or bracket_count != 0:
+            match = token_pattern.search(string, index)
+            if not match:
+                break
+            index = match.start()
+        char = string[index]
+
+        if bracket_count == 0:
+            # Manage end separator
+            if char in spare_separator:
+                append_argument(arguments, pieces, string, start, index)
+                pieces = []
+                start = index
+
+            # Check separator conditions
+            if char in separator:
+                append_argument(arguments, pieces, string, start, index)
+                pieces = []
+                start = index + 1
+                index += 1
+                continue
+
+        # Count brackets, characters are left out while there are more closing brackets than opening ones
+        if char in BRACKETS:
+            bracket_count += BRACKETS[char]
+            if bracket_count == -1 and BRACKETS[char] == -1 and start is not None:
+                pieces.append(string[start:index])
+                start = None
+            elif bracket_count == 0 and BRACKETS[char] == 1 and start is None:
+                start = index
+
+        # Skip over strings
+        if char == '"' or (allow_single_quotes and char == "'"):
+            index = get_string_end(string, index + 1, char) + 1
             continue
 
-        if allow_single_quotes and char == "'":
-            in_string = True
-            string_type = "single"
-        if char == '"':
-            in_string = True
-            string_type = "double"
-
         # Add argument if separator list contains empty string
-        if "" in separator and bracket_count == 0 and not in_string:
-            arguments.append(argument)
-            argument = ""
+        if split_every_char and bracket_count == 0:
+            append_argument(arguments, pieces, string, start, index + 1)
+            pieces = []
+            start = index + 1
+
+        index += 1
 
     # Append last argument to arguments
+    argument = "".join(pieces)
+    if start is not None:
+        argument += string[start:]
     if argument:
         arguments.append(argument)
     return arguments
 
+def append_argument(arguments: list[str], pieces: list[str], string: str, start: int | None, end: int):
+    argument = "".join(pieces)
+    if start is not None:
+        argument += string[start:end]
+    if argument:
+        arguments.append(argument)
+
+def get_string_end(string: str, index: int, quote: str) -> int:
+    # A quote is escaped if it comes after an odd number of backslashes
+    while True:
+        end = string.find(quote, index)
+        if end == -1:
+            return len(string)
+        backslash_count = 0
+        while string[end - backslash_count - 1] == "\\":
+            backslash_count += 1
+        if backslash_count % 2 == 0:
+            return end
+        index = end + 1
+
 def parse_without_quotes(string: str, separator: str) -> list[str]:
     # Initialize variables
     arguments: list[str] = []
-    argument = ""
+    argument: list[str] = []
+    counts = {"[": 0, "]": 0, "{": 0, "}": 0, "(": 0, ")": 0}
 
     # Iterate through string
     for piece in string.split(separator):
-        # Append argument
-        argument += piece
+        # Append argument, keeping a running count of the brackets in it
+        argument.append(piece)
+        for bracket in counts:
+            counts[bracket] += piece.count(bracket)
 
         # Perform action
         if (
-            argument.count("[") == argument.count("]") and
-            argument.count("{") == argument.count("}") and
-            argument.count("(") == argument.count(")")
+            counts["["] == counts["]"] and
+            counts["{"] == counts["}"] and
+            counts["("] == counts[")"]
         ):
-            if argument:
-                arguments.append(argument)
-            argument = ""
+            if any(argument):
+                arguments.append("".join(argument))
+            argument = []
+            counts = dict.fromkeys(counts, 0)
             continue
         if (
-            argument.count("[") > argument.count("]") or
-            argument.count("{") > argument.count("}") or
-            argument.count("(") > argument.count(")")
+            counts["["] > counts["]"] or
+            counts["{"] > counts["}"] or
+            counts["("] > counts[")"]
         ):
-            argument += separator
+            argument.append(separator)
+            for bracket in counts:
+                counts[bracket] += separator.count(bracket)
 
-    if argument:
-        if argument[-1] == separator:
-            argument = argument[:-1]
-        arguments.append(argument)
+    last_argument = "".join(argument)
+    if last_argument:
+        if last_argument[-1] == separator:
+            last_argument = last_argument[:-1]
+        arguments.append(last_argument)
 
-    return arguments
\ No newline at end of file
+    return arguments
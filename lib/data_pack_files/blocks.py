@@ -6,6 +6,7 @@
 # Import things
 
 from typing import cast, TypedDict, NotRequired
+from contextvars import ContextVar
 from lib.log import log
 from lib.data_pack_files import nbt_tags
 from lib.data_pack_files import miscellaneous
@@ -23,7 +24,7 @@ import easy_map_updater
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
@@ -41,8 +42,7 @@ class BlockOutputFromCommand(TypedDict):
     nbt: dict
 
 def update_from_command_set(block: str, version: int, issues: list[dict[str, str | int]]) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     block = update_from_command(block, version, issues)
 
@@ -61,8 +61,7 @@ def update_from_command_set(block: str, version: int, issues: list[dict[str, str
     return block
 
 def update_from_command(block: str | BlockInputFromCommand, version: int, issues: list[dict[str, str | int]]) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Initialize parameters
     block_id = "minecraft:air"
@@ -111,7 +110,7 @@ def update_from_command(block: str | BlockInputFromCommand, version: int, issues
             "nbt": nbt_tags.unpack(nbt),
             "read": read
         },
-        pack_version, issues
+        pack_version.get(), issues
     ))
 
     # Return block
@@ -155,8 +154,7 @@ class BlockOutputFromNBT(TypedDict):
     nbt: dict | None
 
 def update_from_nbt(block: BlockInputFromNBT, version: int, issues: list[dict[str, str | int]]):
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     block_id = None
     data_value = -1
@@ -194,7 +192,7 @@ def update_from_nbt(block: BlockInputFromNBT, version: int, issues: list[dict[st
             "nbt": nbt,
             "read": read
         },
-        pack_version, issues
+        pack_version.get(), issues
     ))
 
     # Return block
@@ -226,8 +224,7 @@ class BlockOutput(TypedDict):
     nbt: dict | None
 
 def update(block: BlockInput, version: int, issues: list[dict[str, str | int]]) -> BlockOutput:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Extract arguments
     block_id = block["id"]
@@ -241,7 +238,7 @@ def update(block: BlockInput, version: int, issues: list[dict[str, str | int]])
         block_id, block_states, nbt = update_block_id(block_id, data_value, block_states, nbt or {}, read, issues)
 
     # Update NBT
-    nbt = nbt_tags.direct_update(nbt, pack_version, issues, "block", block_id or "minecraft:stone", read)
+    nbt = nbt_tags.direct_update(nbt, pack_version.get(), issues, "block", block_id or "minecraft:stone", read)
 
     return {
         "id": block_id,
@@ -267,7 +264,7 @@ def update_block_id(block_id: str | nbt_tags.TypeNumeric, data_value: int | str,
     post_fixes = option_manager.FIXES["post_fixes"]
 
     # Convert block ID
-    if pack_version <= 809:
+    if pack_version.get() <= 809:
         # Handle command block edge case
         if block_id == "minecraft:command_block":
             if read and data_value == -1:
@@ -277,7 +274,7 @@ def update_block_id(block_id: str | nbt_tags.TypeNumeric, data_value: int | str,
             else:
                 nbt["powered"] = nbt_tags.TypeByte(1 if data_value == 1 else 0)
 
-    if pack_version <= 1202:
+    if pack_version.get() <= 1202:
         # Exceptional cases:
         # - Banner (color is stored in NBT)
         # - Bed (color is stored in NBT)
@@ -382,10 +379,10 @@ def update_block_id(block_id: str | nbt_tags.TypeNumeric, data_value: int | str,
             if block_id == "minecraft:flower_pot":
                 if nbt != None and "Item" in nbt:
                     if "Data" in nbt:
-                        flower = items.update_from_command({"id": nbt["Item"], "data_value": nbt["Data"].value}, pack_version, issues)
+                        flower = items.update_from_command({"id": nbt["Item"], "data_value": nbt["Data"].value}, pack_version.get(), issues)
                         del nbt["Data"]
                     else:
-                        flower = items.update_from_command(nbt["Item"], pack_version, issues)
+                        flower = items.update_from_command(nbt["Item"], pack_version.get(), issues)
                     del nbt["Item"]
                     if flower != "minecraft:air":
                         block_id = f'minecraft:potted_{flower[10:].split("[")[0]}'
@@ -435,11 +432,11 @@ def update_block_id(block_id: str | nbt_tags.TypeNumeric, data_value: int | str,
                     log("Tag replacement data pack must be created!")
 
         # Blocks whose data values changed over time
-        if pack_version <= 809:
+        if pack_version.get() <= 809:
             if block_id == "minecraft:command_block":
                 block_states = {}
 
-    if pack_version <= 1302 or post_fixes:
+    if pack_version.get() <= 1302 or post_fixes:
         id_array = {
             "minecraft:sign":             "minecraft:oak_sign",
             "minecraft:wall_sign":        "minecraft:oak_wall_sign"
@@ -447,7 +444,7 @@ def update_block_id(block_id: str | nbt_tags.TypeNumeric, data_value: int | str,
         if block_id in id_array:
             block_id = id_array[block_id]
 
-    if pack_version <= 1502 or post_fixes:
+    if pack_version.get() <= 1502 or post_fixes:
         # Handle wall block states
         if block_id in [
             "minecraft:andesite_wall",
@@ -472,49 +469,49 @@ def update_block_id(block_id: str | nbt_tags.TypeNumeric, data_value: int | str,
                     if block_states[block_state] == "true":
                         block_states[block_state] = "low"
 
-    if pack_version <= 1605 or post_fixes:
+    if pack_version.get() <= 1605 or post_fixes:
         id_array = {
             "minecraft:grass_path": "minecraft:dirt_path"
         }
         if block_id in id_array:
             block_id = id_array[block_id]
 
-    if pack_version <= 1802 or post_fixes:
+    if pack_version.get() <= 1802 or post_fixes:
         id_array = {
             "#minecraft:carpets": "#minecraft:wool_carpets"
         }
         if block_id in id_array:
             block_id = id_array[block_id]
 
-    if pack_version <= 2002 or post_fixes:
+    if pack_version.get() <= 2002 or post_fixes:
         id_array = {
             "minecraft:grass": "minecraft:short_grass"
         }
         if block_id in id_array:
             block_id = id_array[block_id]
 
-    if pack_version <= 2103 or post_fixes:
+    if pack_version.get() <= 2103 or post_fixes:
         if block_id == "#minecraft:tall_flowers":
             block_id = "#tag_replacements:tall_flowers"
             tag_replacements.create_pack(
                 easy_map_updater.MINECRAFT_PATH / "saves" / option_manager.get_map_name()
             )
 
-    if pack_version <= 2104 or post_fixes:
+    if pack_version.get() <= 2104 or post_fixes:
         id_array = {
             "#minecraft:dead_bush_may_place_on": "#minecraft:dry_vegetation_may_place_on"
         }
         if block_id in id_array:
             block_id = id_array[block_id]
 
-    if pack_version <= 2105 or post_fixes:
+    if pack_version.get() <= 2105 or post_fixes:
         id_array = {
             "#minecraft:plays_ambient_desert_block_sounds": "#minecraft:triggers_ambient_desert_sand_block_sounds"
         }
         if block_id in id_array:
             block_id = id_array[block_id]
 
-    if pack_version <= 2108 or post_fixes:
+    if pack_version.get() <= 2108 or post_fixes:
         id_array = {
             "minecraft:chain": "minecraft:iron_chain"
         }
@@ -5,12 +5,17 @@
 
 # Import things
 
-import json
+import threading
+from collections import OrderedDict
 from typing import cast, Any
-from pathlib import Path
+from contextvars import ContextVar
 from lib.log import log
 from lib import option_manager
+from lib import side_effects
+from lib import translation_cache
+from lib import update_report
 from lib.data_pack_files import arguments
+from lib.data_pack_files import command_tree_compiler
 from lib.data_pack_files import target_selectors
 from lib.data_pack_files import nbt_tags
 from lib.data_pack_files import nbt_paths
@@ -44,30 +49,92 @@ from lib import utils
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
-namespaced_id = ""
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
+namespaced_id: ContextVar[str] = ContextVar("namespaced_id", default="")
 
-PROGRAM_PATH = Path(__file__).parent
-with (PROGRAM_PATH / "command_tree.json").open("r", encoding="utf-8") as file:
-    command_tree: dict[str, dict[str, str]] = json.load(file)
+CACHE_SIZE = 100000
+CACHE_FUNCTION_IDS = ["commands.mcfunction", "test_command"]
+update_cache: OrderedDict[tuple[str, int, str, str], tuple[str, int, str | None, list[side_effects.Effect]]] = OrderedDict()
+update_cache_lock = threading.Lock()
+cache_hits = 0
+cache_misses = 0
 
 
 
 # Define functions
 
 def update(line: str, version: int, function_id: str) -> str:
+    global cache_hits
+    global cache_misses
+
+    # Reuse the result of updating the same line before, replaying what it logged and created
+    key = get_cache_key(line, version, function_id)
+    entry = update_cache.get(key)
+    if entry is None:
+        entry = translation_cache.get("command", key)
+        if entry is not None:
+            update_cache[key] = entry
+    if entry is not None:
+        updated_line, updated_version, logged_function_id, effects = entry
+        # Messages include the function ID, so they can only be replayed for the same function
+        if logged_function_id is None or logged_function_id == function_id:
+            with update_cache_lock:
+                if key in update_cache:
+                    update_cache.move_to_end(key)
+            cache_hits += 1
+            pack_version.set(updated_version)
+            namespaced_id.set(function_id)
+            side_effects.replay(effects)
+            return updated_line
+
+    cache_misses += 1
+    side_effects.start_recording()
+    try:
+        updated_line = update_line(line, version, function_id)
+    finally:
+        effects = side_effects.stop_recording()
+    logged = any(effect[0] is log and function_id in effect[1][0] for effect in effects)
+    entry = (updated_line, pack_version.get(), function_id if logged else None, effects)
+    with update_cache_lock:
+        update_cache[key] = entry
+        if len(update_cache) > CACHE_SIZE:
+            update_cache.popitem(False)
+    translation_cache.put("command", key, entry)
+    return updated_line
+
+def get_cache_key(line: str, version: int, function_id: str) -> tuple[str, int, str, str]:
+    return (
+        line,
+        version,
+        function_id if function_id in CACHE_FUNCTION_IDS else "",
+        translation_cache.get_options_fingerprint()
+    )
+
+def reset_cache_stats():
+    global cache_hits
+    global cache_misses
+    translation_cache.reset_options_fingerprint()
+    cache_hits = 0
+    cache_misses = 0
+
+def log_cache_stats():
+    update_report.count("command_cache_hits", cache_hits)
+    update_report.count("command_cache_misses", cache_misses)
+    total = cache_hits + cache_misses
+    if total:
+        log(f"Reused {cache_hits} of {total} command updates ({cache_hits/total:.1%})")
+
+def update_line(line: str, version: int, function_id: str) -> str:
     # Assign version and function ID
-    global pack_version
-    pack_version = version
-    global namespaced_id
-    namespaced_id = function_id
+    pack_version.set(version)
+    namespaced_id.set(function_id)
 
     # Change version if ancient syntax is detected
-    if pack_version >= 1300:
+    if pack_version.get() >= 1300:
         for string in ["execute @", ",score_", "[score_", "scoreboard players tag", "scoreboard teams", ",r=", "[r=", ",rm=", "[rm=", ",c=", "[c="]:
             if string in line:
-                log("Pack version changed to 1202 in:\n  " + namespaced_id + "\n  " + line)
-                pack_version = 1202
+                log("Pack version changed to 1202 in:\n  " + namespaced_id.get() + "\n  " + line)
+                pack_version.set(1202)
 
     # Handle macro commands
     line = line.strip()
@@ -92,9 +159,9 @@ def update(line: str, version: int, function_id: str) -> str:
             return updated_line
     except Exception:
         if is_macro:
-            log(f'A macro command from {namespaced_id} has thrown an error:\n\n${line.strip()}')
+            log(f'A macro command from {namespaced_id.get()} has thrown an error:\n\n${line.strip()}')
         else:
-            log(f'A command from {namespaced_id} has thrown an error:\n\n{line.strip()}')
+            log(f'A command from {namespaced_id.get()} has thrown an error:\n\n{line.strip()}')
         utils.log_error(not is_macro)
         if is_macro:
             log(f'The above error was from an attempt to update a macro command. This behavior is considered experimental.', True)
@@ -110,9 +177,9 @@ def command(line: str, is_macro: bool, function_id: str) -> str:
         return "#" + line
 
     # Convert command
-    command = parsed_command(arguments.parse(line, " ", pack_version >= 1400), is_macro, True, function_id)
+    command = parsed_command(arguments.parse(line, " ", pack_version.get() >= 1400), is_macro, True, function_id)
     if command.endswith("COMMAND_HELPER"):
-        if namespaced_id == "commands.mcfunction":
+        if namespaced_id.get() == "commands.mcfunction":
             command = f'execute store result block ~ ~ ~ SuccessCount int 1 run {command[:-14]}'
         else:
             command = command[:-14]
@@ -160,25 +227,22 @@ def parsed_command(argument_list: list[str], is_macro: bool, display_command: bo
     # Initialize issues list
     issues: list[dict[str, str | int]] = []
 
-    return command_arguments(argument_list, command_tree, issues, is_macro, function_id)
+    return command_arguments(argument_list, command_tree_compiler.get_tree(pack_version.get()), issues, is_macro, function_id)
 
 
-def command_arguments(argument_list: list[str], guide: list | dict[str, Any], issues: list[dict[str, str | int]], is_macro: bool, function_id: str) -> str:
+def command_arguments(argument_list: list[str], guide: dict[str, Any], issues: list[dict[str, str | int]], is_macro: bool, function_id: str) -> str:
     # Get guide from array based on certain parameters
-    if isinstance(guide, list):
+    if "entries" in guide:
         # Iterate through entries in the guide
-        for entry in guide:
-            boolean = True
-            if "version" in entry:
-                boolean = test_list_entry(entry["version"], pack_version, boolean)
-            if "length" in entry:
-                boolean = test_list_entry(entry["length"], len(argument_list), boolean)
-            if "is_nbt" in entry:
+        for length, is_nbt, entry in guide["entries"]:
+            if is_nbt is not None:
                 boolean = (
-                    len(argument_list) > entry["is_nbt"] and
-                    argument_list[entry["is_nbt"]] and
-                    argument_list[entry["is_nbt"]][0] == "{"
+                    len(argument_list) > is_nbt and
+                    argument_list[is_nbt] and
+                    argument_list[is_nbt][0] == "{"
                 )
+            else:
+                boolean = length is None or test_list_entry(length, len(argument_list), True)
             if boolean:
                 return command_arguments(argument_list, entry, issues, is_macro, function_id)
         # Warn if no valid object was found
@@ -191,16 +255,12 @@ def command_arguments(argument_list: list[str], guide: list | dict[str, Any], is
         return guide_branch(argument_list, guide, issues, is_macro, function_id)
 
     # Return mapped arguments
-    if "mapping" in guide:
+    if "arguments" in guide:
         return guide_mapping(argument_list, guide, issues, is_macro, function_id)
 
-    # Sort through array if it is present
-    if "array" in guide:
-        return command_arguments(argument_list, guide["array"], issues, is_macro, function_id)
-
     log(f'WARNING: Branch is undefined for: {" ".join(argument_list)}')
     if defaults.DEBUG_MODE:
-        log(f'Current guide: {guide}')
+        log(f'Current guide: {guide["undefined"]}')
     return " ".join(argument_list)
 
 def test_list_entry(entry: dict[str, int] | int, value: int, boolean: bool) -> bool:
@@ -218,91 +278,62 @@ def guide_branch(argument_list: list[str], guide: dict[str, Any], issues: list[d
     # Get index
     index: int = guide["index"]
 
-    # Return if the branch is undefined
+    # Get lookup guide directly
     lookup_guide: dict[str, Any]
-    if len(argument_list) <= index or argument_list[index] not in guide["branches"]:
-        # Check for wildcard branches first
-        for branch in guide["branches"]:
-            if "**" not in branch:
-                continue
-            if branch[-2:] == "**" and branch[:-2] in argument_list[index] and branch[:-2] == argument_list[index][:len(branch) - 2]:
-                lookup_guide = guide["branches"][branch]
-                break
-            if branch[:2] == "**" and branch[2:] in argument_list[index] and branch[2:] == argument_list[index][2 - len(branch):]:
-                lookup_guide = guide["branches"][branch]
-                break
-        else:
-            if "else" not in guide:
-                if defaults.SEND_WARNINGS:
-                    log(f'WARNING: "{" ".join(argument_list)}" is not registered!')
-                return " ".join(argument_list)
-            # Use 'else' as the lookup guide
-            lookup_guide = guide["else"]
+    if len(argument_list) > index and argument_list[index] in guide["branches"]:
+        lookup_guide = guide["branches"][argument_list[index]]
 
-    # Get lookup guide directly
     else:
-        lookup_guide = guide["branches"][argument_list[index]]
+        # Check for wildcard branches first
+        wildcard_guide = None
+        if guide["prefixes"] or guide["suffixes"]:
+            wildcard_guide = get_wildcard_branch(argument_list[index], guide)
 
-    # Get reference from guide if lookup guide is a string
-    if isinstance(lookup_guide, str):
-        lookup_guide = guide["branches"][lookup_guide]
+        if wildcard_guide is not None:
+            lookup_guide = wildcard_guide
+        elif "else" in guide:
+            # Use 'else' as the lookup guide
+            lookup_guide = guide["else"]
+        else:
+            # Return if the branch is undefined
+            if defaults.SEND_WARNINGS:
+                log(f'WARNING: "{" ".join(argument_list)}" is not registered!')
+            return " ".join(argument_list)
 
     # Explore the branch
     return command_arguments(argument_list, lookup_guide, issues, is_macro, function_id)
 
+def get_wildcard_branch(argument: str, guide: dict[str, Any]) -> dict[str, Any] | None:
+    for prefix, lookup_guide in guide["prefixes"]:
+        if argument.startswith(prefix):
+            return lookup_guide
+    for suffix, lookup_guide in guide["suffixes"]:
+        if argument.endswith(suffix):
+            return lookup_guide
+    return None
 
-def guide_mapping(argument_list: list[str], guide: dict[str, list | dict], issues: list[dict[str, str | int]], is_macro: bool, function_id: str) -> str:
-    # Get mapping
-    mapping: list[str] = cast(list, guide["mapping"])
-
-    # Get legend
-    legend = get_legend(mapping, guide)
-
-    # Get defaults
-    defaults = {}
-    if "defaults" in guide:
-        defaults: dict[str, str] = cast(dict, guide["defaults"])
 
+def guide_mapping(argument_list: list[str], guide: dict[str, Any], issues: list[dict[str, str | int]], is_macro: bool, function_id: str) -> str:
     # Compile new arguments list
     new_argument_list: list[str] = []
-    for index in range(len(mapping)):
+    for argument_type, legend_source, has_default, default in guide["arguments"]:
         # Get source
-        source = get_source(argument_list, legend[index])
+        source = get_source(argument_list, legend_source)
 
         # Insert default parameter
         if source == "":
-            if str(index) in defaults:
-                source = defaults[str(index)]
+            if has_default:
+                source = default
             else:
                 break
 
         # Add argument to list
-        new_argument_list.append(update_argument(source, mapping[index], issues, is_macro, function_id))
+        new_argument_list.append(update_argument(source, argument_type, issues, is_macro, function_id))
 
     # Fix edge cases with helper functions
     return fix_helper_edge_case(new_argument_list, argument_list, issues, is_macro, function_id)
     
 
-def get_legend(mapping: list[str], guide: dict[str, Any]) -> list:
-    # Get legend directly
-    if "legend" in guide:
-        return guide["legend"]
-
-    # Get legend from legend array
-    if "legend_array" in guide:
-        for entry in guide["legend_array"]:
-            bool = True
-            if "max" in entry and pack_version > entry["max"]:
-                bool = False
-            if "min" in entry and pack_version < entry["min"]:
-                bool = False
-            if bool:
-                return entry["legend"]
-
-    # Set legend to direct mapping if all else fails
-    return list(range(len(mapping)))
-
-
 def get_source(argument_list: list[str], source: int | str | dict[str, Any]) -> str | dict[str, Any]:
     # Get source from arguments if a number
     if isinstance(source, int):
@@ -365,14 +396,14 @@ def update_argument(argument: str | dict[str, Any], argument_type: str, issues:
     
     # Return special case for execute sub commands
     if argument_type == "command":
-        return execute_command(cast(list[str], argument), pack_version, issues, is_macro, function_id)
+        return execute_command(cast(list[str], argument), pack_version.get(), issues, is_macro, function_id)
 
     # Return arguments based on type
     if argument_type in ARGUMENT_FUNCTIONS:
         argument_tuple = ARGUMENT_FUNCTIONS[argument_type]
         if argument_tuple[1] == None:
-            return argument_tuple[0](argument, pack_version, issues)
-        return argument_tuple[0](argument, pack_version, issues, argument_tuple[1])
+            return argument_tuple[0](argument, pack_version.get(), issues)
+        return argument_tuple[0](argument, pack_version.get(), issues, argument_tuple[1])
 
     # Report that argument type was not found
     if defaults.SEND_WARNINGS:
@@ -416,7 +447,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
                 continue
             for i in range(len(unpacked_nbt[key]["messages"])):
                 message = unpacked_nbt[key]["messages"][i]
-                unpacked_nbt[key]["messages"][i] = json_text_component.update(message, pack_version, issues, {"mangled": False, "pack": False, "from_sign": True})
+                unpacked_nbt[key]["messages"][i] = json_text_component.update(message, pack_version.get(), issues, {"mangled": False, "pack": False, "from_sign": True})
         return f'emu_sign_text {nbt_tags.pack(unpacked_nbt)}'
 
     # Remove empty NBT from summon command
@@ -478,7 +509,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
     # Fix comparator block updates (FIND VERSION WHERE IT IS NECESSARY)
     if (
         option_manager.FIXES["command_helper"]["mitigate_block_update"] and
-        pack_version <= 1202 and
+        pack_version.get() <= 1202 and
         argument_list[0] == "setblock" and
         len(argument_list) > 4 and
         argument_list[4].split("{")[0].split("[")[0] == "minecraft:comparator"
@@ -486,7 +517,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
         return block_update_mitigator.handle_comparator_setblock(argument_list, is_macro)
     
     # Fix pre-1.21.9 bugs
-    if pack_version <= 2108:
+    if pack_version.get() <= 2108:
         # Fix spawn chunks being removed in 1.21.9
         if (option_manager.FIXES["command_helper"]["restore_spawn_chunks"]):
             if argument_list[0] == "setworldspawn":
@@ -534,7 +565,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
                 return world_border_dimensions.handle_world_border_commands(argument_list, is_macro)
     
     # Fix pre-1.21.5 bugs
-    if pack_version <= 2104:
+    if pack_version.get() <= 2104:
         # Fix pre-1.21.5 structure blocks having different default NBT data
         if (
             len(argument_list) >= 5 and
@@ -574,7 +605,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
                 argument_list[5] = '{Radius:0.0f,custom_particle:{type:"minecraft:block",block_state:{Name:"minecraft:air"}}}'
     
     # Fix pre-1.21.4 bugs
-    if pack_version <= 2103:
+    if pack_version.get() <= 2103:
         # Fix pre-1.21.4 merging into custom model data requiring initialization of the tag first
         if (option_manager.FIXES["command_helper"]["custom_model_data_store"]):
             source: str | None = None
@@ -637,7 +668,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
                 return custom_model_data_store.handle_store(argument_list, is_macro, source, path, type_index)
     
     # Fix pre-1.21.2 bugs
-    if pack_version <= 2101:
+    if pack_version.get() <= 2101:
         # Fix pre-1.21.2 teleports not dismounting riders
         if (
             option_manager.FIXES["command_helper"]["teleport_dismount"] and
@@ -647,7 +678,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
             return teleport_dismount.handle_teleport(argument_list, is_macro)
     
     # Fix pre-1.20.5 bugs
-    if pack_version <= 2004:
+    if pack_version.get() <= 2004:
         # Fix pre-1.20.5 handling of effects
         if argument_list[0] == "effect" and option_manager.FIXES["command_helper"]["effect_overflow"]:
             if (
@@ -669,7 +700,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
                     return effect_overflow.remove_all_effects(argument_list, is_macro)
     
     # Fix pre-1.20 bugs
-    if pack_version <= 1904:
+    if pack_version.get() <= 1904:
         # Fix pre-1.20 handling of /data merge on signs
         if (
             option_manager.FIXES["command_helper"]["sign_nbt_merge"] and
@@ -684,7 +715,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
                 return sign_merge_handler.handle_merge(argument_list, is_macro, block_nbt, old_block_nbt)
     
     # Fix pre-1.18 bugs
-    if pack_version <= 1702:
+    if pack_version.get() <= 1702:
         # Fix pre-1.18 handling of falling blocks removing blocks and not spawning Time:0 versions
         if (
             option_manager.FIXES["command_helper"]["time_0_falling_block"] and
@@ -701,7 +732,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
             return falling_block_handler.handle_non_time_0(argument_list, is_macro, entity_nbt)
         
     # Fix pre-1.16 bugs
-    if pack_version <= 1502:
+    if pack_version.get() <= 1502:
         if (
             option_manager.FIXES["command_helper"]["illegal_block_states"] and
             len(argument_list) >= 5 and 
@@ -733,7 +764,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
     # Fix pre-1.13 testfor handling of SuccessCount
     if (
         option_manager.FIXES["command_helper"]["command_block_testfor"] and
-        pack_version <= 1202 and
+        pack_version.get() <= 1202 and
         len(argument_list) == 4 and
         argument_list[0] == "execute" and
         argument_list[1] == "if" and
@@ -742,7 +773,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
         return f'execute store result block ~ ~ ~ SuccessCount int 1 if entity {argument_list[3]}'
 
     # Fix pre-1.12 block NBT modifications
-    if pack_version <= 1102:
+    if pack_version.get() <= 1102:
         if argument_list[0] == "setblock" and option_manager.FIXES["command_helper"]["block_nbt_modifier"]:
             if len(argument_list) > 4 and "{" in argument_list[4]:
                 return block_nbt_modifier.handle_setblock(argument_list, is_macro)
@@ -752,7 +783,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
                 return block_nbt_modifier.handle_fill(argument_list, is_macro)
             
     # Fix pre-1.11 bugs
-    if pack_version <= 1002:
+    if pack_version.get() <= 1002:
         # Fix pre-1.11 fireworks damaging players
         if (
             option_manager.FIXES["command_helper"]["cancel_firework_damage"] and
@@ -774,7 +805,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
                 argument_list[5] = '{Item:{id:"minecraft:stone",Count:1b}}'
     
     # Fix pre-1.10 teleport canceling motion
-    if pack_version <= 904:
+    if pack_version.get() <= 904:
         if (
             option_manager.FIXES["command_helper"]["teleport_motion_cancel"] and
             len(argument_list) >= 9 and
@@ -795,7 +826,7 @@ def fix_helper_edge_case(argument_list: list[str], old_argument_list: list[str],
     # Fix pre-1.9 clone breaking blocks
     if (
         option_manager.FIXES["command_helper"]["mitigate_block_update"] and
-        pack_version <= 809 and
+        pack_version.get() <= 809 and
         argument_list[0] == "clone"
     ):
         return block_update_mitigator.handle_clean_clone(argument_list, is_macro)
@@ -12,6 +12,7 @@ from lib.log import log
 from lib import defaults
 from lib import utils
 from lib import option_manager
+from lib import side_effects
 
 
 
@@ -60,9 +61,7 @@ def create_function(commands: str, is_macro: bool) -> str:
 
     # Create function
     function_name = hashlib.sha256(commands.encode("utf-8")).hexdigest()
-    function_path = data_pack_path / "data" / "help" / "function" / f"{function_name}.mcfunction"
-    function_path.parent.mkdir(exist_ok=True, parents=True)
-    utils.safe_file_write(function_path, commands)
+    write_helper_file(data_pack_path / "data" / "help" / "function" / f"{function_name}.mcfunction", commands)
 
     return f"function help:{function_name}{macro_provider}COMMAND_HELPER"
 
@@ -75,9 +74,7 @@ def create_predicate(contents: str) -> str:
     
     # Create predicate
     predicate_name = hashlib.sha256(contents.encode("utf-8")).hexdigest()
-    predicate_path = data_pack_path / "data" / "help" / "predicate" / f"{predicate_name}.json"
-    predicate_path.parent.mkdir(exist_ok=True, parents=True)
-    utils.safe_file_write(predicate_path, contents)
+    write_helper_file(data_pack_path / "data" / "help" / "predicate" / f"{predicate_name}.json", contents)
 
     return f"help:{predicate_name}"
 
@@ -90,20 +87,35 @@ def create_painting_variant(contents: str) -> str:
     
     # Create painting variant
     painting_variant_name = hashlib.sha256(contents.encode("utf-8")).hexdigest()
-    painting_variant_path = data_pack_path / "data" / "help" / "painting_variant" / f"{painting_variant_name}.json"
-    painting_variant_path.parent.mkdir(exist_ok=True, parents=True)
-    utils.safe_file_write(painting_variant_path, contents)
+    write_helper_file(data_pack_path / "data" / "help" / "painting_variant" / f"{painting_variant_name}.json", contents)
 
     return f"help:{painting_variant_name}"
 
 
 
+def write_helper_file(file_path: Path, contents: str):
+    # Writing is left to the main process when updating in parallel, so that files are created in the same order
+    if side_effects.defer(write_helper_file, file_path, contents):
+        return
+
+    file_path.parent.mkdir(exist_ok=True, parents=True)
+    utils.safe_file_write(file_path, contents)
+
+
+
 def prepare_helper_data_pack() -> Path | None:
     # Prepare data pack path
     world = data_pack_path = MINECRAFT_PATH / "saves" / option_manager.get_map_name()
     if not world.exists():
         return None
     data_pack_path = world / "datapacks" / "command_helper"
+    write_helper_data_pack(data_pack_path)
+    return data_pack_path
+
+def write_helper_data_pack(data_pack_path: Path):
+    if side_effects.defer(write_helper_data_pack, data_pack_path):
+        return
+
     data_pack_path.mkdir(exist_ok=True, parents=True)
 
     if defaults.DEBUG_MODE:
@@ -161,6 +173,4 @@ def prepare_helper_data_pack() -> Path | None:
     utils.safe_file_write(file_path,
         "# Remove motion modified tag\n\n"
         "tag @e remove help.motion_modified"
-    )
-
-    return data_pack_path
\ No newline at end of file
+    )
\ No newline at end of file
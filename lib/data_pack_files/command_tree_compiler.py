@@ -0,0 +1,141 @@
+# Easy Map Updater
+# Copyright (C) 2024  Jesse Spicer, and StickyPiston Hosting
+
+
+
+# Import things
+
+import json
+from pathlib import Path
+from typing import Any
+
+
+
+# Initialize variables
+
+PROGRAM_PATH = Path(__file__).parent
+TREE_PATH = PROGRAM_PATH / "command_tree.json"
+
+compiled_trees: dict[int, dict[str, Any]] = {}
+
+
+
+# Define functions
+
+def get_tree(version: int) -> dict[str, Any]:
+    # Compile the tree once per pack version
+    if version not in compiled_trees:
+        with TREE_PATH.open("r", encoding="utf-8") as file:
+            command_tree: dict[str, Any] = json.load(file)
+        compiled_trees[version] = compile_guide(command_tree, version, {})
+    return compiled_trees[version]
+
+
+
+def compile_guide(guide: list | dict[str, Any], version: int, compiled_guides: dict[int, Any]) -> dict[str, Any]:
+    # Guides reached through more than one alias are compiled once and shared
+    if id(guide) in compiled_guides:
+        return compiled_guides[id(guide)]
+
+    if isinstance(guide, list):
+        compiled_guide = compile_list(guide, version, compiled_guides)
+    elif "index" in guide:
+        compiled_guide = compile_branch(guide, version, compiled_guides)
+    elif "mapping" in guide:
+        compiled_guide = compile_mapping(guide, version)
+    elif "array" in guide:
+        compiled_guide = compile_guide(guide["array"], version, compiled_guides)
+    else:
+        compiled_guide = {"undefined": guide}
+
+    compiled_guides[id(guide)] = compiled_guide
+    return compiled_guide
+
+def compile_list(guide: list[dict[str, Any]], version: int, compiled_guides: dict[int, Any]) -> dict[str, Any]:
+    # Entries for other versions are dropped, only the length and NBT checks are left for runtime
+    entries: list[tuple[dict[str, int] | int | None, int | None, dict[str, Any]]] = []
+    for entry in guide:
+        if "is_nbt" in entry:
+            entries.append((None, entry["is_nbt"], compile_guide(entry, version, compiled_guides)))
+            continue
+        if "version" in entry and not test_version(entry["version"], version):
+            continue
+        entries.append((entry.get("length"), None, compile_guide(entry, version, compiled_guides)))
+
+        # Entries after one that always matches can't be reached
+        if "length" not in entry:
+            break
+
+    # Skip the list entirely if the first entry always matches
+    if entries and entries[0][0] is None and entries[0][1] is None:
+        return entries[0][2]
+    return {"entries": entries}
+
+def compile_branch(guide: dict[str, Any], version: int, compiled_guides: dict[int, Any]) -> dict[str, Any]:
+    branches: dict[str, Any] = guide["branches"]
+
+    # Resolve aliases to the branch they point to
+    exact_branches: dict[str, dict[str, Any]] = {}
+    for branch in branches:
+        exact_branches[branch] = compile_guide(resolve_alias(branches, branches[branch]), version, compiled_guides)
+
+    # Split wildcard branches into prefixes and suffixes, checking the most specific ones first
+    prefixes: list[tuple[str, dict[str, Any]]] = []
+    suffixes: list[tuple[str, dict[str, Any]]] = []
+    for branch in branches:
+        if branch[-2:] == "**":
+            prefixes.append((branch[:-2], exact_branches[branch]))
+        elif branch[:2] == "**":
+            suffixes.append((branch[2:], exact_branches[branch]))
+    prefixes.sort(key=lambda wildcard: len(wildcard[0]), reverse=True)
+    suffixes.sort(key=lambda wildcard: len(wildcard[0]), reverse=True)
+
+    compiled_guide: dict[str, Any] = {
+        "index": guide["index"],
+        "branches": exact_branches,
+        "prefixes": prefixes,
+        "suffixes": suffixes,
+    }
+    if "else" in guide:
+        compiled_guide["else"] = compile_guide(resolve_alias(branches, guide["else"]), version, compiled_guides)
+    return compiled_guide
+
+def resolve_alias(branches: dict[str, Any], lookup_guide: str | list | dict[str, Any]) -> list | dict[str, Any]:
+    if isinstance(lookup_guide, str):
+        return branches[lookup_guide]
+    return lookup_guide
+
+def compile_mapping(guide: dict[str, Any], version: int) -> dict[str, Any]:
+    # Pair each argument type with where it comes from and its default
+    mapping: list[str] = guide["mapping"]
+    legend = get_legend(mapping, guide, version)
+    defaults: dict[str, Any] = guide.get("defaults", {})
+    return {
+        "arguments": [
+            (mapping[index], legend[index], str(index) in defaults, defaults.get(str(index)))
+            for index in range(len(mapping))
+        ]
+    }
+
+def get_legend(mapping: list[str], guide: dict[str, Any], version: int) -> list:
+    # Get legend directly
+    if "legend" in guide:
+        return guide["legend"]
+
+    # Get legend from legend array
+    if "legend_array" in guide:
+        for entry in guide["legend_array"]:
+            if test_version(entry, version):
+                return entry["legend"]
+
+    # Set legend to direct mapping if all else fails
+    return list(range(len(mapping)))
+
+def test_version(entry: dict[str, int] | int, version: int) -> bool:
+    if isinstance(entry, dict):
+        if "max" in entry and version > entry["max"]:
+            return False
+        if "min" in entry and version < entry["min"]:
+            return False
+        return True
+    return version == entry
@@ -6,6 +6,7 @@
 # Import things
 
 from typing import cast
+from contextvars import ContextVar
 from lib.data_pack_files import nbt_tags
 from lib.data_pack_files import miscellaneous
 from lib.data_pack_files import tables
@@ -19,7 +20,7 @@ import easy_map_updater
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
@@ -27,8 +28,7 @@ pack_version = defaults.PACK_VERSION
 
 def update(entity: str | dict[str, str | bool], version: int, issues: list[dict[str, str | int]]) -> str:
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Initialize parameters
     entity_id = "minecraft:pig"
@@ -69,13 +69,13 @@ def update(entity: str | dict[str, str | bool], version: int, issues: list[dict[
 
     entity_id = miscellaneous.namespace(entity_id)
 
-    if pack_version <= 1202:
+    if pack_version.get() <= 1202:
         entity_id = utils.safe_lowercase(entity_id)
         id_array = tables.ENTITY_IDS
         if entity_id in id_array:
             entity_id = id_array[entity_id]
 
-    if pack_version <= 1502:
+    if pack_version.get() <= 1502:
         id_array = {
             "minecraft:zombie_pigman": "minecraft:zombified_piglin"
         }
@@ -83,7 +83,7 @@ def update(entity: str | dict[str, str | bool], version: int, issues: list[dict[
             entity_id = id_array[entity_id]
         
     # In 1.21.2, boat IDs were split up
-    if pack_version <= 2101:
+    if pack_version.get() <= 2101:
         if read and boat_type is None:
             if entity_id == "minecraft:boat":
                 entity_id = "#minecraft:boats"
@@ -107,7 +107,7 @@ def update(entity: str | dict[str, str | bool], version: int, issues: list[dict[
                     entity_id = id_array[boat_type]
 
     # In 1.21.5, potions were split into splash potions and lingering potions
-    if pack_version <= 2104 and entity_id == "minecraft:potion":
+    if pack_version.get() <= 2104 and entity_id == "minecraft:potion":
         if read and item_type is None:
             entity_id = "#tag_replacements:potion"
             tag_replacements.create_pack(
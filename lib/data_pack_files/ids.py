@@ -6,6 +6,7 @@
 # Import things
 
 from typing import cast
+from contextvars import ContextVar
 from lib.log import log
 from lib.data_pack_files import nbt_tags
 from lib.data_pack_files import miscellaneous
@@ -22,15 +23,14 @@ from lib import option_manager
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
 # Define functions
 
 def biome(name: str, version: int, issues: list[dict[str, str | int]]) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     name = miscellaneous.namespace(name)
 
@@ -142,8 +142,7 @@ def biome(name: str, version: int, issues: list[dict[str, str | int]]) -> str:
     return name
 
 def effect(name: int | str | nbt_tags.TypeNumeric, version: int, issues: list[dict[str, str | int]]) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     if isinstance(name, nbt_tags.TypeNumeric):
         name = int(name.value)
@@ -161,8 +160,7 @@ def effect(name: int | str | nbt_tags.TypeNumeric, version: int, issues: list[di
     return miscellaneous.namespace(name)
 
 def enchantment(name: str | int | nbt_tags.TypeNumeric, version: int, issues: list[dict[str, str | int]]) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Convert if a numeric
     if isinstance(name, nbt_tags.TypeNumeric):
@@ -188,21 +186,19 @@ def enchantment(name: str | int | nbt_tags.TypeNumeric, version: int, issues: li
     return name
 
 def poi(name: str, version: int, issues: list[dict[str, str | int]]) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     name = miscellaneous.namespace(name)
 
     return name
 
 def scoreboard_objective_criteria(objective: dict[str, str], version: int, issues: list[dict[str, str | int]]) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     name = objective["name"]
     criteria = objective["criteria"]
 
-    if pack_version <= 1202:
+    if pack_version.get() <= 1202:
         if criteria.split(".")[0] == "stat":
             block_stats = {
                 "mineBlock": "minecraft.mined:minecraft."
@@ -222,21 +218,21 @@ def scoreboard_objective_criteria(objective: dict[str, str], version: int, issue
             object_id = ":".join(criteria.split(".")[2:])
 
             if stat in block_stats:
-                block_id = cast(str, blocks.update({"id": object_id, "data_value": -1, "block_states": {}, "nbt": {}, "read": True}, pack_version, issues)["id"])
+                block_id = cast(str, blocks.update({"id": object_id, "data_value": -1, "block_states": {}, "nbt": {}, "read": True}, pack_version.get(), issues)["id"])
                 if block_id in tables.BLOCK_TAG_REPLACEMENTS:
                     scoreboard_objective_splitter.insert_objective(name, block_stats[stat], tables.BLOCK_TAG_REPLACEMENTS[block_id])
                     return "dummy"
                 return block_stats[stat] + block_id[10:]
             
             elif stat in item_stats:
-                item_id = cast(str, items.update({"id": object_id, "data_value": -1, "components": item_component.ItemComponents([]), "nbt": {}, "read": True}, pack_version, issues)["id"])
+                item_id = cast(str, items.update({"id": object_id, "data_value": -1, "components": item_component.ItemComponents([]), "nbt": {}, "read": True}, pack_version.get(), issues)["id"])
                 if item_id in tables.ITEM_TAG_REPLACEMENTS:
                     scoreboard_objective_splitter.insert_objective(name, item_stats[stat], tables.ITEM_TAG_REPLACEMENTS[item_id])
                     return "dummy"
                 return item_stats[stat] + item_id[10:]
 
             elif stat in entity_stats:
-                return entity_stats[stat] + entities.update(object_id, pack_version, issues)[10:]
+                return entity_stats[stat] + entities.update(object_id, pack_version.get(), issues)[10:]
             
             else:
                 id_array = tables.SCOREBOARD_STATISTIC_IDS
@@ -246,19 +242,19 @@ def scoreboard_objective_criteria(objective: dict[str, str], version: int, issue
             
 
             if stat == "mineBlock":
-                return "minecraft.mined:minecraft."     + blocks.update_from_command(object_id, pack_version, issues)[10:]
+                return "minecraft.mined:minecraft."     + blocks.update_from_command(object_id, pack_version.get(), issues)[10:]
             elif stat == "breakItem":
-                return "minecraft.broken:minecraft."    + items.update_from_command( object_id, pack_version, issues)[10:]
+                return "minecraft.broken:minecraft."    + items.update_from_command( object_id, pack_version.get(), issues)[10:]
             elif stat == "craftItem":
-                return "minecraft.crafted:minecraft."   + items.update_from_command( object_id, pack_version, issues)[10:]
+                return "minecraft.crafted:minecraft."   + items.update_from_command( object_id, pack_version.get(), issues)[10:]
             elif stat == "drop":
-                return "minecraft.dropped:minecraft."   + items.update_from_command( object_id, pack_version, issues)[10:]
+                return "minecraft.dropped:minecraft."   + items.update_from_command( object_id, pack_version.get(), issues)[10:]
             elif stat == "useItem":
-                return "minecraft.used:minecraft."      + items.update_from_command( object_id, pack_version, issues)[10:]
+                return "minecraft.used:minecraft."      + items.update_from_command( object_id, pack_version.get(), issues)[10:]
             elif stat == "entityKilledBy":
-                return "minecraft.killed_by:minecraft." + entities.update(           object_id, pack_version, issues)[10:]
+                return "minecraft.killed_by:minecraft." + entities.update(           object_id, pack_version.get(), issues)[10:]
             elif stat == "killEntity":
-                return "minecraft.killed:minecraft."    + entities.update(           object_id, pack_version, issues)[10:]
+                return "minecraft.killed:minecraft."    + entities.update(           object_id, pack_version.get(), issues)[10:]
             else:
                 id_array = tables.SCOREBOARD_STATISTIC_IDS
                 if stat in id_array:
@@ -269,18 +265,17 @@ def scoreboard_objective_criteria(objective: dict[str, str], version: int, issue
     return criteria
 
 def sound_event(name: str, version: int, issues: list[dict[str, str | int]]) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Apply namespace
     name = miscellaneous.namespace(name)
 
     # Convert ID based on version
-    if pack_version <= 809:
+    if pack_version.get() <= 809:
         id_array = tables.SOUND_EVENTS_1_8
         if name in id_array:
             name = id_array[name]
-    if pack_version <= 1202:
+    if pack_version.get() <= 1202:
         id_array = tables.SOUND_EVENTS_1_12
         if name in id_array:
             name = id_array[name]
@@ -291,7 +286,7 @@ def sound_event(name: str, version: int, issues: list[dict[str, str | int]]) ->
 
     post_fixes = option_manager.FIXES["post_fixes"]
 
-    if pack_version <= 2105 or post_fixes:
+    if pack_version.get() <= 2105 or post_fixes:
         id_array = {
             "minecraft:block.sand.wind": "minecraft:block.dry_grass.ambient"
         }
@@ -301,8 +296,7 @@ def sound_event(name: str, version: int, issues: list[dict[str, str | int]]) ->
     return name
 
 def structure(name: str, version: int, issues: list[dict[str, str | int]]) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     name = miscellaneous.namespace(name)
 
@@ -11,6 +11,7 @@ from lib.log import log
 from lib import defaults
 from lib import utils
 from lib import option_manager
+from lib import side_effects
 from lib.data_pack_files import command_helper
 from lib.data_pack_files import nbt_tags
 from lib.data_pack_files import nbt_to_json
@@ -690,6 +691,7 @@ def conform_component(component: ItemComponent, version: int):
 
 
 def conform_item_model_component(value: str) -> str:
+    side_effects.record(conform_item_model_component, value)
     resource_pack_path = easy_map_updater.MINECRAFT_PATH / "resourcepacks" / option_manager.get_resource_pack()
     if not resource_pack_path.exists():
         log(f"WARNING: Resource pack must exist to update component minecraft:item_model")
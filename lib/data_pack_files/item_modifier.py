@@ -8,6 +8,7 @@
 import json
 from pathlib import Path
 from typing import cast, Any
+from contextvars import ContextVar
 from lib.log import log
 from lib import defaults
 from lib import utils
@@ -27,15 +28,14 @@ from lib.data_pack_files import item_component
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
 # Define functions
 
 def update(file_path: Path, source_file_path: Path, version: int):
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Read file
     contents, load_bool = json_manager.safe_load(source_file_path)
@@ -49,8 +49,7 @@ def update(file_path: Path, source_file_path: Path, version: int):
 
 
 def item_modifier(contents: dict[str, Any] | list, version: int, object_id: str = "") -> dict[str, Any] | list:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Handle lists
     if isinstance(contents, list):
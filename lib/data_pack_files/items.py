@@ -6,6 +6,7 @@
 # Import things
 
 from typing import cast, TypedDict, NotRequired, Any
+from contextvars import ContextVar
 from lib.log import log
 from lib.data_pack_files import arguments
 from lib.data_pack_files import nbt_tags
@@ -24,7 +25,7 @@ import easy_map_updater
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
@@ -52,8 +53,7 @@ def update_from_command_read(item: str | ItemInputFromCommand, version: int, iss
 
 def update_from_command(item: str | ItemInputFromCommand, version: int, issues: list[dict[str, str | int]]) -> str:
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Initialize parameters
     item_id = "minecraft:air"
@@ -101,7 +101,7 @@ def update_from_command(item: str | ItemInputFromCommand, version: int, issues:
             "nbt": nbt_tags.unpack(nbt),
             "read": read
         },
-        pack_version, issues
+        pack_version.get(), issues
     ))
 
     # Return item
@@ -122,8 +122,7 @@ class ItemInputFromNBT(TypedDict):
 
 def update_from_nbt(item: ItemInputFromNBT, version: int, issues: list[dict[str, str | int]]) -> dict[str, Any]:
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Return if a macro token
     if isinstance(item, nbt_tags.TypeMacroToken):
@@ -165,7 +164,7 @@ def update_from_nbt(item: ItemInputFromNBT, version: int, issues: list[dict[str,
             "nbt": nbt,
             "read": read
         },
-        pack_version, issues
+        pack_version.get(), issues
     )
 
     # Return item
@@ -190,8 +189,7 @@ class ItemInputFromJSON(TypedDict):
 
 def update_from_json(item: ItemInputFromJSON, version: int, issues: list[dict[str, str | int]]) -> dict[str, Any]:
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Initialize parameters
     item_id = None
@@ -215,7 +213,7 @@ def update_from_json(item: ItemInputFromJSON, version: int, issues: list[dict[st
             "nbt": nbt_tags.unpack(nbt) if nbt else None,
             "read": False
         },
-        pack_version, issues
+        pack_version.get(), issues
     )
 
     result: dict[str, Any] = {"id": new_item["id"]}
@@ -238,8 +236,7 @@ class ItemOutput(TypedDict):
 
 def update(item: ItemInput, version: int, issues: list[dict[str, str | int]]) -> ItemOutput:
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Extract arguments
     item_id = item["id"]
@@ -255,11 +252,11 @@ def update(item: ItemInput, version: int, issues: list[dict[str, str | int]]) ->
     # Modify item ID if a spawn egg and the "Riding" tag is present
     old_item_id = item_id
     if item_id != None and item_id.endswith("_spawn_egg") and nbt != None and "EntityTag" in nbt and "Riding" in nbt["EntityTag"]:
-        item_id = entities.update(extract_riding_id(nbt["EntityTag"]["Riding"]), pack_version, issues) + "_spawn_egg"
+        item_id = entities.update(extract_riding_id(nbt["EntityTag"]["Riding"]), pack_version.get(), issues) + "_spawn_egg"
 
     # Update NBT
     if nbt:
-        components = item_component.ItemComponents.unpack_from_dict(nbt_tags.direct_update(nbt, pack_version, issues, "item_tag", old_item_id or "minecraft:stone", read), read)
+        components = item_component.ItemComponents.unpack_from_dict(nbt_tags.direct_update(nbt, pack_version.get(), issues, "item_tag", old_item_id or "minecraft:stone", read), read)
 
     # Conform component format
     if version >= 2005:
@@ -270,7 +267,7 @@ def update(item: ItemInput, version: int, issues: list[dict[str, str | int]]) ->
         components["minecraft:damage"] = nbt_tags.TypeInt(data_value)
 
     # Apply pre-1.8 adventure mode fixes
-    if pack_version <= 710 and option_manager.FIXES["old_adventure_mode_items"] and not read:
+    if pack_version.get() <= 710 and option_manager.FIXES["old_adventure_mode_items"] and not read:
         components = insert_old_adventure_mode_tags(components, item_id or "minecraft:stone")
 
     return {
@@ -301,7 +298,7 @@ def update_item_id(item_id: str | nbt_tags.TypeNumeric, components: item_compone
     post_fixes = option_manager.FIXES["post_fixes"]
 
     # Convert item ID
-    if pack_version <= 1202:
+    if pack_version.get() <= 1202:
         if read and data_value == -1:
             id_array = tables.ITEM_IDS_READ
             if item_id in id_array:
@@ -315,16 +312,16 @@ def update_item_id(item_id: str | nbt_tags.TypeNumeric, components: item_compone
             id_array = tables.ITEM_IDS_DATA
 
             if item_id == "minecraft:spawn_egg":
-                if pack_version >= 900:
+                if pack_version.get() >= 900:
                     if nbt != None and "EntityTag" in nbt and "id" in nbt["EntityTag"]:
-                        item_id = entities.update(nbt["EntityTag"]["id"], pack_version, issues) + "_spawn_egg"
+                        item_id = entities.update(nbt["EntityTag"]["id"], pack_version.get(), issues) + "_spawn_egg"
                     else:
                         item_id = "minecraft:pig_spawn_egg"
                 else:
                     if data_value == -1:
                         item_id = "minecraft:pig_spawn_egg"
                     else:
-                        item_id = entities.update(numeric_ids.update_entity(data_value), pack_version, issues) + "_spawn_egg"
+                        item_id = entities.update(numeric_ids.update_entity(data_value), pack_version.get(), issues) + "_spawn_egg"
 
             elif item_id in id_array:
                 data_array = id_array[item_id]
@@ -333,7 +330,7 @@ def update_item_id(item_id: str | nbt_tags.TypeNumeric, components: item_compone
                 else:
                     item_id = data_array[max(data_value, 0)]
 
-    if pack_version <= 1302 or post_fixes:
+    if pack_version.get() <= 1302 or post_fixes:
         id_array = {
             "minecraft:cactus_green":     "minecraft:green_dye",
             "minecraft:dandelion_yellow": "minecraft:yellow_dye",
@@ -343,28 +340,28 @@ def update_item_id(item_id: str | nbt_tags.TypeNumeric, components: item_compone
         if item_id in id_array:
             item_id = id_array[item_id]
 
-    if pack_version <= 1502 or post_fixes:
+    if pack_version.get() <= 1502 or post_fixes:
         id_array = {
             "minecraft:zombie_pigman_spawn_egg": "minecraft:zombified_piglin_spawn_egg"
         }
         if item_id in id_array:
             item_id = id_array[item_id]
 
-    if pack_version <= 1605 or post_fixes:
+    if pack_version.get() <= 1605 or post_fixes:
         id_array = {
             "minecraft:grass_path": "minecraft:dirt_path"
         }
         if item_id in id_array:
             item_id = id_array[item_id]
 
-    if pack_version <= 2002 or post_fixes:
+    if pack_version.get() <= 2002 or post_fixes:
         id_array = {
             "minecraft:grass": "minecraft:short_grass"
         }
         if item_id in id_array:
             item_id = id_array[item_id]
 
-    if pack_version <= 2004 or post_fixes:
+    if pack_version.get() <= 2004 or post_fixes:
         id_array = {
             "minecraft:scute": "minecraft:turtle_scute"
         }
@@ -376,14 +373,14 @@ def update_item_id(item_id: str | nbt_tags.TypeNumeric, components: item_compone
                 easy_map_updater.MINECRAFT_PATH / "saves" / option_manager.get_map_name()
             )
 
-    if pack_version <= 2006 or post_fixes:
+    if pack_version.get() <= 2006 or post_fixes:
         if item_id == "#minecraft:music_discs":
             item_id = "#tag_replacements:music_discs"
             tag_replacements.create_pack(
                 easy_map_updater.MINECRAFT_PATH / "saves" / option_manager.get_map_name()
             )
 
-    if pack_version <= 2103 or post_fixes:
+    if pack_version.get() <= 2103 or post_fixes:
         if item_id == "#minecraft:flowers":
             item_id = "#tag_replacements:flowers"
             tag_replacements.create_pack(
@@ -402,7 +399,7 @@ def update_item_id(item_id: str | nbt_tags.TypeNumeric, components: item_compone
                 easy_map_updater.MINECRAFT_PATH / "saves" / option_manager.get_map_name()
             )
 
-    if pack_version <= 2108 or post_fixes:
+    if pack_version.get() <= 2108 or post_fixes:
         id_array = {
             "minecraft:chain": "minecraft:iron_chain"
         }
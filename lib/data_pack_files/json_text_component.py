@@ -8,6 +8,7 @@
 import math
 from pathlib import Path
 from typing import cast, TypedDict, NotRequired, Any
+from contextvars import ContextVar
 from lib import utils
 from lib.data_pack_files import command
 from lib.data_pack_files import nbt_tags
@@ -19,6 +20,7 @@ from lib.resource_pack_files import miscellaneous
 from lib import json_manager
 from lib import defaults
 from lib import option_manager
+from lib import translation_cache
 
 
 
@@ -26,7 +28,7 @@ from lib import option_manager
 
 EASY_MAP_UPDATER_PATH = Path(__file__).parent.parent.parent
 MINECRAFT_PATH = EASY_MAP_UPDATER_PATH.parent
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 translation_keys_retrieved = False
 translation_keys: dict[str, int] = {}
 
@@ -36,8 +38,7 @@ translation_keys: dict[str, int] = {}
 
 def update_merge(strings: dict[str, list[str]], version: int, issues: list[dict[str, str | int]], params: dict):
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     if len(strings["json_text_component"]) == 0:
         return ""
@@ -48,13 +49,20 @@ def update_from_lib_format(string, version: int, issues: list[dict[str, str | in
     return nbt_tags.convert_to_lib_format(direct_update(nbt_tags.convert_from_lib_format(string), version, issues, mangled))
 
 def update(string: str, version: int, issues: list[dict[str, str | int]], params: dict):
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
+
+    # Reuse the result from an earlier run if the component was updated before
+    if isinstance(string, str):
+        return translation_cache.call("json_text_component", [string, version, params], issues, update_text_component, string, version, issues, params)
+    return update_text_component(string, version, issues, params)
+
+def update_text_component(string: str, version: int, issues: list[dict[str, str | int]], params: dict):
+    pack_version.set(version)
 
     # Unpack string
     if not isinstance(string, str):
         unpacked_component = string
-    elif pack_version <= 2104:
+    elif pack_version.get() <= 2104:
         if "from_sign" in params and params["from_sign"]:
             string = utils.pack_string(string)
         unpacked_component = nbt_tags.convert_from_json(json_manager.unpack(string))
@@ -72,8 +80,7 @@ def update(string: str, version: int, issues: list[dict[str, str | int]], params
         return updated_component
 
 def direct_update(unpacked_component: str | dict | nbt_tags.TypeList, version: int, issues: list[dict[str, str | int]], mangled: bool):
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Process input based on type
     if isinstance(unpacked_component, str):
@@ -197,8 +204,7 @@ def update_string(string: str):
 #     shadow_color: int | list[int]
 
 def update_component(component: str | dict | nbt_tags.TypeList, version: int, issues: list[dict[str, str | int]]) -> str | dict | nbt_tags.TypeList:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     if isinstance(component, nbt_tags.TypeList):
         return update_list(component, issues)
@@ -211,7 +217,7 @@ def update_component(component: str | dict | nbt_tags.TypeList, version: int, is
 def update_list(component: nbt_tags.TypeList, issues: list[dict[str, str | int]]) -> dict | nbt_tags.TypeList:
     # Iterate through list
     for i in range(len(component)):
-        component[i] = update_component(component[i], pack_version, issues)
+        component[i] = update_component(component[i], pack_version.get(), issues)
     if len(component) == 0:
         return {"type":"text","text":""}
     return component
@@ -234,9 +240,9 @@ def update_compound(component: str | dict, issues: list[dict[str, str | int]]) -
             else:
                 component[key] = component[key][0: min(7, len(component[key]))].upper() + "0"*max(0, 7-len(component[key]))
         if key == "selector":
-            component[key] = target_selectors.update(component[key], pack_version, issues, False)
+            component[key] = target_selectors.update(component[key], pack_version.get(), issues, False)
         if key in ["extra", "separator", "with"]:
-            component[key] = update_component(component[key], pack_version, issues)
+            component[key] = update_component(component[key], pack_version.get(), issues)
         if key == "hoverEvent":
             component["hover_event"] = update_hover_event(component[key], issues)
             del component[key]
@@ -247,7 +253,7 @@ def update_compound(component: str | dict, issues: list[dict[str, str | int]]) -
         if key == "score":
             component[key] = update_score(component[key], issues)
         if key == "sprite":
-            component[key] = miscellaneous.update_texture_path(component[key] + ".png", pack_version)[:-4]
+            component[key] = miscellaneous.update_texture_path(component[key] + ".png", pack_version.get())[:-4]
         if key in ["bold", "italic", "underlined", "strikethrough", "obfuscated"]:
             if component[key] in ["true", "True"]:
                 component[key] = nbt_tags.TypeByte(1)
@@ -311,7 +317,7 @@ def update_click_event(component: dict) -> dict:
 
 
     if component["action"] == "run_command":
-        component["command"] = "/" + command.update(component["command"], pack_version, "Text Component")
+        component["command"] = "/" + command.update(component["command"], pack_version.get(), "Text Component")
     
     return component
 
@@ -321,10 +327,10 @@ def update_hover_event(component: dict[str, Any], issues: list[dict[str, str | i
 
     if component["action"] == "show_text":
         if "value" not in component:
-            component["value"] = update_component(component["contents"], pack_version, issues)
+            component["value"] = update_component(component["contents"], pack_version.get(), issues)
             del component["contents"]
         else:
-            component["value"] = update_component(component["value"], pack_version, issues)
+            component["value"] = update_component(component["value"], pack_version.get(), issues)
 
     if component["action"] == "show_item":
         if "contents" not in component:
@@ -364,7 +370,7 @@ def update_hover_event(component: dict[str, Any], issues: list[dict[str, str | i
             if "components" in contents:
                 item_nbt["components"] = nbt_tags.unpack(contents["components"])
 
-        item_nbt = cast(dict, nbt_tags.direct_update(item_nbt, pack_version, issues, "item", "", False))
+        item_nbt = cast(dict, nbt_tags.direct_update(item_nbt, pack_version.get(), issues, "item", "", False))
         component = {"action": "show_item"}
         if "id" in item_nbt:
             component["id"] = item_nbt["id"]
@@ -377,18 +383,18 @@ def update_hover_event(component: dict[str, Any], issues: list[dict[str, str | i
         if "contents" in component:
             contents = component["contents"]
             if "name" in contents:
-                component["name"] = update_component(contents["name"], pack_version, issues)
+                component["name"] = update_component(contents["name"], pack_version.get(), issues)
             if "type" in contents:
-                component["id"] = entities.update(contents["type"], pack_version, issues)
+                component["id"] = entities.update(contents["type"], pack_version.get(), issues)
             if "id" in contents:
                 component["uuid"] = contents["id"]
             del component["contents"]
 
         else:
             if "name" in component:
-                component["name"] = update_component(component["name"], pack_version, issues)
+                component["name"] = update_component(component["name"], pack_version.get(), issues)
             if "id" in component:
-                component["id"] = entities.update(component["id"], pack_version, issues)
+                component["id"] = entities.update(component["id"], pack_version.get(), issues)
 
     return component
 
@@ -396,11 +402,11 @@ def update_nbt(component: dict, issues: list[dict[str, str | int]]):
     # Iterate through keys
     for key in list(component.keys()):
         if key == "entity" and key in component:
-            component[key] = target_selectors.update(component[key], pack_version, issues, False)
+            component[key] = target_selectors.update(component[key], pack_version.get(), issues, False)
         if key == "nbt":
             for source in ["block", "entity"]:
                 if source in component:
-                    component[key] = nbt_paths.update(component[key], pack_version, issues, source)
+                    component[key] = nbt_paths.update(component[key], pack_version.get(), issues, source)
 
     # Add source tag if it doesn't exist
     if "source" not in component:
@@ -410,7 +416,7 @@ def update_nbt(component: dict, issues: list[dict[str, str | int]]):
 
     # Make NBT interprets safe
     if (
-        pack_version <= 2002 and
+        pack_version.get() <= 2002 and
         "interpret" in component and component["interpret"] and
         option_manager.FIXES["command_helper"]["safe_nbt_interpret"] and
         not component["nbt"].startswith("safe_nbt_interpret")
@@ -439,7 +445,7 @@ def update_score(component: dict, issues: list[dict[str, str | int]]) -> dict:
     if "name" not in component:
         return component
 
-    component["name"] = target_selectors.update(component["name"], pack_version, issues, pack_version <= 1202)
+    component["name"] = target_selectors.update(component["name"], pack_version.get(), issues, pack_version.get() <= 1202)
 
     return component
 
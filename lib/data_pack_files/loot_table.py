@@ -8,6 +8,7 @@
 import json
 from pathlib import Path
 from typing import cast, TypedDict, NotRequired
+from contextvars import ContextVar
 from lib import defaults
 from lib import utils
 from lib import json_manager
@@ -21,15 +22,14 @@ from lib.data_pack_files import item_component
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
 # Define functions
 
 def update(file_path: Path, source_file_path: Path, version: int):
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Read file
     contents, load_bool = json_manager.safe_load(source_file_path)
@@ -47,8 +47,7 @@ class LootTable(TypedDict("LootTable", {"type": str})):
     pools: "list[LootTablePool]"
 
 def loot_table(contents: LootTable, version: int) -> LootTable:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     if "type" in contents:
         contents["type"] = miscellaneous.namespace(contents["type"])
@@ -74,8 +73,7 @@ class LootTablePool(TypedDict):
     bonus_rolls: int | float | dict
 
 def update_pool(pool: LootTablePool, version: int) -> LootTablePool:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Update conditions
     if "conditions" in pool:
@@ -110,8 +108,7 @@ class LootTableEntry(TypedDict):
     children: list
 
 def update_entry(entry: LootTableEntry, version: int) -> LootTableEntry:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Update conditions
     if "conditions" in entry:
@@ -152,7 +149,7 @@ def update_entry(entry: LootTableEntry, version: int) -> LootTableEntry:
 
             elif "value" in entry:
                 if isinstance(entry["value"], dict):
-                    entry["value"] = loot_table(entry["value"], pack_version)
+                    entry["value"] = loot_table(entry["value"], pack_version.get())
                 else:
                     entry["value"] = miscellaneous.namespace(entry["value"])
 
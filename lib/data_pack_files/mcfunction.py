@@ -6,17 +6,19 @@
 # Import things
 
 from pathlib import Path
+from contextvars import ContextVar
 from lib.log import log
 from lib.data_pack_files import command
 from lib import defaults
 from lib import utils
+from lib import translation_cache
 
 
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
-namespaced_id = ""
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
+namespaced_id: ContextVar[str] = ContextVar("namespaced_id", default="")
 
 
 
@@ -24,25 +26,26 @@ namespaced_id = ""
 
 def update(file_path: Path, source_file_path: Path, version: int, function_id: str):
     # Set pack version
-    global pack_version
-    pack_version = version
-    global namespaced_id
-    namespaced_id = function_id
+    pack_version.set(version)
+    namespaced_id.set(function_id)
 
     # Log namespaced ID
     if defaults.DEBUG_MODE:
-        log(f"Function: {namespaced_id}")
+        log(f"Function: {namespaced_id.get()}")
 
     # Read file
     contents = utils.safe_file_read(source_file_path)
 
     # Write to new location
     file_path.parent.mkdir(parents=True, exist_ok=True)
-    utils.safe_file_write(file_path, mcfunction(contents, version))
+    utils.safe_file_write(file_path, update_contents(contents, version, function_id))
+
+def update_contents(contents: str, version: int, function_id: str) -> str:
+    namespaced_id.set(function_id)
+    return translation_cache.call("mcfunction", [contents, version, function_id], None, mcfunction, contents, version)
 
 def mcfunction(contents: str, version: int) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Split up the lines
     lines = contents.split("\n")
@@ -75,13 +78,13 @@ def mcfunction(contents: str, version: int) -> str:
             continue
 
         # Convert command
-        line = command.update(line, pack_version, namespaced_id)
+        line = command.update(line, pack_version.get(), namespaced_id.get())
 
         # Write line to list
         lines[line_index] = line
 
     # Add return command for pre-1.20.3
-    if pack_version <= 2002:
+    if pack_version.get() <= 2002:
         if lines[-1].split(" ")[0] != "return":
             lines.append("return 1")
 
@@ -7,6 +7,7 @@
 
 import math
 import json
+from contextvars import ContextVar
 from lib.log import log
 from lib import defaults
 from lib import utils
@@ -24,7 +25,7 @@ import easy_map_updater
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
@@ -32,18 +33,16 @@ pack_version = defaults.PACK_VERSION
 
 def advancement(name: str, version: int, issues: list[dict[str, str | int]]) -> str:
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
-    if pack_version <= 1202 and defaults.SEND_WARNINGS:
+    if pack_version.get() <= 1202 and defaults.SEND_WARNINGS:
         log("WARNING: Advancements are not handled for 1.12!")
 
     return namespace(name)
 
 def attribute(name: str, version: int, issues: list[dict[str, str | int]]) -> str:
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Return if a macro token
     if isinstance(name, str) and is_macro_token(name):
@@ -82,8 +81,7 @@ def attribute_id(value: str, version: int, issues: list[dict[str, str | int]]) -
 
 def attribute_modifier_operation(operation: str | int | nbt_tags.TypeInt, version: int, issues: list[dict[str, str | int]]) -> str:
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     if isinstance(operation, nbt_tags.TypeInt):
         operation = operation.value
@@ -376,14 +374,13 @@ def loot_context_alt(context: str) -> str:
 
 def loot_table(name: str, version: int, issues: list[dict[str, str | int]]) -> str:
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Return if a macro token
     if isinstance(name, str) and is_macro_token(name):
         return name
 
-    if pack_version <= 1202 and defaults.SEND_WARNINGS:
+    if pack_version.get() <= 1202 and defaults.SEND_WARNINGS:
         log("WARNING: Loot tables are not handled for 1.12!")
 
     if name == "minecraft:empty":
@@ -489,11 +486,10 @@ def setblock_mode(argument: str, version: int, issues: list[dict[str, str | int]
 
 def slot(name: str, version: int, issues: list[dict[str, str | int]]) -> str:
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Remove slot. prefix
-    if pack_version <= 1202 and len(name) > 5 and name[:5] == "slot.":
+    if pack_version.get() <= 1202 and len(name) > 5 and name[:5] == "slot.":
         name = name[5:]
 
     # Change slot names for 1.20.5
@@ -8,6 +8,7 @@
 import json
 from typing import Any, cast
 from pathlib import Path
+from contextvars import ContextVar
 from lib.log import log
 from lib import defaults
 from lib import utils
@@ -19,7 +20,7 @@ from lib.data_pack_files import item_component
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 PROGRAM_PATH = Path(__file__).parent
 with (PROGRAM_PATH / "nbt_tree.json").open("r", encoding="utf-8") as file:
@@ -30,14 +31,13 @@ with (PROGRAM_PATH / "nbt_tree.json").open("r", encoding="utf-8") as file:
 # Define functions
 
 def update(path: str, version: int, issues: list[dict[str, str | int]], source: str) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Update NBT string if the first character is a curly brace, otherwise return it
     if not path:
         return path
     if path.startswith("{"):
-        return nbt_tags.update({"nbt": path, "read": True}, pack_version, issues, source)
+        return nbt_tags.update({"nbt": path, "read": True}, pack_version.get(), issues, source)
 
     path_parts = unpack(f'ROOT.{path}')
     if defaults.DEBUG_MODE:
@@ -48,8 +48,7 @@ def update(path: str, version: int, issues: list[dict[str, str | int]], source:
     return pack(path_parts[1:])
 
 def direct_update(path_parts: list[str], version: int, issues: list[dict[str, str | int]], source: str) -> list[str]:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     path_parts = ["ROOT"] + path_parts
     path_parts = get_source(path_parts, source, issues)
@@ -97,7 +96,7 @@ def search_tags(path_parts: list[str], guide: dict, source: str, issues: list[di
     if len(path_parts) < 2:
         return path_parts
     if path_parts[1].startswith("{"):
-        path_parts[1] = nbt_tags.update_with_guide(path_parts[1], pack_version, issues, source, True, guide, "tags")
+        path_parts[1] = nbt_tags.update_with_guide(path_parts[1], pack_version.get(), issues, source, True, guide, "tags")
         return path_parts[:1] + search_tags(path_parts[1:], guide, source, issues)
     if path_parts[1] in guide:
         return path_parts[:1] + branch(path_parts[1:], guide[path_parts[1]], source, issues)
@@ -107,7 +106,7 @@ def search_list(path_parts: list[str], guide: dict, source: str, issues: list[di
     if len(path_parts) < 2:
         return path_parts
     if path_parts[1].startswith("[") and path_parts[1][1:-1].strip().startswith("{"):
-        path_parts[1] = "[" + nbt_tags.update_with_guide(path_parts[1][1:-1].strip(), pack_version, issues, source, True, guide, "branch") + "]"
+        path_parts[1] = "[" + nbt_tags.update_with_guide(path_parts[1][1:-1].strip(), pack_version.get(), issues, source, True, guide, "branch") + "]"
     return path_parts[:1] + branch(path_parts[1:], guide, source, issues)
 
 
@@ -216,7 +215,7 @@ def edge_case(path_parts: list[str], case_type: str, source: str, issues: list[d
         if len(path_parts) < 2:
             return path_parts
         if path_parts[1].startswith("[") and path_parts[1][1:-1].strip().startswith("{"):
-            item = cast(dict, nbt_tags.direct_update_with_guide(nbt_tags.unpack(path_parts[1][1:-1].strip()), pack_version, issues, source, True, {"source": "item"}, "branch"))
+            item = cast(dict, nbt_tags.direct_update_with_guide(nbt_tags.unpack(path_parts[1][1:-1].strip()), pack_version.get(), issues, source, True, {"source": "item"}, "branch"))
             equipment_slots = [100, 101, 102, 103, -106]
             if "Slot" in item:
                 slot = nbt_tags.get_value(item["Slot"])
@@ -235,7 +234,7 @@ def edge_case(path_parts: list[str], case_type: str, source: str, issues: list[d
                     if len(item) > 0:
                         new_path_parts.append(nbt_tags.pack(item))
                     return new_path_parts[:-1] + get_source([new_path_parts[-1]] + path_parts[2:], "item", issues)
-            path_parts[1] = "[" + nbt_tags.update_with_guide(path_parts[1][1:-1].strip(), pack_version, issues, source, True, {"source": "item"}, "branch") + "]"
+            path_parts[1] = "[" + nbt_tags.update_with_guide(path_parts[1][1:-1].strip(), pack_version.get(), issues, source, True, {"source": "item"}, "branch") + "]"
         return path_parts[:1] + get_source(path_parts[1:], "item", issues)
 
     if case_type == "hand_drop_chances":
@@ -252,10 +251,10 @@ def edge_case(path_parts: list[str], case_type: str, source: str, issues: list[d
 
     if case_type == "item_tag":
         path_parts = search_tags(path_parts, NBT_TREE["sources"]["item_tag"]["tags"], source, issues)
-        return item_component.update_path(path_parts, pack_version, issues)
+        return item_component.update_path(path_parts, pack_version.get(), issues)
     
     if case_type == "item_components":
-        return item_component.conform_component_paths(path_parts, pack_version, issues)    
+        return item_component.conform_component_paths(path_parts, pack_version.get(), issues)    
     
     if case_type == "shot_from_crossbow":
         log(f'WARNING: Entity tag "ShotFromCrossbow" used in an NBT path and was converted to "weapon.id", check that its use is valid.')
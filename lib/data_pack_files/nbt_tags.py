@@ -5,9 +5,12 @@
 
 # Import things
 
+import re
 import json
 import math
+from array import array
 from typing import cast, Any
+from contextvars import ContextVar
 from nbt import nbt as NBT
 from pathlib import Path
 from lib.log import log
@@ -15,12 +18,24 @@ from lib import defaults
 from lib import utils
 from lib import option_manager
 from lib import json_manager
+from lib import translation_cache
 
 
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
+
+SCALAR_PATTERN = re.compile(r"([+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)(?:([su]?)([bBsSiIlLfFdD]))?")
+INT_PATTERN = re.compile(r"[+-]?(?:0+|[1-9][0-9]*)")
+WHITESPACE_PATTERN = re.compile(r"[ \t\r\n]*")
+SCALAR_RUN_PATTERN = re.compile(r"[^,{}\[\]()\"']*")
+KEY_RUN_PATTERN = re.compile(r"[^:,{}\[\]()\"']*")
+
+PACKED_CACHE_SIZE = 10000
+PACKED_STRING_LENGTH = 1024
+packed_keys: dict[str, str] = {}
+packed_strings: dict[str, str] = {}
 
 PROGRAM_PATH = Path(__file__).parent
 with (PROGRAM_PATH / "nbt_tree.json").open("r", encoding="utf-8") as file:
@@ -31,9 +46,15 @@ with (PROGRAM_PATH / "nbt_tree.json").open("r", encoding="utf-8") as file:
 # Define data type classes
 
 class TypeNumeric:
+    __slots__ = ("value", "suffix")
     def __init__(self, value, num_type: str):
-        # Assign value
-        if type(value).__name__ not in ["int", "float", "str"]:
+        # Assign value, numbers that are already the right type are kept as they are
+        value_type = type(value)
+        if value_type is int and num_type == "int":
+            self.value = value
+        elif (value_type is float or value_type is int) and num_type == "float":
+            self.value = float(value)
+        elif value_type.__name__ not in ["int", "float", "str"]:
             self.value = self.num(value.value, num_type)
         else:
             self.value = self.num(value, num_type)
@@ -66,12 +87,14 @@ class TypeNumeric:
         return bool(self.value)
 
 class TypeByte(TypeNumeric):
+    __slots__ = ()
     def __init__(self, value):
         TypeNumeric.__init__(self, value, "int")
         self.value = utils.byte_range(self.value)
         self.suffix = "b"
 
 class TypeShort(TypeNumeric):
+    __slots__ = ()
     value: int
     def __init__(self, value):
         TypeNumeric.__init__(self, value, "int")
@@ -79,12 +102,14 @@ class TypeShort(TypeNumeric):
         self.suffix = "s"
 
 class TypeInt(TypeNumeric):
+    __slots__ = ()
     value: int
     def __init__(self, value):
         TypeNumeric.__init__(self, value, "int")
         self.value = utils.int_range(self.value)
 
 class TypeLong(TypeNumeric):
+    __slots__ = ()
     value: int
     def __init__(self, value):
         TypeNumeric.__init__(self, value, "int")
@@ -92,32 +117,45 @@ class TypeLong(TypeNumeric):
         self.suffix = "L"
 
 class TypeFloat(TypeNumeric):
+    __slots__ = ()
     value: float
     def __init__(self, value):
         TypeNumeric.__init__(self, value, "float")
         self.suffix = "f"
 
 class TypeDouble(TypeNumeric):
+    __slots__ = ()
     value: float
     def __init__(self, value):
         TypeNumeric.__init__(self, value, "float")
         self.suffix = "d"
 
 class TypeDecimal(TypeNumeric):
+    __slots__ = ()
     value: float
     def __init__(self, value):
         TypeNumeric.__init__(self, value, "float")
 
 class TypeList:
+    __slots__ = ("entries", "i", "prefix")
+    entries: list
     def __init__(self, value):
         # Assign value
         if not isinstance(value, list):
-            self.value: list = value.value.copy()
+            self.entries = value.value.copy()
         else:
-            self.value = value.copy()
+            self.entries = value.copy()
         self.i = -1
         self.prefix = ""
 
+    @property
+    def value(self) -> list:
+        return self.entries
+
+    @value.setter
+    def value(self, value: list):
+        self.entries = value
+
     def __iter__(self):
         return self
 
@@ -146,29 +184,81 @@ class TypeList:
         return self.value.pop(i)
 
     def pack(self) -> str:
-        # Prepare list
-        out_list = []
-        for entry in self.value:
-            out_list.append(pack(entry))
+        return pack(self)
+
+class TypeArray(TypeList):
+    # Numbers are kept in a typed array until an entry is needed as an object
+    __slots__ = ("numbers",)
+    typecode = "q"
+    entry_type: type[TypeByte] | type[TypeInt] | type[TypeLong] = TypeLong
+    entry_suffix = "L"
+    numbers: array | None
+    def __init__(self, value):
+        if isinstance(value, array):
+            self.numbers = array(self.typecode, value)
+            self.entries = []
+            self.i = -1
+            self.prefix = ""
+        elif isinstance(value, TypeArray) and value.numbers is not None and value.typecode == self.typecode:
+            self.numbers = array(self.typecode, value.numbers)
+            self.entries = []
+            self.i = -1
+            self.prefix = ""
+        else:
+            self.numbers = None
+            TypeList.__init__(self, value)
+
+    @property
+    def value(self) -> list:
+        if self.numbers is not None:
+            self.entries = [self.entry_type(number) for number in self.numbers]
+            self.numbers = None
+        return self.entries
 
-        return f'[{self.prefix}{",".join(out_list)}]'
+    @value.setter
+    def value(self, value: list):
+        self.entries = value
+        self.numbers = None
 
-class TypeByteArray(TypeList):
+    def __len__(self):
+        if self.numbers is not None:
+            return len(self.numbers)
+        return len(self.value)
+
+    def get_numbers(self) -> list[int]:
+        if self.numbers is not None:
+            return self.numbers.tolist()
+        return [ int(entry.value) for entry in self.value ]
+
+class TypeByteArray(TypeArray):
+    __slots__ = ()
+    typecode = "b"
+    entry_type = TypeByte
+    entry_suffix = "b"
     def __init__(self, value):
-        TypeList.__init__(self, value)
+        TypeArray.__init__(self, value)
         self.prefix = "B;"
 
-class TypeIntArray(TypeList):
+class TypeIntArray(TypeArray):
+    __slots__ = ()
+    typecode = "i"
+    entry_type = TypeInt
+    entry_suffix = ""
     def __init__(self, value):
-        TypeList.__init__(self, value)
+        TypeArray.__init__(self, value)
         self.prefix = "I;"
 
-class TypeLongArray(TypeList):
+class TypeLongArray(TypeArray):
+    __slots__ = ()
+    typecode = "q"
+    entry_type = TypeLong
+    entry_suffix = "L"
     def __init__(self, value):
-        TypeList.__init__(self, value)
+        TypeArray.__init__(self, value)
         self.prefix = "L;"
 
 class TypeMacroToken:
+    __slots__ = ("token", "suffix")
     token: str
     suffix: str
     def __init__(self, token: str, suffix: str = ""):
@@ -204,8 +294,13 @@ from lib.data_pack_files.restore_behavior import lock_fixer
 # Define functions
 
 def update(snbt: str | dict, version: int, issues: list[dict[str, str | int]], source: str) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
+
+    # Reuse the result from an earlier run if the tag was updated before
+    return translation_cache.call("nbt_tags", [snbt, version, source], issues, update_tag, snbt, version, issues, source)
+
+def update_tag(snbt: str | dict, version: int, issues: list[dict[str, str | int]], source: str) -> str:
+    pack_version.set(version)
 
     object_id = ""
     read = False
@@ -231,8 +326,7 @@ def update(snbt: str | dict, version: int, issues: list[dict[str, str | int]], s
     return pack(get_source({}, nbt, source, object_id, read, issues))
 
 def direct_update(nbt: dict | None, version: int, issues: list[dict[str, str | int]], source: str, object_id: str, read: bool) -> dict | None:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     if not isinstance(nbt, dict):
         return
@@ -240,8 +334,7 @@ def direct_update(nbt: dict | None, version: int, issues: list[dict[str, str | i
     return get_source({}, nbt, source, object_id, read, issues)
 
 def update_with_guide(snbt: str, version: int, issues: list[dict[str, str | int]], source: str, read: bool, guide: dict, callback: str) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Return if not SNBT
     if not snbt:
@@ -250,8 +343,7 @@ def update_with_guide(snbt: str, version: int, issues: list[dict[str, str | int]
     return pack(direct_update_with_guide(unpack(snbt), version, issues, source, read, guide, callback))
 
 def direct_update_with_guide(nbt: dict, version: int, issues: list[dict[str, str | int]], source: str, read: bool, guide: dict, callback: str) -> dict | TypeList:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Return if not NBT
     if not nbt:
@@ -282,6 +374,27 @@ def unpack(nbt: str) -> Any:
     if nbt == "":
         return
 
+    # Parse compounds and lists in one pass, falling back on the original parser for anything unusual
+    if nbt.startswith("{") or nbt.startswith("["):
+        try:
+            value, index = parse_value(nbt, 0, pack_version.get() >= 1400)
+            index = skip_whitespace(nbt, index)
+            if index == len(nbt):
+                return value
+        except ValueError:
+            pass
+        return unpack_legacy(nbt)
+    if nbt[0] in ['"', "'"]:
+        return utils.unpack_string(nbt)
+    return unpack_scalar(nbt)
+
+def unpack_legacy(nbt: str) -> Any:
+    # The original parser, which re-parses the substring of every nested compound and list
+    if not isinstance(nbt, str):
+        return nbt
+    if nbt == "":
+        return
+
     # Unpack based on type
     if nbt.startswith("{"):
         return unpack_compound(nbt)
@@ -345,13 +458,13 @@ def unpack_compound(nbt: str) -> dict:
         return compound
 
     # Add tags to compound
-    for tag in arguments.parse_with_quotes(nbt.strip()[1:], ",", pack_version >= 1400):
+    for tag in arguments.parse_with_quotes(nbt.strip()[1:], ",", pack_version.get() >= 1400):
         if ":" not in tag:
             continue
-        values = arguments.parse_with_quotes(tag, ":", pack_version >= 1400)
+        values = arguments.parse_with_quotes(tag, ":", pack_version.get() >= 1400)
         name = utils.unpack_string_check(values[0].strip())
         value = ":".join(values[1:]).strip()
-        compound[name] = unpack(value)
+        compound[name] = unpack_legacy(value)
 
     return compound
 
@@ -370,12 +483,12 @@ def unpack_list(nbt: str) -> TypeList:
         nbt = "[" + nbt[3:]
 
     # Add tags to list
-    for tag in arguments.parse_with_quotes(nbt.strip()[1:], ",", pack_version >= 1400):
+    for tag in arguments.parse_with_quotes(nbt.strip()[1:], ",", pack_version.get() >= 1400):
         tag = tag.strip()
         if tag != "":
             if ":" in tag and tag.split(":")[0].isnumeric():
                 tag = ":".join(tag.split(":")[1:])
-            out_list.append(unpack(tag))
+            out_list.append(unpack_legacy(tag))
 
     # Convert list type
     if prefix == "B;":
@@ -389,40 +502,237 @@ def unpack_list(nbt: str) -> TypeList:
 
 
 
+def parse_value(nbt: str, index: int, allow_single_quotes: bool) -> tuple[Any, int]:
+    # Parse the value starting at the index, returning it along with the index after it.
+    # A ValueError is raised for anything that the original parser might read differently.
+    char = nbt[index] if index < len(nbt) else ""
+    if char == "{":
+        return parse_compound(nbt, index + 1, allow_single_quotes)
+    if char == "[":
+        return parse_list(nbt, index + 1, allow_single_quotes)
+    if char == '"' or (char == "'" and allow_single_quotes):
+        end = arguments.get_string_end(nbt, index + 1, char)
+        if end == len(nbt):
+            raise ValueError("Unterminated string")
+        return utils.unpack_string(nbt[index:end + 1]), end + 1
+
+    # Read the value up to the next separator
+    end = get_match_end(SCALAR_RUN_PATTERN, nbt, index)
+    if end == len(nbt) or nbt[end] not in ",]}":
+        raise ValueError("Unexpected character")
+    value = nbt[index:end].strip()
+    if value == "":
+        raise ValueError("Missing value")
+    return unpack_scalar(value), end
+
+def parse_compound(nbt: str, index: int, allow_single_quotes: bool) -> tuple[dict, int]:
+    compound = {}
+    index = skip_whitespace(nbt, index)
+    if index < len(nbt) and nbt[index] == "}":
+        return compound, index + 1
+
+    while True:
+        # Get name
+        char = nbt[index] if index < len(nbt) else ""
+        if char == '"' or (char == "'" and allow_single_quotes):
+            end = arguments.get_string_end(nbt, index + 1, char)
+            if end == len(nbt):
+                raise ValueError("Unterminated string")
+            name = utils.unpack_string(nbt[index:end + 1])
+            index = skip_whitespace(nbt, end + 1)
+        else:
+            end = get_match_end(KEY_RUN_PATTERN, nbt, index)
+            name = nbt[index:end].strip()
+            if name == "":
+                raise ValueError("Missing name")
+            index = end
+        if index == len(nbt) or nbt[index] != ":":
+            raise ValueError("Missing colon")
+
+        # Get value, values containing colons are only read the same way if no part of them is blank
+        index = skip_whitespace(nbt, index + 1)
+        value_index = index
+        compound[name], index = parse_value(nbt, index, allow_single_quotes)
+        if ":" in nbt[value_index:index] and nbt[value_index] not in '{["\'':
+            value = nbt[value_index:index]
+            if "::" in value or value.startswith(":") or value.rstrip().endswith(":"):
+                raise ValueError("Blank value part")
+
+        # Continue to next tag
+        index = skip_whitespace(nbt, index)
+        if index < len(nbt) and nbt[index] == "}":
+            return compound, index + 1
+        if index == len(nbt) or nbt[index] != ",":
+            raise ValueError("Missing comma")
+        index = skip_whitespace(nbt, index + 1)
+
+def parse_list(nbt: str, index: int, allow_single_quotes: bool) -> tuple[TypeList, int]:
+    # Set list prefix
+    prefix = ""
+    if nbt[index:index + 2] in ["B;", "I;", "L;"]:
+        prefix = nbt[index:index + 2]
+        index += 2
+
+    out_list = []
+    index = skip_whitespace(nbt, index)
+    if index < len(nbt) and nbt[index] == "]":
+        return get_list_type(out_list, prefix), index + 1
+
+    while True:
+        # Indexed list entries are left to the original parser
+        value_index = index
+        value, index = parse_value(nbt, index, allow_single_quotes)
+        if ":" in nbt[value_index:index] and nbt[value_index] not in '{["\'' and nbt[value_index:index].split(":")[0].strip().isnumeric():
+            raise ValueError("Indexed list entry")
+        out_list.append(value)
+
+        # Continue to next entry
+        index = skip_whitespace(nbt, index)
+        if index < len(nbt) and nbt[index] == "]":
+            return get_list_type(out_list, prefix), index + 1
+        if index == len(nbt) or nbt[index] != ",":
+            raise ValueError("Missing comma")
+        index = skip_whitespace(nbt, index + 1)
+
+def get_list_type(out_list: list, prefix: str) -> TypeList:
+    if prefix == "B;":
+        return TypeByteArray(out_list)
+    if prefix == "I;":
+        return TypeIntArray(out_list)
+    if prefix == "L;":
+        return TypeLongArray(out_list)
+    return TypeList(out_list)
+
+def skip_whitespace(nbt: str, index: int) -> int:
+    return get_match_end(WHITESPACE_PATTERN, nbt, index)
+
+def get_match_end(pattern: re.Pattern[str], nbt: str, index: int) -> int:
+    # The run patterns can match nothing, so they always match
+    match = pattern.match(nbt, index)
+    if match is None:
+        return index
+    return match.end()
+
+def unpack_scalar(nbt: str) -> Any:
+    # Type common numbers and plain strings with a single match, leaving anything else to the original parser
+    match = SCALAR_PATTERN.fullmatch(nbt)
+    if match:
+        number, _, suffix = match.groups()
+        if suffix is None:
+            if INT_PATTERN.fullmatch(number):
+                return TypeInt(nbt)
+            return TypeDecimal(nbt)
+        suffix = suffix.lower()
+        if suffix == "b":
+            return TypeByte(number)
+        if suffix == "s":
+            return TypeShort(number)
+        if suffix == "i":
+            return TypeInt(number)
+        if suffix == "l":
+            return TypeLong(number)
+        if suffix == "f":
+            return TypeFloat(number)
+        return TypeDouble(number)
+    if nbt[0].isascii() and nbt[0].isalpha():
+        if nbt == "true":
+            return TypeByte(1)
+        if nbt == "false":
+            return TypeByte(0)
+        return nbt
+    return unpack_legacy(nbt)
+
+
+
 def pack(nbt) -> str:
+    # The whole tree is written into one buffer, which is joined at the end
+    buffer: list[str] = []
+    pack_into(buffer, nbt)
+    return "".join(buffer)
+
+def pack_compound(nbt: dict[str, Any]) -> str:
+    buffer: list[str] = []
+    pack_compound_into(buffer, nbt)
+    return "".join(buffer)
+
+def pack_list(nbt: list) -> str:
+    buffer: list[str] = []
+    pack_list_into(buffer, nbt)
+    return "".join(buffer)
+
+def pack_into(buffer: list[str], nbt):
     # Pack based on type
     if nbt == None:
-        return ""
+        return
     if isinstance(nbt, dict):
-        return pack_compound(nbt)
-    if isinstance(nbt, list):
-        return pack_list(nbt)
-    if type(nbt).__name__ == "str":
-        return utils.pack_string(nbt)
-
-    return nbt.pack()
-
-def pack_compound(nbt: dict[str, Any]) -> str:
-    # Prepare tag list
-    tags: list[str] = []
+        pack_compound_into(buffer, nbt)
+    elif isinstance(nbt, list):
+        pack_list_into(buffer, nbt)
+    elif isinstance(nbt, TypeArray) and nbt.numbers is not None:
+        buffer.append("[" + nbt.prefix)
+        buffer.append(",".join([ str(number) + nbt.entry_suffix for number in nbt.numbers ]))
+        buffer.append("]")
+    elif isinstance(nbt, TypeList):
+        buffer.append("[" + nbt.prefix)
+        pack_entries_into(buffer, nbt.value)
+        buffer.append("]")
+    elif type(nbt).__name__ == "str":
+        buffer.append(get_packed_string(nbt))
+    else:
+        buffer.append(nbt.pack())
 
+def pack_compound_into(buffer: list[str], nbt: dict[str, Any]):
     # Return value if it's an array shortcut
     if len(nbt) == 1 and "" in nbt:
-        return pack(nbt[""])
+        pack_into(buffer, nbt[""])
+        return
 
     # Iterate through keys
+    buffer.append("{")
+    first = True
     for key in nbt:
+        if not first:
+            buffer.append(",")
+        first = False
+        buffer.append(get_packed_key(key))
+        pack_into(buffer, nbt[key])
+    buffer.append("}")
+
+def pack_list_into(buffer: list[str], nbt: list):
+    buffer.append("[")
+    pack_entries_into(buffer, nbt)
+    buffer.append("]")
+
+def pack_entries_into(buffer: list[str], entries: list):
+    first = True
+    for entry in entries:
+        if not first:
+            buffer.append(",")
+        first = False
+        pack_into(buffer, entry)
+
+def get_packed_key(key: str) -> str:
+    # Keys repeat a lot, so their packed form is kept along with the colon
+    packed_key = packed_keys.get(key)
+    if packed_key is None:
+        if len(packed_keys) >= PACKED_CACHE_SIZE:
+            packed_keys.clear()
         pack_bool = ":" in key or '"' in key or "'" in key or key == ""
-        tags.append(f'{utils.pack_string(key) if pack_bool else key}:{pack(nbt[key])}')
-    
-    # Return stringified version of compound
-    return "{" + ",".join(tags) + "}"
+        packed_key = f'{utils.pack_string(key) if pack_bool else key}:'
+        packed_keys[key] = packed_key
+    return packed_key
 
-def pack_list(nbt: list) -> str:
-    out_list = []
-    for entry in nbt:
-        out_list.append(pack(entry))
-    return f'[{",".join(out_list)}]'
+def get_packed_string(string: str) -> str:
+    # Short strings like IDs repeat a lot, so their escaped form is kept
+    if len(string) > PACKED_STRING_LENGTH:
+        return utils.pack_string(string)
+    packed_string = packed_strings.get(string)
+    if packed_string is None:
+        if len(packed_strings) >= PACKED_CACHE_SIZE:
+            packed_strings.clear()
+        packed_string = utils.pack_string(string)
+        packed_strings[string] = packed_string
+    return packed_string
 
 
 
@@ -533,10 +843,10 @@ def update_tags(parent: dict, nbt: dict, guide: dict, source: str, object_id: st
 
             if "version" in necessary_tags[key]:
                 if "min" in necessary_tags[key]:
-                    if pack_version < necessary_tags[key]["min"]:
+                    if pack_version.get() < necessary_tags[key]["min"]:
                         continue
                 if "max" in necessary_tags[key]:
-                    if pack_version > necessary_tags[key]["max"]:
+                    if pack_version.get() > necessary_tags[key]["max"]:
                         continue
 
             if generator == "area_effect_cloud_radius":
@@ -650,7 +960,7 @@ def edge_case(parent: dict, nbt, case: str | dict[str, str], source: str, object
     if case_type == "banner_base":
         return edge_case_banner_base(parent, object_id, issues)
     if case_type == "block_entity":
-        return blocks.update_from_nbt(cast(blocks.BlockInputFromNBT, parent), pack_version, issues)
+        return blocks.update_from_nbt(cast(blocks.BlockInputFromNBT, parent), pack_version.get(), issues)
     if case_type == "block_pos":
         return edge_case_block_pos(parent)
     if case_type == "boat_type":
@@ -684,15 +994,15 @@ def edge_case(parent: dict, nbt, case: str | dict[str, str], source: str, object
     if case_type == "inventory":
         return edge_case_inventory(parent, issues)
     if case_type == "item":
-        return items.update_from_nbt(nbt, pack_version, issues)
+        return items.update_from_nbt(nbt, pack_version.get(), issues)
     if case_type == "item_components":
-        return edge_case_item_components(parent, pack_version, issues, read)
+        return edge_case_item_components(parent, pack_version.get(), issues, read)
     if case_type == "item_tag":
-        return edge_case_item_tag(parent, nbt, object_id, read, pack_version, issues)
+        return edge_case_item_tag(parent, nbt, object_id, read, pack_version.get(), issues)
     if case_type == "lock":
         return edge_case_lock(nbt)
     if case_type == "mooshroom_stew":
-        return edge_case_mooshroom_stew(parent, pack_version, issues)
+        return edge_case_mooshroom_stew(parent, pack_version.get(), issues)
     if case_type == "old_spawn_potential_entity":
         return edge_case_old_spawn_potential_entity(parent, nbt, object_id, read, issues)
     if case_type == "potion":
@@ -814,7 +1124,7 @@ def edge_case_attribute_id(parent: dict[str, Any]):
 
 def edge_case_banner_base(parent: dict[str, TypeInt], object_id: str, issues: list[dict[str, str | int]]):
     if miscellaneous.namespace(object_id) == "minecraft:shield":
-        parent["Base"] = miscellaneous.banner_color_numeric(parent["Base"], pack_version)
+        parent["Base"] = miscellaneous.banner_color_numeric(parent["Base"], pack_version.get())
     else:
         del parent["Base"]
 
@@ -890,7 +1200,7 @@ def edge_case_can_place_on(nbt: list[str], issues: list[dict[str, str | int]]):
                 "nbt": {},
                 "read": True
             },
-            pack_version, issues
+            pack_version.get(), issues
         )
         new_list.append(cast(str, new_block["id"]) + (blocks.pack_block_states(new_block["block_states"]) if new_block["block_states"] else ""))
     return TypeList(utils.deduplicate_list(new_list))
@@ -936,7 +1246,7 @@ def edge_case_entity_id(parent: dict, nbt: str, object_id: str, read: bool, issu
         parent["SpawnData"] = {}
     if "entity" not in parent["SpawnData"]:
         parent["SpawnData"]["entity"] = {}
-    parent["SpawnData"]["entity"]["id"] = entities.update(nbt, pack_version, issues)
+    parent["SpawnData"]["entity"]["id"] = entities.update(nbt, pack_version.get(), issues)
 
 def edge_case_equipment(parent: dict, nbt: TypeList, object_id: str, read: bool, issues: list[dict[str, str | int]]):
     if "equipment" not in parent:
@@ -983,7 +1293,7 @@ def edge_case_equipment(parent: dict, nbt: TypeList, object_id: str, read: bool,
 
 def edge_case_fuse(parent: dict, object_id: str):
     if (
-        pack_version <= 2002 and
+        pack_version.get() <= 2002 and
         "Fuse" in parent and
         "fuse" not in parent
     ):
@@ -1039,7 +1349,7 @@ def edge_case_inventory(parent: dict[str, Any], issues: list[dict[str, str | int
     inventory: list[dict] = []
     equipment_slots = [100, 101, 102, 103, -106]
     for item in parent["Inventory"]:
-        item = items.update_from_nbt(item, pack_version, issues)
+        item = items.update_from_nbt(item, pack_version.get(), issues)
         moved_to_equipment = False
         if "Slot" in item:
             slot: int = item["Slot"].value
@@ -1106,7 +1416,7 @@ def edge_case_old_spawn_potential_entity(parent: dict[str, Any], nbt: dict[str,
         parent["data"]["entity"] = parent["Properties"].copy()
         del parent["Properties"]
     if "Type" in parent:
-        parent["data"]["entity"]["id"] = entities.update(parent["Type"], pack_version, issues)
+        parent["data"]["entity"]["id"] = entities.update(parent["Type"], pack_version.get(), issues)
         del parent["Type"]
     parent["data"]["entity"] = get_source(parent["data"], parent["data"]["entity"], "entity", object_id, read, issues)
 
@@ -1153,7 +1463,7 @@ def edge_case_recipes(nbt: list, issues: list[dict[str, str | int]]):
                 entry = entry["id"]
             else:
                 entry = "minecraft:stick"
-        nbt[i] = items.update_from_command(cast(str, entry), pack_version, issues)
+        nbt[i] = items.update_from_command(cast(str, entry), pack_version.get(), issues)
 
 def edge_case_respawn(parent: dict[str, Any]):
     if "respawn" in parent:
@@ -1220,7 +1530,7 @@ def edge_case_sign_text(parent: dict, issues: list[dict[str, str | int]]):
         if key in parent:
             if "messages" not in parent["front_text"]:
                 parent["front_text"]["messages"] = ["", "", "", ""]
-            text = json_text_component.update(parent[key], pack_version, issues, {"mangled": False, "pack": False})
+            text = json_text_component.update(parent[key], pack_version.get(), issues, {"mangled": False, "pack": False})
             # Ensure that component is a compound
             if isinstance(text, TypeList) or isinstance(text, list):
                 text = {"extra": text, "text": ""}
@@ -1237,7 +1547,7 @@ def edge_case_sign_text(parent: dict, issues: list[dict[str, str | int]]):
 
 def edge_case_size(parent: dict, object_id: str):
     if (
-        pack_version <= 2104 and
+        pack_version.get() <= 2104 and
         "Size" in parent and
         "size" not in parent
     ):
@@ -1258,7 +1568,7 @@ def edge_case_skull_owner(nbt: dict | str):
         nbt["id"] = nbt["Id"]
         del nbt["Id"]
     if "id" in nbt:
-        nbt["id"] = miscellaneous.uuid_from_string(nbt["id"], pack_version, [])
+        nbt["id"] = miscellaneous.uuid_from_string(nbt["id"], pack_version.get(), [])
 
     if "Name" in nbt:
         nbt["name"] = nbt["Name"]
@@ -1358,13 +1668,13 @@ def convert_to_lib_format_compound(nbt: dict[str, Any]) -> NBT.TAG_Compound:
 def convert_to_lib_format_nbt_list(nbt: TypeList) -> Any:
     if isinstance(nbt, TypeByteArray):
         output = NBT.TAG_Byte_Array()
-        output.value = cast(bytearray, [ int(nbt[i].value) for i in range(len(nbt)) ])
+        output.value = cast(bytearray, nbt.get_numbers())
     elif isinstance(nbt, TypeIntArray):
         output = NBT.TAG_Int_Array()
-        output.value = [ int(nbt[i].value) for i in range(len(nbt)) ]
+        output.value = nbt.get_numbers()
     elif isinstance(nbt, TypeLongArray):
         output = NBT.TAG_Long_Array()
-        output.value = [ int(nbt[i].value) for i in range(len(nbt)) ]
+        output.value = nbt.get_numbers()
     else:
         data = [ convert_to_lib_format(nbt[i]) for i in range(len(nbt)) ]
         if data:
@@ -1454,13 +1764,18 @@ def convert_from_lib_format_list(nbt: NBT.TAG_List) -> TypeList:
     return TypeList([ convert_from_lib_format(nbt[i]) for i in range(len(nbt)) ])
 
 def convert_from_lib_format_byte_array(nbt: NBT.TAG_Byte_Array) -> TypeByteArray:
-    return TypeByteArray([ TypeByte(nbt[i]) for i in range(len(nbt)) ])
+    # Bytes read from a file are unsigned, they are reinterpreted as signed.
+    # Arrays made by convert_to_lib_format or assigned elsewhere hold a list of numbers instead.
+    values = cast(bytes | bytearray | list[int], nbt.value)
+    if isinstance(values, (bytes, bytearray)):
+        return TypeByteArray(array("b", values))
+    return TypeByteArray(array("b", [ utils.byte_range(int(number)) for number in values ]))
 
 def convert_from_lib_format_int_array(nbt: NBT.TAG_Int_Array) -> TypeIntArray:
-    return TypeIntArray([ TypeInt(nbt[i]) for i in range(len(nbt)) ])
+    return TypeIntArray(array("i", nbt.value))
 
 def convert_from_lib_format_long_array(nbt: NBT.TAG_Long_Array) -> TypeLongArray:
-    return TypeLongArray([ TypeLong(nbt[i]) for i in range(len(nbt)) ])
+    return TypeLongArray(array("q", nbt.value))
 
 def convert_from_lib_format_numeric(nbt: NBT._TAG_Numeric) -> TypeNumeric:
     if isinstance(nbt, NBT.TAG_Byte):
@@ -1506,12 +1821,8 @@ def convert_to_json_compound(nbt: dict[str, Any]) -> dict[str, Any]:
     return output_nbt
 
 def convert_to_json_list(nbt: TypeList | list) -> list:
-    if isinstance(nbt, TypeByteArray):
-        return [ int(nbt[i].value) for i in range(len(nbt)) ]
-    elif isinstance(nbt, TypeIntArray):
-        return [ int(nbt[i].value) for i in range(len(nbt)) ]
-    elif isinstance(nbt, TypeLongArray):
-        return [ int(nbt[i].value) for i in range(len(nbt)) ]
+    if isinstance(nbt, TypeArray):
+        return nbt.get_numbers()
     else:
         return [ convert_to_json(nbt[i]) for i in range(len(nbt)) ]
 
@@ -1627,9 +1938,8 @@ def set_value(nbt, cast_type = None):
 
 
 def process_arbitrary_nbt(nbt, version: int | None = None):
-    global pack_version
     if version is not None:
-        pack_version = version
+        pack_version.set(version)
 
     if isinstance(nbt, dict):
         return process_arbitrary_nbt_compound(nbt)
@@ -1652,10 +1962,10 @@ def process_arbitrary_nbt_list(nbt: TypeList) -> TypeList:
 def process_arbitrary_nbt_string(nbt: str):
     if (
         option_manager.FIXES["json_text_components_in_storage"] and
-        pack_version <= 2104 and
+        pack_version.get() <= 2104 and
         (nbt.startswith("{") or nbt.startswith("[") or nbt.startswith('"'))
     ):
-        return json_text_component.direct_update(convert_from_json(json_manager.unpack(nbt)), pack_version, [], False)
+        return json_text_component.direct_update(convert_from_json(json_manager.unpack(nbt)), pack_version.get(), [], False)
 
     return nbt
 
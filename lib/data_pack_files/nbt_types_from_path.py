@@ -5,6 +5,7 @@
 
 # Import things
 
+from contextvars import ContextVar
 from lib import defaults
 from lib.log import log
 from lib.data_pack_files import nbt_paths
@@ -13,15 +14,14 @@ from lib.data_pack_files import nbt_paths
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
 # Define functions
 
 def update(argument: dict[str, str], version: int, issues: list[dict[str, str | int]]) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     data_type = argument["data_type"]
     path = argument["path"]
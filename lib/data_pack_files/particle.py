@@ -6,6 +6,8 @@
 # Import things
 
 from typing import Any, cast
+from contextvars import ContextVar
+from lib import defaults
 from lib.data_pack_files import blocks
 from lib.data_pack_files import items
 from lib.data_pack_files import item_component
@@ -16,15 +18,21 @@ from lib.data_pack_files import arguments
 
 
 
+# Initialize variables
+
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
+
+
+
+# Define functions
+
 def update_from_command(particle: str | dict[str, str], version: int, issues: list[dict[str, str | int]]) -> str:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     return pack(update(particle, version, issues))
 
 def update_from_nbt(particle: str | dict[str, Any], version: int, issues: list[dict[str, str | int]]) -> dict[str, Any]:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Return if input type is a dict
     if isinstance(particle, dict):
@@ -82,8 +90,7 @@ def update_from_nbt(particle: str | dict[str, Any], version: int, issues: list[d
 
 
 def update(particle: str | dict[str, str], version: int, issues: list[dict[str, str | int]]) -> dict[str, Any]:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Prepare particle data
     particle_data: dict[str, Any] = {
@@ -183,7 +190,7 @@ def update(particle: str | dict[str, str], version: int, issues: list[dict[str,
 
 
     # Convert ID based on version
-    if pack_version <= 1202:
+    if pack_version.get() <= 1202:
         for substring in ["minecraft:blockcrack_", "minecraft:blockdust_", "minecraft:iconcrack_"]:
             if substring in particle_data["type"]:
                 particle_data["type"] = substring[:len(substring) - 1]
@@ -205,7 +212,7 @@ def update(particle: str | dict[str, str], version: int, issues: list[dict[str,
             "block_states": block_state["Properties"] if "Properties" in block_state else {},
             "nbt": None,
             "read": False,
-        }, pack_version, [])
+        }, pack_version.get(), [])
         block_state["Name"] = block["id"]
         if block["block_states"]:
             block_state["Properties"] = block["block_states"]
@@ -220,7 +227,7 @@ def update(particle: str | dict[str, str], version: int, issues: list[dict[str,
     
 
     # Handle entity effects
-    if pack_version <= 2004:
+    if pack_version.get() <= 2004:
         if particle_data["type"] == "minecraft:entity_effect":
             particle_data["color"] = nbt_tags.TypeList([
                 nbt_tags.TypeFloat(0),
@@ -283,7 +290,7 @@ def update_particle_nbt(particle: dict[str, Any], version: int, issues: list[dic
             "nbt": {},
             "read": False
         },
-        pack_version, issues)
+        pack_version.get(), issues)
         particle["block_state"]["Name"] = updated_block["id"]
         if updated_block["block_states"]:
             particle["block_state"]["Properties"] = updated_block["block_states"]
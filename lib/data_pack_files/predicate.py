@@ -8,6 +8,7 @@
 import json
 from pathlib import Path
 from typing import cast, Any
+from contextvars import ContextVar
 from lib import defaults
 from lib import utils
 from lib import json_manager
@@ -26,15 +27,14 @@ from lib.data_pack_files import tables
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
 # Define functions
 
 def update(file_path: Path, source_file_path: Path, version: int):
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Read file
     contents, load_bool = json_manager.safe_load(source_file_path)
@@ -48,8 +48,7 @@ def update(file_path: Path, source_file_path: Path, version: int):
 
 
 def predicate(contents: dict[str, Any] | list[dict], version: int) -> dict[str, Any] | list[dict]:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # If predicate is a list, feed it through a loop instead
     if isinstance(contents, list):
@@ -175,8 +174,7 @@ def predicate(contents: dict[str, Any] | list[dict], version: int) -> dict[str,
 
 
 def predicate_damage_type(contents: dict, version: int) -> dict:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     for key in ["direct_entity", "source_entity"]:
         if key in contents:
@@ -195,8 +193,7 @@ def predicate_damage_type(contents: dict, version: int) -> dict:
 
 
 def predicate_entity(contents: dict, version: int) -> dict:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Player type-specific
     if "player" in contents:
@@ -351,8 +348,7 @@ def predicate_entity(contents: dict, version: int) -> dict:
 
 
 def predicate_item(contents: dict, version: int) -> dict:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     if "durability" in contents:
         if "predicates" not in contents:
@@ -469,8 +465,7 @@ def predicate_item(contents: dict, version: int) -> dict:
 
 
 def predicate_location(contents: dict, version: int) -> dict:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     if "biomes" in contents:
         if isinstance(contents["biomes"], list):
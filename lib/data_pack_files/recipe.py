@@ -8,6 +8,7 @@
 import json
 from pathlib import Path
 from typing import Any
+from contextvars import ContextVar
 from lib import defaults
 from lib import utils
 from lib import json_manager
@@ -18,15 +19,14 @@ from lib.data_pack_files import items
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
 # Define functions
 
 def update(file_path: Path, source_file_path: Path, version: int):
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Read file
     contents, load_bool = json_manager.safe_load(source_file_path)
@@ -39,8 +39,7 @@ def update(file_path: Path, source_file_path: Path, version: int):
 
 
 def recipe(contents: dict[str, Any], version: int) -> dict[str, Any]:
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     if "type" in contents:
         contents["type"] = miscellaneous.namespace(contents["type"])
@@ -78,15 +77,15 @@ def recipe(contents: dict[str, Any], version: int) -> dict[str, Any]:
 def update_ingredient(ingredient: dict[str, Any] | str) -> str:
     if isinstance(ingredient, dict):
         if "item" in ingredient:
-            return items.update_from_command("minecraft:barrier" if ingredient["item"] == "minecraft:air" else ingredient["item"], pack_version, [])
+            return items.update_from_command("minecraft:barrier" if ingredient["item"] == "minecraft:air" else ingredient["item"], pack_version.get(), [])
 
         if "tag" in ingredient:
-            return items.update_from_command(f"#{ingredient["tag"]}", pack_version, [])
+            return items.update_from_command(f"#{ingredient["tag"]}", pack_version.get(), [])
         
         return "minecraft:stone"
         
     else:
-        return items.update_from_command("minecraft:barrier" if ingredient == "minecraft:air" else ingredient, pack_version, [])
+        return items.update_from_command("minecraft:barrier" if ingredient == "minecraft:air" else ingredient, pack_version.get(), [])
 
 
 def update_result(result: dict[str, Any] | str, recipe_type: str) -> dict[str, Any] | str:
@@ -103,7 +102,7 @@ def update_result(result: dict[str, Any] | str, recipe_type: str) -> dict[str, A
                 "id": result["id"],
                 "components": result["components"] if "components" in result else None,
             },
-            pack_version,
+            pack_version.get(),
             []
         )
         result["id"] = "minecraft:barrier" if updated_item["id"] == "minecraft:air" else updated_item["id"]
@@ -9,6 +9,7 @@ import shutil
 from pathlib import Path
 from lib import finalize
 from lib import option_manager
+from lib import side_effects
 from lib.log import log
 from lib.data_pack_files import command_helper
 from lib.data_pack_files import nbt_tags
@@ -26,10 +27,7 @@ MINECRAFT_PATH = EASY_MAP_UPDATER_PATH.parent
 # Define functions
 
 def cancel_damage(command: list[str], is_macro: bool) -> str:
-    world = MINECRAFT_PATH / "saves" / option_manager.get_map_name()
-    data_pack_path = world / "datapacks" / "firework_damage_canceler.zip"
-    if world.exists() and not data_pack_path.exists():
-        create_pack(world)
+    check_pack_creation()
 
     # Get wait time
     wait_time = 0
@@ -53,6 +51,15 @@ def cancel_damage(command: list[str], is_macro: bool) -> str:
         is_macro
     )
 
+def check_pack_creation():
+    if side_effects.defer(check_pack_creation):
+        return
+
+    world = MINECRAFT_PATH / "saves" / option_manager.get_map_name()
+    data_pack_path = world / "datapacks" / "firework_damage_canceler.zip"
+    if world.exists() and not data_pack_path.exists():
+        create_pack(world)
+
 def create_pack(world: Path):
     log("Creating firework damage canceler data pack")
 
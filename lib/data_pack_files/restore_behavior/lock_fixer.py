@@ -10,6 +10,7 @@ from pathlib import Path
 from lib.log import log
 from lib import finalize
 from lib import option_manager
+from lib import side_effects
 
 
 
@@ -26,6 +27,9 @@ MINECRAFT_PATH = EASY_MAP_UPDATER_PATH.parent
 # Define functions
 
 def fix_locks():
+    if side_effects.defer(fix_locks):
+        return
+
     world = MINECRAFT_PATH / "saves" / option_manager.get_map_name()
     data_pack_path = world / "datapacks" / "lock_fixer.zip"
     if world.exists() and not data_pack_path.exists():
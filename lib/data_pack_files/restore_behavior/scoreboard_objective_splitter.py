@@ -12,6 +12,7 @@ from lib import defaults
 from lib import utils
 from lib import finalize
 from lib import option_manager
+from lib import side_effects
 
 
 
@@ -27,6 +28,9 @@ PACK_FORMAT = defaults.DATA_PACK_FORMAT
 # Define functions
 
 def insert_objective(name: str, criteria: str, id_list: list[str]):
+    if side_effects.defer(insert_objective, name, criteria, id_list):
+        return
+
     # Get world path
     world = MINECRAFT_PATH / "saves" / option_manager.get_map_name()
 
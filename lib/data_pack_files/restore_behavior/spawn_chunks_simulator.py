@@ -9,6 +9,7 @@ import shutil
 from pathlib import Path
 from lib import finalize
 from lib import option_manager
+from lib import side_effects
 from lib.log import log
 from lib.data_pack_files import command_helper
 
@@ -122,6 +123,9 @@ def remove_all_forceloaded_chunks(command: list[str], is_macro: bool) -> str:
     )
 
 def check_pack_creation():
+    if side_effects.defer(check_pack_creation):
+        return
+
     world = MINECRAFT_PATH / "saves" / option_manager.get_map_name()
     data_pack_path = world / "datapacks" / "spawn_chunks_simulator.zip"
     data_pack_path.parent.mkdir(exist_ok=True, parents=True)
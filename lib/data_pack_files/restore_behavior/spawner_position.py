@@ -7,6 +7,7 @@
 
 import json
 from pathlib import Path
+from contextvars import ContextVar
 from lib.log import log
 from lib import defaults
 from lib import utils
@@ -16,7 +17,7 @@ from lib import finalize
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 PACK_FORMAT = defaults.DATA_PACK_FORMAT
 
 
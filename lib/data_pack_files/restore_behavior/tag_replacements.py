@@ -8,17 +8,19 @@
 import json
 from typing import cast
 from pathlib import Path
+from contextvars import ContextVar
 from lib.log import log
 from lib import defaults
 from lib import utils
 from lib import finalize
+from lib import side_effects
 from lib.data_pack_files import tables
 
 
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 PACK_FORMAT = defaults.DATA_PACK_FORMAT
 SEND_PYTHON = False
 
@@ -27,6 +29,9 @@ SEND_PYTHON = False
 # Define functions
 
 def create_pack(world: Path):
+    if side_effects.defer(create_pack, world):
+        return
+
     log("Creating tag replacements data pack")
 
     SEND_PYTHON = False
@@ -7,6 +7,7 @@
 
 import json
 from pathlib import Path
+from contextvars import ContextVar
 from lib import defaults
 from lib import utils
 from lib import json_manager
@@ -19,15 +20,14 @@ from lib.data_pack_files import item_component
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
 # Define functions
 
 def update(file_path: Path, source_file_path: Path, version: int, tag_type: str):
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     contents, load_bool = json_manager.safe_load(source_file_path)
     if not load_bool:
@@ -47,12 +47,12 @@ def update(file_path: Path, source_file_path: Path, version: int, tag_type: str)
                     "nbt": {},
                     "read": True
                 },
-                pack_version, []
+                pack_version.get(), []
             )["id"]
         if tag_type == "entity_type":
             new_entry = entities.update(
                 {"id": entry, "read": True},
-                pack_version, []
+                pack_version.get(), []
             )
         if tag_type == "item":
             new_entry = items.update(
@@ -63,7 +63,7 @@ def update(file_path: Path, source_file_path: Path, version: int, tag_type: str)
                     "nbt": {},
                     "read": True
                 },
-                pack_version, []
+                pack_version.get(), []
             )["id"]
         if entry != new_entry:
             if isinstance(contents["values"][i], str):
@@ -6,6 +6,7 @@
 # Import things
 
 from typing import cast
+from contextvars import ContextVar
 from lib.log import log
 from lib.data_pack_files import arguments
 from lib.data_pack_files import nbt_tags
@@ -22,7 +23,7 @@ import easy_map_updater
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
@@ -30,8 +31,7 @@ pack_version = defaults.PACK_VERSION
 
 def update(selector: str | dict[str, str | bool | list], version: int, issues: list[dict[str, str | int]], imposed_limit: bool) -> str:
     # Assign version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Initialize parameters
     nbt = ""
@@ -62,7 +62,7 @@ def update(selector: str | dict[str, str | bool | list], version: int, issues: l
         if len(selector) > 2:
             return update_arguments(selector, nbt, imposed_limit, issues)
         arguments: dict[str, str | dict | list] = {}
-        if selector[1] in ["r", "p"] and pack_version <= 1202:
+        if selector[1] in ["r", "p"] and pack_version.get() <= 1202:
             arguments["type"] = "minecraft:player"
             arguments["sort"] = {"r": "random", "p": "nearest"}[selector[1]]
             arguments["limit"] = "1"
@@ -70,7 +70,7 @@ def update(selector: str | dict[str, str | bool | list], version: int, issues: l
         if imposed_limit and selector[1] in ["a", "e"]:
             arguments["limit"] = "1"
         if nbt:
-            arguments["nbt"] = nbt_tags.update({"nbt": nbt, "read": True}, pack_version, issues, "entity")
+            arguments["nbt"] = nbt_tags.update({"nbt": nbt, "read": True}, pack_version.get(), issues, "entity")
             predicate_name = nbt_tags.extract_hidden_default_tags(arguments["nbt"])
             if predicate_name is not None:
                 arguments["predicate"] = predicate_name
@@ -92,7 +92,7 @@ def update(selector: str | dict[str, str | bool | list], version: int, issues: l
     # Insert NBT
     arguments: dict[str, str | dict | list] = {}
     arguments["name"] = selector
-    arguments["nbt"] = nbt_tags.update({"nbt": nbt, "read": True}, pack_version, issues, "entity")
+    arguments["nbt"] = nbt_tags.update({"nbt": nbt, "read": True}, pack_version.get(), issues, "entity")
     predicate_name = nbt_tags.extract_hidden_default_tags(arguments["nbt"])
     if predicate_name is not None:
         arguments["predicate"] = predicate_name
@@ -110,11 +110,11 @@ def update_arguments(selector: str, nbt: str, imposed_limit: bool, issues: list[
     selector_arguments = unpack_arguments(selector[3:-1])
 
     # Special handling for boat update in 1.21.2
-    if pack_version <= 2101 and "type" in selector_arguments:
+    if pack_version.get() <= 2101 and "type" in selector_arguments:
         handle_boat_split(cast(dict, selector_arguments))
 
     # Special handling for potion update in 1.21.5
-    if pack_version <= 2104 and "type" in selector_arguments:
+    if pack_version.get() <= 2104 and "type" in selector_arguments:
         handle_potion_split(cast(dict, selector_arguments))
 
     # Update arguments
@@ -129,7 +129,7 @@ def update_arguments(selector: str, nbt: str, imposed_limit: bool, issues: list[
             selector_arguments["limit"] = "1"
 
     # Handle @r or @p detecting dead players
-    if selector_type in ["r", "p"] and pack_version <= 1202:
+    if selector_type in ["r", "p"] and pack_version.get() <= 1202:
         selector_arguments["type"] = ["minecraft:player"]
         if "sort" not in selector_arguments:
             selector_arguments["sort"] = {"r": "random", "p": "nearest"}[selector_type]
@@ -140,9 +140,9 @@ def update_arguments(selector: str, nbt: str, imposed_limit: bool, issues: list[
     # Add NBT to the list
     if nbt != "":
         if "type" in selector_arguments and not selector_arguments["type"][0].startswith("!"):
-            updated_nbt = nbt_tags.update({"nbt": nbt, "object_id": entities.update(selector_arguments["type"][0], pack_version, issues), "read": True}, pack_version, issues, "entity")
+            updated_nbt = nbt_tags.update({"nbt": nbt, "object_id": entities.update(selector_arguments["type"][0], pack_version.get(), issues), "read": True}, pack_version.get(), issues, "entity")
         else:
-            updated_nbt = nbt_tags.update({"nbt": nbt, "read": True}, pack_version, issues, "entity")
+            updated_nbt = nbt_tags.update({"nbt": nbt, "read": True}, pack_version.get(), issues, "entity")
 
         predicate_name = nbt_tags.extract_hidden_default_tags(updated_nbt)
         if predicate_name is not None:
@@ -176,7 +176,7 @@ def unpack_arguments(in_arguments: str, nested: bool = False) -> dict[str, str |
 
     # Iterate through arguments
     numeric_argument_count = 0
-    for argument in arguments.parse(in_arguments, ",", pack_version >= 1400):
+    for argument in arguments.parse(in_arguments, ",", pack_version.get() >= 1400):
         if "=" not in argument:
             try:
                 int(argument)
@@ -300,7 +300,7 @@ def update_argument(selector_type: str, selector_arguments: dict[str, str | dict
     # Convert old scores
     if (
         option_manager.FIXES["broken_score_references"] and
-        pack_version <= 1202 and
+        pack_version.get() <= 1202 and
         "score_" not in argument_type and
         (argument_type != argument_type.lower() or "_min" in argument_type)
     ):
@@ -342,7 +342,7 @@ def update_argument(selector_type: str, selector_arguments: dict[str, str | dict
         return
 
     if argument_type == "m":
-        selector_arguments["gamemode"] = miscellaneous.gamemode(cast(str, value), pack_version, issues)
+        selector_arguments["gamemode"] = miscellaneous.gamemode(cast(str, value), pack_version.get(), issues)
         del selector_arguments[argument_type]
         return
 
@@ -352,7 +352,7 @@ def update_argument(selector_type: str, selector_arguments: dict[str, str | dict
 
 def update_argument_list(argument_type: str, value: str, selector_arguments: dict[str, str | dict | list], issues: list[dict[str, str | int]]) -> str | None:
     if argument_type == "gamemode":
-        return miscellaneous.gamemode(value, pack_version, issues)
+        return miscellaneous.gamemode(value, pack_version.get(), issues)
 
     if argument_type == "nbt":
         nbt_input = {"nbt": value, "read": True}
@@ -362,9 +362,9 @@ def update_argument_list(argument_type: str, value: str, selector_arguments: dic
             prefix = "!"
 
         if "type" in selector_arguments and not selector_arguments["type"][0].startswith("!"):
-            nbt_input["object_id"] = entities.update(selector_arguments["type"][0], pack_version, issues)
+            nbt_input["object_id"] = entities.update(selector_arguments["type"][0], pack_version.get(), issues)
 
-        updated_nbt = nbt_tags.update(nbt_input, pack_version, issues, "entity")
+        updated_nbt = nbt_tags.update(nbt_input, pack_version.get(), issues, "entity")
 
         predicate_name = nbt_tags.extract_hidden_default_tags(updated_nbt)
         if predicate_name is not None:
@@ -382,8 +382,8 @@ def update_argument_list(argument_type: str, value: str, selector_arguments: dic
 
     if argument_type == "type":
         if value.startswith("!"):
-            return "!" + entities.update(value[1:], pack_version, issues)
-        return entities.update(value, pack_version, issues)
+            return "!" + entities.update(value[1:], pack_version.get(), issues)
+        return entities.update(value, pack_version.get(), issues)
 
     return value
 
@@ -6,8 +6,9 @@
 from nbt import nbt as NBT
 from nbt import region
 from pathlib import Path
+import numpy as np
 import defaults
-import math
+from region_files import block_states
 
 PROGRAM_PATH = Path(__file__).parent
 
@@ -177,9 +178,7 @@ def create_chunk(x: int, z: int) -> NBT.NBTFile:
         section["Y"] = NBT.TAG_Byte(i-4)
 
         section["SkyLight"] = NBT.TAG_Byte_Array()
-        section["SkyLight"].value = []
-        for j in range(2048):
-            section["SkyLight"].append(255)
+        section["SkyLight"].value = bytearray(b"\xff"*2048)
 
         chunk["sections"].append(section)
 
@@ -191,32 +190,18 @@ def insert_indices(chunk: NBT.NBTFile, block_count: int):
     for section_index in range((block_count-1)//512 + 1):
         section: NBT.TAG_Compound = chunk["sections"][section_index]
         palette: NBT.TAG_List = section["block_states"]["palette"]
-        palette_length = len(palette)
-        index_size = max(int(math.ceil(math.log2(palette_length))), 4)
-        index_size_divisor = int(2**index_size)
-        indices_per_entry = 64//index_size
-        
-        data: list[int] = []
-        for i in range(int(math.ceil(4096/indices_per_entry))):
-            data.append(0)
-        for i in range(min(block_count - 512*section_index, 512)):
-            x = i%8*2
-            z = i//8%8*2
-            y = i//64*2
-            data_index = (y*256 + z*16 + x)//indices_per_entry
-            long_index = (y*256 + z*16 + x)%indices_per_entry
-            long = data[data_index]
-
-            right_point = int(index_size_divisor**long_index)
-            left_point = right_point*index_size_divisor
-            data[data_index] = (
-                (i + 1)*right_point + # The index of the block in the palette
-                (long%right_point) + # The part of the long to the right of the inserted index
-                (long//left_point)*left_point # The part of the long to the left of the inserted index
-            )
+        index_size = block_states.get_index_size(len(palette))
+
+        # Place every block on its own spot in a grid with gaps of 1 between them
+        i = np.arange(min(block_count - 512*section_index, 512))
+        x = i%8*2
+        z = i//8%8*2
+        y = i//64*2
+        indices = np.zeros(block_states.SECTION_VOLUME, dtype=np.uint64)
+        indices[y*256 + z*16 + x] = i + 1 # The index of the block in the palette
 
         section["block_states"]["data"] = NBT.TAG_Long_Array()
-        section["block_states"]["data"].value = data
+        section["block_states"]["data"].value = block_states.pack_indices(indices, index_size)
 
 
 
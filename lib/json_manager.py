@@ -19,6 +19,11 @@ from lib.data_pack_files import arguments
 PROGRAM_PATH = Path(__file__).parent.parent
 MINECRAFT_PATH = PROGRAM_PATH.parent
 
+PACKED_CACHE_SIZE = 10000
+PACKED_STRING_LENGTH = 1024
+packed_keys: dict[str, str] = {}
+packed_strings: dict[str, str] = {}
+
 
 
 # Define functions
@@ -139,36 +144,75 @@ def unpack_list(string: str) -> list:
 
 
 def pack(json_object) -> str:
-    # Pack based on type
-    if isinstance(json_object, dict):
-        return pack_compound(json_object)
-    if isinstance(json_object, list):
-        return pack_list(json_object)
-    if isinstance(json_object, str):
-        return utils.pack_string(json_object, force_double=True)
-    if type(json_object).__name__ == "bool":
-        if json_object:
-            return "true"
-        return "false"
-    if json_object == None:
-        return "null"
-    return str(json_object)
+    # The whole tree is written into one buffer, which is joined at the end
+    buffer: list[str] = []
+    pack_into(buffer, json_object)
+    return "".join(buffer)
 
 def pack_list(json_object: list) -> str:
-    # Prepare list
-    out_list = []
-    for entry in json_object:
-        out_list.append(pack(entry))
-
-    return f'[{",".join(out_list)}]'
+    buffer: list[str] = []
+    pack_list_into(buffer, json_object)
+    return "".join(buffer)
 
 def pack_compound(json_object: dict[str, Any]) -> str:
-    # Prepare tag list
-    tags: list[str] = []
+    buffer: list[str] = []
+    pack_compound_into(buffer, json_object)
+    return "".join(buffer)
 
-    # Iterate through keys
+def pack_into(buffer: list[str], json_object):
+    # Pack based on type
+    if isinstance(json_object, dict):
+        pack_compound_into(buffer, json_object)
+    elif isinstance(json_object, list):
+        pack_list_into(buffer, json_object)
+    elif isinstance(json_object, str):
+        buffer.append(get_packed_string(json_object))
+    elif type(json_object).__name__ == "bool":
+        buffer.append("true" if json_object else "false")
+    elif json_object == None:
+        buffer.append("null")
+    else:
+        buffer.append(str(json_object))
+
+def pack_list_into(buffer: list[str], json_object: list):
+    buffer.append("[")
+    first = True
+    for entry in json_object:
+        if not first:
+            buffer.append(",")
+        first = False
+        pack_into(buffer, entry)
+    buffer.append("]")
+
+def pack_compound_into(buffer: list[str], json_object: dict[str, Any]):
+    buffer.append("{")
+    first = True
     for key in json_object:
-        tags.append(f'"{key}":{pack(json_object[key])}')
-    
-    # Return stringified version of compound
-    return f'{{{",".join(tags)}}}'
\ No newline at end of file
+        if not first:
+            buffer.append(",")
+        first = False
+        buffer.append(get_packed_key(key))
+        pack_into(buffer, json_object[key])
+    buffer.append("}")
+
+def get_packed_key(key: str) -> str:
+    # Keys repeat a lot, so they are kept quoted along with the colon
+    packed_key = packed_keys.get(key)
+    if packed_key is None:
+        if len(packed_keys) >= PACKED_CACHE_SIZE:
+            packed_keys.clear()
+        packed_key = f'"{key}":'
+        packed_keys[key] = packed_key
+    return packed_key
+
+def get_packed_string(string: str) -> str:
+    # Short strings repeat a lot, so their escaped form is kept
+    if len(string) > PACKED_STRING_LENGTH:
+        return utils.pack_string(string, force_double=True)
+    packed_string = packed_strings.get(string)
+    if packed_string is None:
+        if len(packed_strings) >= PACKED_CACHE_SIZE:
+            packed_strings.clear()
+        packed_string = utils.pack_string(string, force_double=True)
+        packed_strings[string] = packed_string
+    return packed_string
\ No newline at end of file
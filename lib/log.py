@@ -5,14 +5,33 @@
 
 # Import things
 
+import os
+import time
+import queue
+import atexit
+import threading
 from pathlib import Path
+from typing import Any, Callable, TextIO
+from contextvars import ContextVar
 from datetime import datetime
+from multiprocessing import util as multiprocessing_util
 
 
 
 # Initialize variables
 
 PROGRAM_PATH = Path(__file__).parent.parent
+recorded_logs: ContextVar[list[tuple[Callable[..., Any], tuple, bool]] | None] = ContextVar("recorded_logs", default=None)
+muted: ContextVar[bool] = ContextVar("muted", default=False)
+sink: ContextVar[list[str] | None] = ContextVar("sink", default=None)
+
+# Messages are written to the log file by a background thread, which flushes the file once it runs out of messages or every interval
+FLUSH_INTERVAL = 1.0
+message_queue: queue.Queue[tuple[float, str] | threading.Event] = queue.Queue()
+writer_thread: threading.Thread | None = None
+writer_lock = threading.Lock()
+log_file: TextIO | None = None
+log_file_date = ""
 
 
 
@@ -23,13 +42,26 @@ def log(text: str | list, halt = False):
     if isinstance(text, list):
         text = "\n".join(text)
 
+    # Record the message so that it can be replayed, muted messages are left for the replay to log
+    current_recorded_logs = recorded_logs.get()
+    if current_recorded_logs is not None:
+        current_recorded_logs.append((log, (text, halt), False))
+    if muted.get():
+        return
+
+    # Collect the message instead if the run has its own log sink
+    current_sink = sink.get()
+    if current_sink is not None:
+        current_sink.append(text)
+        return
+
     # Add string to file
-    current_time = datetime.now()
-    with get_log_path(current_time).open("a", encoding="utf-8", newline="\n") as file:
-        file.write(f'{current_time.strftime("[%H:%M:%S]")} {text}\n')
+    start_writer()
+    message_queue.put((time.time(), text))
 
     # Wait for input if halt is true
     if halt:
+        flush_logs()
         input(f'{text}\nPress ENTER to continue')
     else:
         print(text)
@@ -39,4 +71,98 @@ def log(text: str | list, halt = False):
 def get_log_path(current_time: datetime = datetime.now()) -> Path:
     logs_folder = PROGRAM_PATH / "logs"
     logs_folder.mkdir(exist_ok=True, parents=True)
-    return logs_folder / current_time.strftime("%Y-%m-%d.log")
\ No newline at end of file
+    return logs_folder / current_time.strftime("%Y-%m-%d.log")
+
+
+
+def start_writer():
+    global writer_thread
+    if writer_thread is not None:
+        return
+    with writer_lock:
+        if writer_thread is None:
+            writer_thread = threading.Thread(target=write_messages, name="log_writer", daemon=True)
+            writer_thread.start()
+
+def write_messages():
+    last_flush = time.monotonic()
+    last_second = -1
+    prefix = ""
+    while True:
+        try:
+            entry = message_queue.get(timeout=FLUSH_INTERVAL)
+        except queue.Empty:
+            flush_file()
+            last_flush = time.monotonic()
+            continue
+
+        # Events are flush requests, they are set once everything before them is written
+        if isinstance(entry, threading.Event):
+            flush_file()
+            last_flush = time.monotonic()
+            entry.set()
+            continue
+
+        # The timestamp is only formatted again once the second changes
+        timestamp, text = entry
+        second = int(timestamp)
+        if second != last_second:
+            last_second = second
+            current_time = datetime.fromtimestamp(timestamp)
+            prefix = current_time.strftime("[%H:%M:%S]")
+            file = get_log_file(current_time)
+        else:
+            file = log_file
+        if file is not None:
+            file.write(f'{prefix} {text}\n')
+
+        if message_queue.empty() or time.monotonic() - last_flush >= FLUSH_INTERVAL:
+            flush_file()
+            last_flush = time.monotonic()
+
+def get_log_file(current_time: datetime) -> TextIO | None:
+    # Keep the file open until the day changes
+    global log_file
+    global log_file_date
+    date = current_time.strftime("%Y-%m-%d")
+    if log_file is None or log_file_date != date:
+        if log_file is not None:
+            log_file.close()
+        try:
+            log_file = get_log_path(current_time).open("a", encoding="utf-8", newline="\n")
+            log_file_date = date
+        except:
+            log_file = None
+    return log_file
+
+def flush_file():
+    if log_file is not None:
+        try:
+            log_file.flush()
+        except:
+            pass
+
+def flush_logs():
+    # Wait until every message logged so far is in the file
+    if writer_thread is None or not writer_thread.is_alive():
+        return
+    flushed = threading.Event()
+    message_queue.put(flushed)
+    flushed.wait(10)
+
+def reset_writer():
+    # A forked process starts without the writer thread, and must not share the file buffer with its parent
+    global message_queue
+    global writer_thread
+    global writer_lock
+    global log_file
+    message_queue = queue.Queue()
+    writer_thread = None
+    writer_lock = threading.Lock()
+    log_file = None
+
+# Messages are flushed before forking, when the program exits, and when a worker process exits
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=flush_logs, after_in_child=reset_writer)
+atexit.register(flush_logs)
+multiprocessing_util.Finalize(None, flush_logs, exitpriority=100)
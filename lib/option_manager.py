@@ -24,6 +24,7 @@ class Option(Enum):
     RESOURCE_PACK = "resource_pack"
     FANCY_NAME = "fancy_name"
     VERSION = "version"
+    WORKERS = "workers"
     FIXES = "fixes"
 
 class Options(TypedDict):
@@ -31,6 +32,7 @@ class Options(TypedDict):
     resource_pack: str
     fancy_name: str
     version: int
+    workers: int
     fixes: dict[str, Any]
 
 
@@ -43,6 +45,7 @@ def get_default_options() -> Options:
         Option.RESOURCE_PACK.value: "resources",
         Option.FANCY_NAME.value: "Map",
         Option.VERSION.value: defaults.PACK_VERSION,
+        Option.WORKERS.value: 1,
         Option.FIXES.value: {
             "command_helper": {
                 "teleport_dismount": True,
@@ -92,10 +95,15 @@ def set_options(options: Options):
 
 def get_options():
     options = get_default_options()
+    file_options = None
     if OPTIONS_PATH.exists():
         with OPTIONS_PATH.open("r", encoding="utf-8") as file:
-            merge_options(options, json.load(file))
-    set_options(options)
+            file_options = json.load(file)
+        merge_options(options, file_options)
+
+    # Only write when something changed, worker processes read this file concurrently
+    if options != file_options:
+        set_options(options)
 
     return options
 
@@ -126,6 +134,10 @@ def get_version() -> int:
     options = get_options()
     return options[Option.VERSION.value]
 
+def get_workers() -> int:
+    options = get_options()
+    return max(int(options[Option.WORKERS.value]), 1)
+
 def get_fixes() -> dict[str, Any]:
     options = get_options()
     return options[Option.FIXES.value]
@@ -152,6 +164,11 @@ def set_version(version: int):
     options[Option.VERSION.value] = version
     set_options(options)
 
+def set_workers(workers: int):
+    options = get_options()
+    options[Option.WORKERS.value] = workers
+    set_options(options)
+
 
 
 FIXES = get_fixes()
\ No newline at end of file
@@ -0,0 +1,104 @@
+# Easy Map Updater
+# Copyright (C) 2024  Jesse Spicer, and StickyPiston Hosting
+
+
+
+# Import things
+
+import numpy as np
+from nbt import nbt as NBT
+
+
+
+# Initialize variables
+
+SECTION_VOLUME = 4096
+MIN_INDEX_SIZE = 4
+
+
+
+# Define functions
+
+def get_index_size(palette_length: int) -> int:
+    return max((palette_length - 1).bit_length(), MIN_INDEX_SIZE)
+
+def get_long_count(index_size: int) -> int:
+    indices_per_long = 64//index_size
+    return (SECTION_VOLUME + indices_per_long - 1)//indices_per_long
+
+def pack_indices(indices: np.ndarray, index_size: int) -> list[int]:
+    # Encode 4096 palette indices into a packed long array (indices don't span multiple longs)
+    indices_per_long = 64//index_size
+    long_count = get_long_count(index_size)
+    padded = np.zeros(long_count*indices_per_long, dtype=np.uint64)
+    padded[:SECTION_VOLUME] = np.asarray(indices, dtype=np.uint64)[:SECTION_VOLUME] & np.uint64((1 << index_size) - 1)
+    shifts = np.arange(indices_per_long, dtype=np.uint64)*np.uint64(index_size)
+    longs = np.bitwise_or.reduce(padded.reshape(long_count, indices_per_long) << shifts[None, :], axis=1)
+
+    # TAG_Long_Array holds signed values
+    return longs.view(np.int64).tolist()
+
+def unpack_indices(data: list[int], index_size: int) -> np.ndarray:
+    # Decode a packed long array into 4096 palette indices (indices don't span multiple longs)
+    indices_per_long = 64//index_size
+    longs = np.array(data, dtype=np.int64).view(np.uint64)
+    shifts = np.arange(indices_per_long, dtype=np.uint64)*np.uint64(index_size)
+    mask = np.uint64((1 << index_size) - 1)
+    indices = ((longs[:, None] >> shifts[None, :]) & mask).reshape(-1)
+
+    # Pad out data arrays which are too short
+    if len(indices) < SECTION_VOLUME:
+        indices = np.concatenate((indices, np.zeros(SECTION_VOLUME - len(indices), dtype=np.uint64)))
+    return indices[:SECTION_VOLUME]
+
+
+
+class ChunkBlockStates:
+    # Looks up blocks in a chunk, decoding each section once and caching it by its Y value
+
+    def __init__(self, chunk: NBT.NBTFile):
+        self.chunk = chunk
+        self.sections: dict[int, NBT.TAG_Compound] | None = None
+        self.indices: dict[int, np.ndarray | None] = {}
+        self.default_block = NBT.TAG_Compound()
+        self.default_block["Name"] = NBT.TAG_String("minecraft:air")
+
+    def get_section(self, y_section: int) -> NBT.TAG_Compound | None:
+        if self.sections is None:
+            self.sections = {}
+            if "sections" in self.chunk:
+                section: NBT.TAG_Compound
+                for section in self.chunk["sections"]:
+                    if "Y" in section and section["Y"].value not in self.sections:
+                        self.sections[section["Y"].value] = section
+        return self.sections.get(y_section)
+
+    def get_indices(self, y_section: int, section: NBT.TAG_Compound) -> np.ndarray | None:
+        if y_section not in self.indices:
+            block_states: NBT.TAG_Compound = section["block_states"]
+            if "data" in block_states:
+                self.indices[y_section] = unpack_indices(block_states["data"].value, get_index_size(len(block_states["palette"])))
+            else:
+                self.indices[y_section] = None
+        return self.indices[y_section]
+
+    def get_block_data(self, x: int, y: int, z: int) -> NBT.TAG_Compound:
+        # Find proper section
+        y_section = y//16
+        section = self.get_section(y_section)
+        if section is None or "block_states" not in section:
+            return self.default_block
+
+        # Extract index from data
+        palette: NBT.TAG_List = section["block_states"]["palette"]
+        palette_length = len(palette)
+        if palette_length == 1:
+            return palette[0]
+        indices = self.get_indices(y_section, section)
+        if indices is None:
+            return self.default_block
+        index = int(indices[(y%16)*256 + (z%16)*16 + (x%16)])
+
+        if index >= palette_length:
+            return self.default_block
+        return palette[index]
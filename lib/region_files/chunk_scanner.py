@@ -0,0 +1,72 @@
+# Easy Map Updater
+# Copyright (C) 2024  Jesse Spicer, and StickyPiston Hosting
+
+
+
+# Import things
+
+from io import BytesIO
+from struct import unpack_from
+from nbt import nbt as NBT
+from nbt import region
+from lib.region_files.region_writer import RegionWriter
+
+
+
+# Initialize variables
+
+TAG_LIST_ID = 9
+
+
+
+# Define functions
+
+def get_chunk_data(region_file: region.RegionFile, x: int, z: int) -> bytes | None:
+    # Decompress the chunk without parsing it
+    try:
+        data = region_file.get_blockdata(x, z)
+    except:
+        return None
+    if not data:
+        return None
+    return data
+
+def parse_chunk(data: bytes) -> NBT.NBTFile | None:
+    # Parse a chunk that was already decompressed
+    try:
+        chunk = NBT.NBTFile(buffer=BytesIO(data))
+    except:
+        return None
+    if not chunk:
+        return None
+    return chunk
+
+def has_list_entries(data: bytes, key: str) -> bool:
+    # Looks for the header of a list tag with the given name in the raw chunk data.
+    # A top-level list must show up as this exact byte sequence, so a chunk without
+    # a match can be skipped. Any match with a non-zero length counts, in case the
+    # sequence happens to show up nested somewhere else in the chunk.
+    key_bytes = key.encode("utf-8")
+    header = bytes([TAG_LIST_ID]) + len(key_bytes).to_bytes(2, "big") + key_bytes
+    index = data.find(header)
+    while index != -1:
+        length_index = index + len(header) + 1
+        if length_index + 4 > len(data):
+            return True
+        if unpack_from(">i", data, length_index)[0] != 0:
+            return True
+        index = data.find(header, index + 1)
+    return False
+
+def render_chunk(chunk: NBT.NBTFile) -> bytes:
+    buffer = BytesIO()
+    chunk.write_file(buffer=buffer)
+    return buffer.getvalue()
+
+def write_chunk_if_modified(region_writer: RegionWriter, x: int, z: int, chunk: NBT.NBTFile, data: bytes) -> bool:
+    # Compare the chunk against the data it was parsed from, and only write it back if they differ
+    new_data = render_chunk(chunk)
+    if new_data == data:
+        return False
+    region_writer.write_blockdata(x, z, new_data)
+    return True
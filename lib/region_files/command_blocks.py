@@ -5,18 +5,30 @@
 
 # Import things
 
+import os
 from pathlib import Path
 import json
-from typing import cast, TypedDict, NotRequired
+from typing import cast, Any, TypedDict, NotRequired, TextIO
+from concurrent.futures import ProcessPoolExecutor
+from contextvars import ContextVar
 from nbt import nbt as NBT
 from nbt import region
 from lib import option_manager
+from lib import side_effects
+from lib import translation_cache
+from lib import update_report
 from lib.data_pack_files import command
 from lib.data_pack_files import nbt_tags
 from lib.data_pack_files import target_selectors
-from lib.region_files import fix_world
+from lib.region_files import world_traversal
+from lib.region_files import command_index
+from lib.region_files.command_index import CommandIndex, CommandIndexWriter
+from lib.region_files.world_traversal import ChunkVisitor, RegionTask
+from lib.region_files.region_writer import RegionWriter
+from lib.region_files.block_states import ChunkBlockStates
 from lib import defaults
 from lib import utils
+from lib import log as log_module
 from lib.log import log
 import math
 
@@ -24,9 +36,11 @@ import math
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 PROGRAM_PATH = Path(__file__).parent.parent.parent
 MINECRAFT_PATH = PROGRAM_PATH.parent
+OUTPUT_FILE_NAMES = ["commands.mcfunction", "commands_original.mcfunction"]
+UPDATE_BATCH_SIZE = 2000
 
 
 
@@ -53,166 +67,193 @@ def read_commands(world: Path):
         log("ERROR: World does not exist!")
         return
 
-    commands: list[str] = []
-
-    # Iterate through region files
-    for path in [world, world / "DIM1", world / "DIM-1"]:
-        region_output = read_commands_from_region_folder(world, path)
-        if region_output != None and region_output != "":
-            commands.append(region_output)
-    dimensions = (world / "dimensions")
-    if dimensions.exists():
-        for dimension_namespace in dimensions.iterdir():
-            for dimension in dimension_namespace.iterdir():
-                region_output = read_commands_from_region_folder(world, dimension)
-                if region_output != None and region_output != "":
-                    commands.append(region_output)
-
-    # Write results to file
-    utils.safe_file_write(PROGRAM_PATH / "commands.mcfunction", "\n".join(commands))
-    utils.safe_file_write(PROGRAM_PATH / "commands_original.mcfunction", "\n".join(commands))
-
-    log("Command block data read")
-
-def read_commands_from_region_folder(world: Path, folder_path: Path) -> str | None:
-    if not folder_path.exists():
-        return
-
-    commands: list[str] = []
-    # Iterate between region and entities
-    folder: tuple[str, str]
-    for folder in [("region", "block_entities"), ("entities", "Entities")]:
-        if not (folder_path / folder[0]).exists():
-            continue
-        for file_path in (folder_path / folder[0]).iterdir():
-            region_output = read_commands_from_region(world, file_path, folder[1])
-            if region_output != None and region_output != "":
-                commands.append(region_output)
-
-    return "\n".join(commands)
+    world_traversal.traverse(world, [CommandReader(world)])
+
+class CommandReader(ChunkVisitor):
+    # Collects the commands of command blocks, command block minecarts, and signs.
+    # Commands are streamed to the output files as they are read, which are swapped in once reading is done.
+    # Where each guide line came from is recorded in the command index at the same time.
+    # The nether is traversed before the end, but its commands are held back and written after the end's, as they always have been.
+
+    def __init__(self, world: Path):
+        self.world = world
+        self.commands: list[tuple[CommandGuide, str]] = []
+        self.nether_commands: list[tuple[CommandGuide, str]] = []
+        self.output_files: list[TextIO] = []
+        self.index_writer: CommandIndexWriter | None = None
+        self.line_number = 0
+        self.in_worker = False
+        self.finished = False
+
+    def prepare_worker(self):
+        self.in_worker = True
+
+    def begin_file(self, task: RegionTask) -> bool:
+        log(f' Reading {task["file_path"].name}')
+        return True
+
+    def visit_chunk(self, task: RegionTask, x: int, z: int, chunk: NBT.NBTFile):
+        commands = read_commands_from_chunk(self.world, task["file_path"], world_traversal.LIST_NAMES[task["folder"]], x, z, chunk)
+        if self.in_worker:
+            self.commands.extend(commands)
+        else:
+            self.add_commands(task, commands)
 
-def read_commands_from_region(world: Path, file_path: Path, list_name: str) -> str | None:
-    commands: list[str] = []
+    def reset_results(self):
+        self.commands = []
 
-    log(f" Reading {file_path.name}")
-    try:
-        region_file = region.RegionFile(file_path)
-    except:
-        return
-    chunk_metadata: region.ChunkMetadata
-    for chunk_metadata in region_file.get_metadata():
-        try:
-            chunk = region_file.get_nbt(chunk_metadata.x, chunk_metadata.z)
-        except:
-            continue
-        if not chunk:
-            continue
-        if list_name not in chunk:
-            continue
-        block_entities: NBT.TAG_List = chunk[list_name]
-        if block_entities == None or len(block_entities) == 0:
-            continue
+    def get_results(self) -> list[tuple[CommandGuide, str]]:
+        return self.commands
 
-        # Iterate through block entities
-        for index in range(len(block_entities)):
-            block_entity: NBT.TAG_Compound = block_entities[index]
-            block_entity_id: NBT.TAG_String = block_entity["id"]
+    def merge_results(self, task: RegionTask, results: list[tuple[CommandGuide, str]]) -> bool:
+        self.add_commands(task, results)
+        return False
 
-            if list_name == "block_entities":
+    def add_commands(self, task: RegionTask, commands: list[tuple[CommandGuide, str]]):
+        if task["dimension"] == "minecraft:the_nether":
+            self.nether_commands.extend(commands)
+            return
+        if task["dimension"] != "minecraft:the_end":
+            self.write_nether_commands()
+        self.write_commands(commands)
+
+    def write_nether_commands(self):
+        self.write_commands(self.nether_commands)
+        self.nether_commands = []
+
+    def write_commands(self, commands: list[tuple[CommandGuide, str]]):
+        if not self.output_files:
+            for file_name in OUTPUT_FILE_NAMES:
+                self.output_files.append((PROGRAM_PATH / f"{file_name}.tmp").open("w", encoding="utf-8", newline="\n"))
+            self.index_writer = CommandIndexWriter()
+        for guide, command_string in commands:
+            guide_line = f'# {json.dumps(guide)}'
+            command_entry = f'{guide_line}\n{command_string}'
+            for file in self.output_files:
+                if self.line_number:
+                    file.write("\n")
+                file.write(command_entry)
+            cast(CommandIndexWriter, self.index_writer).add(self.line_number, guide_line, cast(dict, guide))
+            self.line_number += command_entry.count("\n") + 1
+
+    def finish(self):
+        # Swap in the finished files
+        self.write_nether_commands()
+        self.write_commands([])
+        for file_name, file in zip(OUTPUT_FILE_NAMES, self.output_files):
+            file.close()
+            os.replace(PROGRAM_PATH / f"{file_name}.tmp", PROGRAM_PATH / file_name)
+        cast(CommandIndexWriter, self.index_writer).close(max(self.line_number, 1))
+        self.output_files = []
+        self.index_writer = None
+        self.finished = True
+
+        log("Command block data read")
+
+def read_commands_from_chunk(world: Path, file_path: Path, list_name: str, chunk_x: int, chunk_z: int, chunk: NBT.NBTFile) -> list[tuple[CommandGuide, str]]:
+    commands: list[tuple[CommandGuide, str]] = []
+
+    if list_name not in chunk:
+        return commands
+    block_entities: NBT.TAG_List = chunk[list_name]
+    if block_entities == None or len(block_entities) == 0:
+        return commands
+
+    # Iterate through block entities
+    for index in range(len(block_entities)):
+        block_entity: NBT.TAG_Compound = block_entities[index]
+        block_entity_id: NBT.TAG_String = block_entity["id"]
+
+        if list_name == "block_entities":
+
+            x: int = block_entity["x"].value
+            y: int = block_entity["y"].value
+            z: int = block_entity["z"].value
+
+            if block_entity_id.value == "minecraft:command_block":
+                tag = "Command"
+                if tag not in block_entity:
+                    continue
+                command_string: NBT.TAG_String = block_entity[tag]
+                if not command_string or not command_string.value:
+                    continue
 
-                x: int = block_entity["x"].value
-                y: int = block_entity["y"].value
-                z: int = block_entity["z"].value
+                data = cast(CommandGuide, {
+                    "coordinates": f"{x} {y} {z}",
+                    "region": file_path.as_posix()[len(world.as_posix())+1:],
+                    "chunk_x": chunk_x,
+                    "chunk_z": chunk_z,
+                    "list": list_name,
+                    "index": index,
+                    "tag": tag
+                })
+                if "CommandStats" in block_entity:
+                    data["CommandStats"] = {}
+                    for key in block_entity["CommandStats"]:
+                        data["CommandStats"][key] = block_entity["CommandStats"][key].value
+                commands.append((data, command.remove_slash(command_string.value)))
 
-                if block_entity_id.value == "minecraft:command_block":
-                    tag = "Command"
+            if block_entity_id.value == "minecraft:sign":
+                sign_nbt = {}
+                for tag in ["front_text", "back_text"]:
                     if tag not in block_entity:
                         continue
-                    command_string: NBT.TAG_String = block_entity[tag]
-                    if not command_string or not command_string.value:
+                    text = block_entity[tag]
+                    if "messages" not in text:
                         continue
+                    sign_nbt[tag] = {"messages": []}
+                    for message in text["messages"]:
+                        sign_nbt[tag]["messages"].append(nbt_tags.convert_from_lib_format(message))
 
-                    data = cast(CommandGuide, {
-                        "coordinates": f"{x} {y} {z}",
-                        "region": file_path.as_posix()[len(world.as_posix())+1:],
-                        "chunk_x": chunk_metadata.x,
-                        "chunk_z": chunk_metadata.z,
-                        "list": list_name,
-                        "index": index,
-                        "tag": tag
-                    })
-                    if "CommandStats" in block_entity:
-                        data["CommandStats"] = {}
-                        for key in block_entity["CommandStats"]:
-                            data["CommandStats"][key] = block_entity["CommandStats"][key].value
-                    commands.append(
-                        f'# {json.dumps(data)}\n{command.remove_slash(command_string.value)}'
-                    )
-
-                if block_entity_id.value == "minecraft:sign":
-                    sign_nbt = {}
-                    for tag in ["front_text", "back_text"]:
-                        if tag not in block_entity:
-                            continue
-                        text = block_entity[tag]
-                        if "messages" not in text:
-                            continue
-                        sign_nbt[tag] = {"messages": []}
-                        for message in text["messages"]:
-                            sign_nbt[tag]["messages"].append(nbt_tags.convert_from_lib_format(message))
-
-                    data = cast(CommandGuide, {
-                        "coordinates": f"{x} {y} {z}",
-                        "region": file_path.as_posix()[len(world.as_posix())+1:],
-                        "chunk_x": chunk_metadata.x,
-                        "chunk_z": chunk_metadata.z,
-                        "list": list_name,
-                        "index": index,
-                        "tag": "sign_edge_case"
-                    })
-                    if "CommandStats" in block_entity:
-                        data["CommandStats"] = {}
-                        for key in block_entity["CommandStats"]:
-                            data["CommandStats"][key] = block_entity["CommandStats"][key].value
-                    commands.append(
-                        f'# {json.dumps(data)}\nemu_sign_text {nbt_tags.pack(sign_nbt)}'
-                    )
-
-            if list_name == "Entities" and block_entity_id.value == "minecraft:command_block_minecart":
-                tag = "Command"
-                if tag not in block_entity:
-                    continue
-                command_string: NBT.TAG_String = block_entity[tag]
-                x = int(math.floor(block_entity["Pos"][0].value))
-                y = int(math.floor(block_entity["Pos"][1].value))
-                z = int(math.floor(block_entity["Pos"][2].value))
-                uuid: list[int] = [
-                    block_entity["UUID"][0],
-                    block_entity["UUID"][1],
-                    block_entity["UUID"][2],
-                    block_entity["UUID"][3]
-                ]
-                if command_string == None or command_string.value == "":
-                    continue
                 data = cast(CommandGuide, {
                     "coordinates": f"{x} {y} {z}",
                     "region": file_path.as_posix()[len(world.as_posix())+1:],
-                    "chunk_x": chunk_metadata.x,
-                    "chunk_z": chunk_metadata.z,
+                    "chunk_x": chunk_x,
+                    "chunk_z": chunk_z,
                     "list": list_name,
                     "index": index,
-                    "tag": tag,
-                    "uuid": uuid
+                    "tag": "sign_edge_case"
                 })
                 if "CommandStats" in block_entity:
                     data["CommandStats"] = {}
                     for key in block_entity["CommandStats"]:
                         data["CommandStats"][key] = block_entity["CommandStats"][key].value
-                commands.append(
-                    f'# {json.dumps(data)}\n{command.remove_slash(command_string.value)}'
-                )
+                commands.append((data, f'emu_sign_text {nbt_tags.pack(sign_nbt)}'))
+
+        if list_name == "Entities" and block_entity_id.value == "minecraft:command_block_minecart":
+            tag = "Command"
+            if tag not in block_entity:
+                continue
+            command_string: NBT.TAG_String = block_entity[tag]
+            x = int(math.floor(block_entity["Pos"][0].value))
+            y = int(math.floor(block_entity["Pos"][1].value))
+            z = int(math.floor(block_entity["Pos"][2].value))
+            uuid: list[int] = [
+                block_entity["UUID"][0],
+                block_entity["UUID"][1],
+                block_entity["UUID"][2],
+                block_entity["UUID"][3]
+            ]
+            if command_string == None or command_string.value == "":
+                continue
+            data = cast(CommandGuide, {
+                "coordinates": f"{x} {y} {z}",
+                "region": file_path.as_posix()[len(world.as_posix())+1:],
+                "chunk_x": chunk_x,
+                "chunk_z": chunk_z,
+                "list": list_name,
+                "index": index,
+                "tag": tag,
+                "uuid": uuid
+            })
+            if "CommandStats" in block_entity:
+                data["CommandStats"] = {}
+                for key in block_entity["CommandStats"]:
+                    data["CommandStats"][key] = block_entity["CommandStats"][key].value
+            commands.append((data, command.remove_slash(command_string.value)))
 
-    return "\n".join(commands)
+
+    return commands
 
 
 
@@ -235,83 +276,130 @@ def write_commands(world: Path, get_confirmation: bool):
             log("Action canceled")
             return
 
-    # Extract commands from file
-    commands = utils.safe_file_read(PROGRAM_PATH / "commands.mcfunction").split("\n")
-    region_change = False
-    chunk_change = False
-    init_bool = False
-    # Iterate through commands
-    guide = cast(CommandGuide, {"coordinates": "", "region": "", "chunk_x": None, "chunk_z": None, "list": None, "index": None, "tag": None})
-    previous_guide = guide.copy()
-    region_file = None
-    chunk = NBT.NBTFile()
-    block_entities = NBT.TAG_List()
-    block_entity = NBT.TAG_Compound()
-    for command in commands:
+    # Group the commands by region and chunk so that each region file is only opened and saved once
+    write_plan = get_write_plan(utils.safe_file_read(PROGRAM_PATH / "commands.mcfunction").split("\n"))
+    for region_path in write_plan:
+        write_region_commands(world, region_path, write_plan[region_path])
+
+    log("Command block data written")
+
+def get_write_plan(commands: list[str]) -> dict[str, dict[tuple[int, int], list[tuple[CommandGuide, str]]]]:
+    write_plan: dict[str, dict[tuple[int, int], list[tuple[CommandGuide, str]]]] = {}
+    index = CommandIndex(len(commands))
+    guides = index.get_guides()
+    index.close()
+    guide: CommandGuide | None = None
+    for line_number, command in enumerate(commands):
         if not command:
             continue
 
         # Manage the guide
         if command.startswith("# {"):
-            previous_guide = guide.copy()
-            guide = cast(CommandGuide, json.loads(command[2:]))
-            region_change = guide["region"] != previous_guide["region"]
-            chunk_change = guide["chunk_x"] != previous_guide["chunk_x"] or guide["chunk_z"] != previous_guide["chunk_z"] or region_change
-
-            # Write chunk to region file
-            if chunk_change and init_bool and region_file:
-                region_file.write_chunk(previous_guide["chunk_x"], previous_guide["chunk_z"], chunk)
-
-            # Manage region file
-            if region_change:
-                region_file = region.RegionFile(world / guide["region"])
-
-            # Manage chunk
-            if chunk_change and region_file:
-                chunk: NBT.NBTFile = region_file.get_nbt(guide["chunk_x"], guide["chunk_z"])
-                if chunk:
-                    if guide["list"] not in chunk:
-                        chunk[guide["list"]] = NBT.TAG_List(value=[])
-                    block_entities: NBT.TAG_List = chunk[guide["list"]]
-
-            init_bool = True
+            guide = cast(CommandGuide, command_index.get_guide(guides, line_number, command))
+            continue
+        if guide is None:
             continue
 
-        # Get block entity
-        search_list = False
-        if len(block_entities) > guide["index"]:
-            block_entity = block_entities[guide["index"]]
-            if not test_block_entity(guide, block_entity):
-                search_list = True
-        else:
-            search_list = True
-        if search_list:
-            for block_entity in block_entities:
-                if test_block_entity(guide, block_entity):
-                    break
-            else:
-                log(f'Skipping block: {guide["coordinates"]} - {guide["chunk_x"]}, {guide["chunk_z"]} - {guide["region"]}')
-                continue
+        if guide["region"] not in write_plan:
+            write_plan[guide["region"]] = {}
+        chunks = write_plan[guide["region"]]
+        chunk_key = (guide["chunk_x"], guide["chunk_z"])
+        if chunk_key not in chunks:
+            chunks[chunk_key] = []
+        chunks[chunk_key].append((guide, command))
 
-        # Write command to chunk
-        if guide["tag"] == "sign_edge_case":
-            if command.startswith("data"):
-                sign_nbt: dict[str, dict[str, nbt_tags.TypeList | str | nbt_tags.TypeByte]] = nbt_tags.unpack(command[23:])
-            else:
-                sign_nbt: dict[str, dict[str, nbt_tags.TypeList | str | nbt_tags.TypeByte]] = nbt_tags.unpack(command[14:])
-            for sign_side in sign_nbt:
-                if sign_side not in block_entity:
-                    block_entity[sign_side] = NBT.TAG_Compound()
-                for key in sign_nbt[sign_side]:
-                    block_entity[sign_side][key] = nbt_tags.convert_to_lib_format(sign_nbt[sign_side][key])
+    return write_plan
 
-        else:
-            block_entity[guide["tag"]] = NBT.TAG_String(command)
+def write_region_commands(world: Path, region_path: str, chunks: dict[tuple[int, int], list[tuple[CommandGuide, str]]]):
+    try:
+        region_file = region.RegionFile(world / region_path)
+    except:
+        log(f'Skipping region: {region_path}')
+        return
+    region_writer = RegionWriter(region_file)
 
-    if init_bool and region_file:
-        region_file.write_chunk(guide["chunk_x"], guide["chunk_z"], chunk)
+    # Go through the chunks in the order of the region file header
+    for chunk_x, chunk_z in sorted(chunks, key=lambda chunk_key: (chunk_key[1], chunk_key[0])):
+        try:
+            chunk = region_file.get_nbt(chunk_x, chunk_z)
+        except:
+            chunk = None
+        if not chunk:
+            log(f'Skipping chunk: {chunk_x}, {chunk_z} - {region_path}')
+            continue
 
-    log("Command block data written")
+        block_entity_index = BlockEntityIndex(chunk)
+        modified = False
+        for guide, command in chunks[chunk_x, chunk_z]:
+            block_entity = block_entity_index.find(guide)
+            if block_entity is None:
+                log(f'Skipping block: {guide["coordinates"]} - {guide["chunk_x"]}, {guide["chunk_z"]} - {guide["region"]}')
+                continue
+            write_command(block_entity, guide, command)
+            modified = True
+
+        if modified:
+            region_writer.write_chunk(chunk_x, chunk_z, chunk)
+
+    region_writer.save()
+
+class BlockEntityIndex:
+    # Finds the block entities and entities of a chunk by coordinates or UUID, building the lookup tables once per list
+
+    def __init__(self, chunk: NBT.NBTFile):
+        self.chunk = chunk
+        self.coordinates: dict[str, dict[tuple[int, int, int], NBT.TAG_Compound]] = {}
+        self.uuids: dict[str, dict[tuple[int, ...], NBT.TAG_Compound]] = {}
+
+    def build(self, list_name: str):
+        coordinates: dict[tuple[int, int, int], NBT.TAG_Compound] = {}
+        uuids: dict[tuple[int, ...], NBT.TAG_Compound] = {}
+        block_entity: NBT.TAG_Compound
+        for block_entity in self.chunk[list_name]:
+            # Keep the first match, like a search through the list would
+            if "UUID" in block_entity and isinstance(block_entity["UUID"], NBT.TAG_Int_Array):
+                uuid = tuple(block_entity["UUID"].value)
+                if uuid not in uuids:
+                    uuids[uuid] = block_entity
+            if "x" in block_entity and "y" in block_entity and "z" in block_entity:
+                coordinate = (block_entity["x"].value, block_entity["y"].value, block_entity["z"].value)
+                if coordinate not in coordinates:
+                    coordinates[coordinate] = block_entity
+        self.coordinates[list_name] = coordinates
+        self.uuids[list_name] = uuids
+
+    def find(self, guide: CommandGuide) -> NBT.TAG_Compound | None:
+        list_name = guide["list"]
+        if list_name not in self.chunk:
+            return None
+        block_entities: NBT.TAG_List = self.chunk[list_name]
+
+        # The block entity is usually still at the same index
+        if guide["index"] < len(block_entities):
+            block_entity: NBT.TAG_Compound = block_entities[guide["index"]]
+            if test_block_entity(guide, block_entity):
+                return block_entity
+
+        if list_name not in self.coordinates:
+            self.build(list_name)
+        if "uuid" in guide:
+            return self.uuids[list_name].get(tuple(guide["uuid"]))
+        return self.coordinates[list_name].get(coord_tuple(guide["coordinates"]))
+
+def write_command(block_entity: NBT.TAG_Compound, guide: CommandGuide, command: str):
+    if guide["tag"] == "sign_edge_case":
+        if command.startswith("data"):
+            sign_nbt: dict[str, dict[str, nbt_tags.TypeList | str | nbt_tags.TypeByte]] = nbt_tags.unpack(command[23:])
+        else:
+            sign_nbt: dict[str, dict[str, nbt_tags.TypeList | str | nbt_tags.TypeByte]] = nbt_tags.unpack(command[14:])
+        for sign_side in sign_nbt:
+            if sign_side not in block_entity:
+                block_entity[sign_side] = NBT.TAG_Compound()
+            for key in sign_nbt[sign_side]:
+                block_entity[sign_side][key] = nbt_tags.convert_to_lib_format(sign_nbt[sign_side][key])
+
+    else:
+        block_entity[guide["tag"]] = NBT.TAG_String(command)
 
 def test_block_entity(guide: CommandGuide, block_entity: NBT.TAG_Compound) -> bool:
     if "uuid" in guide:
@@ -336,8 +424,7 @@ def update_commands(version: int):
     log("Updating command block data")
 
     # Set pack version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Check for errors
     if not (PROGRAM_PATH / "commands_original.mcfunction").exists():
@@ -350,6 +437,24 @@ def update_commands(version: int):
     # Split up the lines
     lines = contents.split("\n")
 
+    # Convert the lines
+    command.reset_cache_stats()
+    workers = option_manager.get_workers()
+    if workers > 1 and len(lines) > UPDATE_BATCH_SIZE:
+        lines = update_lines_parallel(lines, workers)
+    else:
+        lines = update_lines(lines)
+
+    utils.safe_file_write(PROGRAM_PATH / "commands.mcfunction", "\n".join(lines))
+    function_path = MINECRAFT_PATH / "saves" / "Testing World" / "datapacks" / "Test Data Pack" / "data" / "test" / "function"
+    if function_path.exists():
+        utils.safe_file_write(function_path / "commands.mcfunction", "\n".join(lines))
+
+    translation_cache.flush()
+    command.log_cache_stats()
+    log("Command block data updated")
+
+def update_lines(lines: list[str]) -> list[str]:
     # Iterate and convert the lines
     comment_info = cast(CommandGuide, {})
     for line_index in range(len(lines)):
@@ -359,15 +464,19 @@ def update_commands(version: int):
         if not line:
             continue
         if line.startswith("# {"):
-            comment_info = cast(CommandGuide, json.loads(line[2:]))
+            # Only guides with command stats are needed here
+            if '"CommandStats"' in line:
+                comment_info = cast(CommandGuide, json.loads(line[2:]))
+            else:
+                comment_info = cast(CommandGuide, {})
         if line[0] in ["#", " "]:
             continue
 
         # Convert command
-        line = command.update(line, pack_version, "commands.mcfunction")
+        line = command.update(line, pack_version.get(), "commands.mcfunction")
 
         # Apply simplistic stat update
-        if "CommandStats" in comment_info and pack_version >= 800 and pack_version <= 1202:
+        if "CommandStats" in comment_info and pack_version.get() >= 800 and pack_version.get() <= 1202:
             stats_options = option_manager.FIXES["stats_options"]
             if (
                 option_manager.FIXES["stats"] and
@@ -385,17 +494,65 @@ def update_commands(version: int):
                     if key.endswith("Name"):
                         used_stat = key[:-4]
                         break
-                line = command.remove_run_execute(f'execute store result score {target_selectors.update(comment_info["CommandStats"][f"{used_stat}Name"], pack_version, [], True)} {comment_info["CommandStats"][f"{used_stat}Objective"]} run {line}')
+                line = command.remove_run_execute(f'execute store result score {target_selectors.update(comment_info["CommandStats"][f"{used_stat}Name"], pack_version.get(), [], True)} {comment_info["CommandStats"][f"{used_stat}Objective"]} run {line}')
 
         # Write line to list
         lines[line_index] = line
 
-    utils.safe_file_write(PROGRAM_PATH / "commands.mcfunction", "\n".join(lines))
-    function_path = MINECRAFT_PATH / "saves" / "Testing World" / "datapacks" / "Test Data Pack" / "data" / "test" / "function"
-    if function_path.exists():
-        utils.safe_file_write(function_path / "commands.mcfunction", "\n".join(lines))
-
-    log("Command block data updated")
+    return lines
+
+def update_lines_parallel(lines: list[str], workers: int) -> list[str]:
+    log(f" Using {workers} workers")
+
+    # Workers open their own connection to the translation cache
+    translation_cache.close()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=initialize_update_worker,
+        initargs=(pack_version.get(), option_manager.FIXES, defaults.DEBUG_MODE)
+    ) as executor:
+        # Batches are returned in order, so their messages and changes to files are replayed in the same order as a serial run
+        updated_lines: list[str] = []
+        for batch_lines, effects, cache_hits, cache_misses, counters in executor.map(update_lines_worker, get_update_batches(lines)):
+            side_effects.replay(effects)
+            command.cache_hits += cache_hits
+            command.cache_misses += cache_misses
+            update_report.add_counters(counters)
+            updated_lines.extend(batch_lines)
+    return updated_lines
+
+def get_update_batches(lines: list[str]) -> list[list[str]]:
+    # Only split the lines right before a guide, so that every command stays with its guide
+    batches: list[list[str]] = []
+    start = 0
+    for line_index in range(UPDATE_BATCH_SIZE, len(lines)):
+        if line_index - start >= UPDATE_BATCH_SIZE and lines[line_index].startswith("# {"):
+            batches.append(lines[start:line_index])
+            start = line_index
+    batches.append(lines[start:])
+    return batches
+
+def initialize_update_worker(version: int, fixes: dict[str, Any], debug_mode: bool):
+    # Worker processes may not inherit the state of the main process
+    pack_version.set(version)
+    option_manager.FIXES = fixes
+    defaults.DEBUG_MODE = debug_mode
+
+    # Leave messages and changes to shared files for the main process, so that only it creates and logs data packs
+    side_effects.deferred.set(True)
+    log_module.muted.set(True)
+
+def update_lines_worker(lines: list[str]) -> tuple[list[str], list[side_effects.Effect], int, int, dict[str, int]]:
+    cache_hits = command.cache_hits
+    cache_misses = command.cache_misses
+    counters = update_report.get_counters()
+    side_effects.start_recording()
+    try:
+        lines = update_lines(lines)
+    finally:
+        effects = side_effects.stop_recording()
+    translation_cache.flush()
+    return lines, effects, command.cache_hits - cache_hits, command.cache_misses - cache_misses, update_report.get_counter_changes(counters)
 
 
 
@@ -421,8 +578,7 @@ def extract_commands(world: Path):
         dimension = "region"
 
 
-    command_data = compile_command_data("commands.mcfunction")
-    og_command_data = compile_command_data("commands_original.mcfunction")
+    command_lookup = CommandLookup("commands.mcfunction")
 
 
     extracted_commands: list[str] = []
@@ -432,12 +588,11 @@ def extract_commands(world: Path):
     init_bool = False
     guide = cast(CommandGuide, {"region": "", "chunk_x": None, "chunk_z": None})
     region_file = None
-    chunk = NBT.NBTFile()
+    block_states = ChunkBlockStates(NBT.NBTFile())
     for i in range(1000):
-        if (x,y,z) in command_data[dimension]:
-            extracted_commands.append(command_data[dimension][(x,y,z)]["command"])
-            # command_data[dimension][(x,y,z)]["command"] = "#" + command_data[dimension][(x,y,z)]["command"]
-            # og_command_data[dimension][(x,y,z)]["command"] = "#" + og_command_data[dimension][(x,y,z)]["command"]
+        extracted_command = command_lookup.get_command(dimension, (x,y,z))
+        if extracted_command is not None:
+            extracted_commands.append(extracted_command)
 
         previous_guide = guide.copy()
         guide = {"region": f'{dimension}/r.{x//512}.{z//512}.mca', "chunk_x": x//16%32, "chunk_z": z//16%32}
@@ -448,9 +603,9 @@ def extract_commands(world: Path):
             region_file = region.RegionFile(world / guide["region"])
 
         if chunk_change and region_file:
-            chunk: NBT.NBTFile = region_file.get_nbt(guide["chunk_x"], guide["chunk_z"])
+            block_states = ChunkBlockStates(region_file.get_nbt(guide["chunk_x"], guide["chunk_z"]))
 
-        block_data = fix_world.get_block_data(chunk, x, y, z)
+        block_data = block_states.get_block_data(x, y, z)
         if (
             block_data["Name"].value not in ["minecraft:command_block", "minecraft:chain_command_block", "minecraft:repeating_command_block"] or
             "Properties" not in block_data or
@@ -475,26 +630,61 @@ def extract_commands(world: Path):
 
         init_bool = True
 
+    command_lookup.close()
     utils.safe_file_write(PROGRAM_PATH / "command_chain.mcfunction", "\n".join(extracted_commands))
 
     log("Command block chain extracted")
 
 
 
-def compile_command_data(source: str) -> dict[str, dict[tuple[int, int, int], CommandGuide]]:
-    commands = utils.safe_file_read(PROGRAM_PATH / source).split("\n")
+class CommandLookup:
+    # Finds the command at a position using the command index, and only parses the whole file if the index is unusable
+
+    def __init__(self, source: str):
+        self.source = source
+        self.commands = utils.safe_file_read(PROGRAM_PATH / source).split("\n")
+        self.index = CommandIndex(len(self.commands))
+        self.command_data: dict[str, dict[tuple[int, int, int], CommandGuide]] | None = None
+
+    def get_command(self, folder: str, coordinates: tuple[int, int, int]) -> str | None:
+        if self.command_data is None:
+            if not self.index.connection:
+                self.command_data = compile_command_data(self.source, self.commands)
+            else:
+                match = self.index.find_line(folder, coordinates)
+                if match is None:
+                    return None
+                line_number, guide_line = match
+                if line_number + 1 < len(self.commands) and self.commands[line_number] == guide_line:
+                    return self.commands[line_number + 1]
+                log(f"WARNING: {self.source} was edited since it was read, parsing it instead")
+                self.command_data = compile_command_data(self.source, self.commands)
+
+        if coordinates in self.command_data.get(folder, {}) and "command" in self.command_data[folder][coordinates]:
+            return self.command_data[folder][coordinates]["command"]
+        return None
+
+    def close(self):
+        self.index.close()
+
+def compile_command_data(source: str, commands: list[str] | None = None) -> dict[str, dict[tuple[int, int, int], CommandGuide]]:
+    if commands is None:
+        commands = utils.safe_file_read(PROGRAM_PATH / source).split("\n")
+    index = CommandIndex(len(commands))
+    guides = index.get_guides()
+    index.close()
 
     command_data: dict[str, dict[tuple[int, int, int], CommandGuide]] = {}
     guide = cast(CommandGuide, {"coordinates": "", "region": "", "chunk_x": None, "chunk_z": None, "list": None, "index": None, "tag": None})
     region_key = "region"
     coordinate_key = (0,0,0)
-    for command in commands:
+    for line_number, command in enumerate(commands):
         if not command:
             continue
 
         if command.startswith("# {"):
-            guide = cast(CommandGuide, json.loads(command[2:]))
-            region_key = "/".join(guide["region"].split("/")[:-1])
+            guide = cast(CommandGuide, command_index.get_guide(guides, line_number, command))
+            region_key = command_index.get_folder(guide["region"])
             coordinate_key = coord_tuple(guide["coordinates"])
             if region_key not in command_data:
                 command_data[region_key] = {}
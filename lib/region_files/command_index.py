@@ -0,0 +1,159 @@
+# Easy Map Updater
+# Copyright (C) 2024  Jesse Spicer, and StickyPiston Hosting
+
+
+
+# Import things
+
+import os
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any
+from lib.log import log
+
+
+
+# Initialize variables
+
+PROGRAM_PATH = Path(__file__).parent.parent.parent
+INDEX_PATH = PROGRAM_PATH / "commands_index.db"
+INDEX_VERSION = 1
+
+
+
+# Define functions
+
+def get_folder(region_path: str) -> str:
+    return "/".join(region_path.split("/")[:-1])
+
+def get_guide(guides: dict[int, tuple[str, dict[str, Any]]], line_number: int, line: str) -> dict[str, Any]:
+    # Use the indexed guide if the line wasn't edited since it was read, otherwise parse it
+    if line_number in guides:
+        guide_line, guide = guides[line_number]
+        if guide_line == line:
+            return guide
+    return json.loads(line[2:])
+
+
+
+class CommandIndexWriter:
+    # Records where each guide line of commands.mcfunction came from while the commands are being read.
+    # The index is written to a temporary file which is swapped in once reading is done.
+
+    def __init__(self):
+        self.path = INDEX_PATH.parent / f"{INDEX_PATH.name}.tmp"
+        if self.path.exists():
+            self.path.unlink()
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript("""
+            CREATE TABLE info (key TEXT PRIMARY KEY, value INTEGER);
+            CREATE TABLE guides (
+                line INTEGER PRIMARY KEY,
+                guide_line TEXT,
+                region TEXT,
+                folder TEXT,
+                chunk_x INTEGER,
+                chunk_z INTEGER,
+                list TEXT,
+                list_index INTEGER,
+                tag TEXT,
+                x INTEGER,
+                y INTEGER,
+                z INTEGER,
+                uuid TEXT,
+                stats TEXT
+            );
+        """)
+        self.rows: list[tuple] = []
+
+    def add(self, line_number: int, guide_line: str, guide: dict[str, Any]):
+        x, y, z = [int(value) for value in guide["coordinates"].split(" ")]
+        self.rows.append((
+            line_number,
+            guide_line,
+            guide["region"],
+            get_folder(guide["region"]),
+            guide["chunk_x"],
+            guide["chunk_z"],
+            guide["list"],
+            guide["index"],
+            guide["tag"],
+            x, y, z,
+            json.dumps(guide["uuid"]) if "uuid" in guide else None,
+            json.dumps(guide["CommandStats"]) if "CommandStats" in guide else None
+        ))
+        if len(self.rows) >= 10000:
+            self.flush()
+
+    def flush(self):
+        self.connection.executemany("INSERT INTO guides VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)", self.rows)
+        self.rows = []
+
+    def close(self, line_count: int):
+        self.flush()
+        self.connection.execute("CREATE INDEX guide_positions ON guides (folder, x, y, z)")
+        self.connection.executemany("INSERT INTO info VALUES (?,?)", [
+            ("version", INDEX_VERSION),
+            ("line_count", line_count),
+        ])
+        self.connection.commit()
+        self.connection.close()
+        os.replace(self.path, INDEX_PATH)
+
+
+
+class CommandIndex:
+    # Looks up guides from the index instead of parsing them out of commands.mcfunction.
+    # The index is only used if it matches the number of lines in the file, and each guide it returns
+    # is checked against the line in the file, so edits to the file fall back on parsing the guide.
+
+    def __init__(self, line_count: int):
+        self.connection: sqlite3.Connection | None = None
+        if not INDEX_PATH.exists():
+            return
+        try:
+            connection = sqlite3.connect(INDEX_PATH)
+            info = dict(connection.execute("SELECT key, value FROM info").fetchall())
+        except:
+            log("WARNING: commands_index.db could not be read, parsing commands.mcfunction instead")
+            return
+        if info.get("version") != INDEX_VERSION or info.get("line_count") != line_count:
+            connection.close()
+            return
+        self.connection = connection
+
+    def get_guides(self) -> dict[int, tuple[str, dict[str, Any]]]:
+        guides: dict[int, tuple[str, dict[str, Any]]] = {}
+        if not self.connection:
+            return guides
+        for line_number, guide_line, region_path, folder, chunk_x, chunk_z, list_name, index, tag, x, y, z, uuid, stats in self.connection.execute("SELECT * FROM guides"):
+            guide: dict[str, Any] = {
+                "coordinates": f"{x} {y} {z}",
+                "region": region_path,
+                "chunk_x": chunk_x,
+                "chunk_z": chunk_z,
+                "list": list_name,
+                "index": index,
+                "tag": tag
+            }
+            if uuid is not None:
+                guide["uuid"] = json.loads(uuid)
+            if stats is not None:
+                guide["CommandStats"] = json.loads(stats)
+            guides[line_number] = (guide_line, guide)
+        return guides
+
+    def find_line(self, folder: str, coordinates: tuple[int, int, int]) -> tuple[int, str] | None:
+        # Later guides take priority over earlier ones at the same position
+        if not self.connection:
+            return None
+        return self.connection.execute(
+            "SELECT line, guide_line FROM guides WHERE folder = ? AND x = ? AND y = ? AND z = ? ORDER BY line DESC LIMIT 1",
+            (folder, *coordinates)
+        ).fetchone()
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
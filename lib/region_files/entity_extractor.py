@@ -11,6 +11,7 @@ from nbt import nbt as NBT
 from nbt import region
 from lib import defaults
 from lib.log import log
+from lib.region_files.region_writer import RegionWriter
 
 
 
@@ -61,7 +62,8 @@ def extract_from_region(world: Path, region_file_path: Path, entities_folder_pat
     
     opened_entity_file = False
     region_file = region.RegionFile(region_file_path)
-    entity_file = None
+    region_writer = RegionWriter(region_file)
+    entity_writer = None
     for chunk_metadata in cast(list[region.ChunkMetadata], region_file.get_metadata()):
         if defaults.DEBUG_MODE:
             log(f"Extracting {chunk_metadata.x}, {chunk_metadata.z}")
@@ -76,7 +78,7 @@ def extract_from_region(world: Path, region_file_path: Path, entities_folder_pat
         entities: NBT.TAG_List = region_chunk["entities"]
         if entities == None or len(entities) == 0:
             del region_chunk["entities"]
-            region_file.write_chunk(chunk_metadata.x, chunk_metadata.z, region_chunk)
+            region_writer.write_chunk(chunk_metadata.x, chunk_metadata.z, region_chunk)
             continue
         entity_list = region_chunk["entities"]
         del region_chunk["entities"]
@@ -91,12 +93,12 @@ def extract_from_region(world: Path, region_file_path: Path, entities_folder_pat
         # Open region file if it hasn't been opened yet
         if not opened_entity_file:
             opened_entity_file = True
-            entity_file = region.RegionFile(entity_file_path)
+            entity_writer = RegionWriter(region.RegionFile(entity_file_path))
 
         # Open entity chunk, create it if it doesn't exist
         try:
-            if entity_file:
-                entity_chunk = entity_file.get_nbt(chunk_metadata.x, chunk_metadata.z)
+            if entity_writer:
+                entity_chunk = entity_writer.get_nbt(chunk_metadata.x, chunk_metadata.z)
                 if not entity_chunk:
                     raise
             else:
@@ -114,6 +116,11 @@ def extract_from_region(world: Path, region_file_path: Path, entities_folder_pat
             entity_chunk["Entities"].extend(entity_list)
 
         # Save chunks
-        region_file.write_chunk(chunk_metadata.x, chunk_metadata.z, region_chunk)
-        if entity_file:
-            entity_file.write_chunk(chunk_metadata.x, chunk_metadata.z, entity_chunk)
\ No newline at end of file
+        region_writer.write_chunk(chunk_metadata.x, chunk_metadata.z, region_chunk)
+        if entity_writer:
+            entity_writer.write_chunk(chunk_metadata.x, chunk_metadata.z, entity_chunk)
+
+    # Write region files
+    region_writer.save()
+    if entity_writer:
+        entity_writer.save()
\ No newline at end of file
@@ -5,9 +5,9 @@
 
 # Import things
 
-import math
 from pathlib import Path
 from typing import cast, Any, TypedDict
+from contextvars import ContextVar
 from nbt import nbt as NBT
 from nbt import region
 from lib import defaults
@@ -24,6 +24,11 @@ from lib.data_pack_files import miscellaneous
 from lib.data_pack_files.restore_behavior import spawner_bossbar
 from lib.data_pack_files.restore_behavior import spawner_position
 from lib.region_files import structure
+from lib.region_files import world_traversal
+from lib.region_files import region_manifest
+from lib.region_files.world_traversal import ChunkVisitor, RegionTask
+from lib.region_files.region_writer import RegionWriter
+from lib.region_files.block_states import ChunkBlockStates
 
 
 
@@ -31,7 +36,7 @@ from lib.region_files import structure
 
 PROGRAM_PATH = Path(__file__).parent.parent.parent
 DATA_VERSION = defaults.DATA_VERSION
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 spawner_bossbar_list = NBT.TAG_List(type=NBT.TAG_Compound)
 spawner_position_list: list[str] = []
 uuid_dict: dict[str, str] = {}
@@ -46,32 +51,25 @@ flags: FixWorldFlags = {
     "locked_containers": False,
 }
 
+class RegionResults(TypedDict):
+    spawner_bossbar_list: NBT.TAG_List
+    spawner_position_list: list[str]
+    uuid_dict: dict[str, str]
+    uuid_list: list[str]
+    flags: FixWorldFlags
+
 
 
 # Define functions
 
-def fix(world: Path, source_world: Path, version: int, get_confirmation: bool) -> FixWorldFlags:
+def fix(world: Path, source_world: Path, version: int, get_confirmation: bool, visitors: list[ChunkVisitor] = []) -> FixWorldFlags:
     log("Fixing world data")
 
     # Set pack version
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Reset globals values
-    global spawner_bossbar_list
-    global spawner_position_list
-    global uuid_dict
-    global uuid_list
-    global flags
-
-    spawner_bossbar_list = NBT.TAG_List(type=NBT.TAG_Compound)
-    spawner_position_list = []
-    uuid_dict = {}
-    uuid_list = []
-    flags = {
-        "spawner_bossbar": False,
-        "locked_containers": False,
-    }
+    reset_results()
 
     # Check for errors
     if not world.exists():
@@ -93,23 +91,9 @@ def fix(world: Path, source_world: Path, version: int, get_confirmation: bool) -
     global TIME
     TIME = get_time(world)
     
-    # Iterate through region files
+    # Iterate through region files, other visitors see the chunks after they were fixed
     log("Fixing regions")
-    fix_region_folder(world /           "region"  , source_world /           "region", "minecraft:overworld" )
-    fix_entity_folder(world /           "entities", source_world /           "region", "minecraft:overworld" )
-    fix_region_folder(world / "DIM-1" / "region"  , source_world / "DIM-1" / "region", "minecraft:the_nether")
-    fix_entity_folder(world / "DIM-1" / "entities", source_world / "DIM-1" / "region", "minecraft:the_nether")
-    fix_region_folder(world / "DIM1"  / "region"  , source_world / "DIM1"  / "region", "minecraft:the_end"   )
-    fix_entity_folder(world / "DIM1"  / "entities", source_world / "DIM1"  / "region", "minecraft:the_end"   )
-    dimensions = world / "dimensions"
-    source_dimensions = source_world / "dimensions"
-    if dimensions.exists():
-        for dimension_namespace in dimensions.iterdir():
-            source_dimension_namespace = source_dimensions / dimension_namespace.name
-            for dimension in dimension_namespace.iterdir():
-                source_dimension = source_dimension_namespace / dimension.name
-                fix_region_folder(dimension / "region", source_dimension / "region", "custom")
-                fix_entity_folder(dimension / "entities", source_dimension / "entities", "custom")
+    world_traversal.traverse(world, [WorldFixer(world, source_world, pack_version.get(), TIME)] + visitors)
 
     # Fix structures
     log("Fixing structures")
@@ -160,171 +144,394 @@ def get_time(world: Path) -> int:
 
 
 
-def fix_region_folder(folder_path: Path, source_folder_path: Path, dimension: str):
-    if not folder_path.exists():
-        return
+def reset_results():
+    global spawner_bossbar_list
+    global spawner_position_list
+    global uuid_dict
+    global uuid_list
+    global flags
 
-    for file_path in folder_path.iterdir():
-        fix_region_file(file_path, source_folder_path / file_path.name, dimension)
+    spawner_bossbar_list = NBT.TAG_List(type=NBT.TAG_Compound)
+    spawner_position_list = []
+    uuid_dict = {}
+    uuid_list = []
+    flags = {
+        "spawner_bossbar": False,
+        "locked_containers": False,
+    }
 
-def fix_region_file(file_path: Path, source_file_path: Path, dimension: str):
-    log(f" Fixing region/{file_path.name}")
+def get_results() -> RegionResults:
+    return {
+        "spawner_bossbar_list": spawner_bossbar_list,
+        "spawner_position_list": spawner_position_list,
+        "uuid_dict": uuid_dict,
+        "uuid_list": uuid_list,
+        "flags": flags,
+    }
 
+def set_results(results: RegionResults):
     global spawner_bossbar_list
+    global spawner_position_list
+    global uuid_dict
+    global uuid_list
+    global flags
+
+    spawner_bossbar_list = results["spawner_bossbar_list"]
+    spawner_position_list = results["spawner_position_list"]
+    uuid_dict = results["uuid_dict"]
+    uuid_list = results["uuid_list"]
+    flags = results["flags"]
+
+def results_to_json(results: RegionResults) -> dict[str, Any]:
+    return {
+        "spawner_bossbar_list": [nbt_tags.pack(nbt_tags.convert_from_lib_format(spawner)) for spawner in results["spawner_bossbar_list"]],
+        "spawner_position_list": results["spawner_position_list"],
+        "uuid_dict": results["uuid_dict"],
+        "uuid_list": results["uuid_list"],
+        "flags": results["flags"],
+    }
+
+def results_from_json(data: dict[str, Any]) -> RegionResults:
+    spawners = NBT.TAG_List(type=NBT.TAG_Compound)
+    for spawner in data["spawner_bossbar_list"]:
+        spawners.append(nbt_tags.convert_to_lib_format(nbt_tags.unpack(spawner)))
+    return {
+        "spawner_bossbar_list": spawners,
+        "spawner_position_list": data["spawner_position_list"],
+        "uuid_dict": data["uuid_dict"],
+        "uuid_list": data["uuid_list"],
+        "flags": data["flags"],
+    }
+
+def get_options_fingerprint(version: int) -> str:
+    return region_manifest.get_fingerprint({
+        "version": version,
+        "fixes": option_manager.FIXES,
+    })
+
+
+
+class WorldFixer(ChunkVisitor):
+    # Fixes the block entities and entities of every chunk in the world.
+    # The module results only hold those of the current file, the results of the whole world are merged into the fixer.
+
+    mutates = True
+
+    def __init__(self, world: Path, source_world: Path, version: int, time: int):
+        self.world = world
+        self.source_world = source_world
+        self.version = version
+        self.time = time
+        self.source_region_file: SourceRegionFile | None = None
+        self.results = get_results()
+        self.known_uuids: set[str] = set(uuid_list)
+        self.manifest = region_manifest.RegionManifest(world, get_options_fingerprint(version))
+        self.in_worker = False
+
+    def prepare_worker(self):
+        global TIME
+        pack_version.set(self.version)
+        TIME = self.time
+        self.in_worker = True
+
+    def begin_file(self, task: RegionTask) -> bool:
+        log(f' Fixing {task["folder"]}/{task["file_path"].name}')
+        reset_results()
+
+        # Skip files that haven't changed since they were fixed with the same options
+        stored_results = self.manifest.get_results(task["file_path"])
+        if stored_results is not None:
+            log("  Unchanged since the last fix, skipping")
+            set_results(results_from_json(stored_results))
+            if not self.in_worker:
+                self.merge_file(task, get_results())
+            return False
+
+        if task["folder"] != "region":
+            return True
+        source_file_path = self.source_world / task["file_path"].relative_to(self.world)
+        if not source_file_path.exists():
+            return False
+        self.source_region_file = SourceRegionFile(source_file_path)
+        return True
+
+    def visit_chunk(self, task: RegionTask, x: int, z: int, chunk: NBT.NBTFile):
+        if task["folder"] == "region":
+            if self.source_region_file:
+                fix_region_chunk(chunk, self.source_region_file, x, z, task["dimension"])
+        else:
+            fix_entity_chunk(chunk)
+
+    def end_file(self, task: RegionTask) -> bool:
+        self.source_region_file = None
+        if not self.in_worker:
+            return self.merge_file(task, get_results())
+        return False
+
+    def reset_results(self):
+        reset_results()
+
+    def get_results(self) -> RegionResults:
+        return get_results()
+
+    def merge_results(self, task: RegionTask, results: RegionResults) -> bool:
+        return self.merge_file(task, results)
+
+    def merge_file(self, task: RegionTask, results: RegionResults) -> bool:
+        modified = merge_results(self.results, task, results, self.known_uuids)
+        self.manifest.record(task["file_path"], results_to_json(results))
+        return modified
+
+    def finish(self):
+        set_results(self.results)
+        self.manifest.save()
+
+def merge_results(target: RegionResults, task: RegionTask, results: RegionResults, known_uuids: set[str]) -> bool:
+    for spawner in results["spawner_bossbar_list"]:
+        target["spawner_bossbar_list"].append(spawner)
+
+    for command in results["spawner_position_list"]:
+        if command not in target["spawner_position_list"]:
+            target["spawner_position_list"].append(command)
+
+    for key in results["uuid_dict"]:
+        target["uuid_dict"][key] = results["uuid_dict"][key]
+
+    # Entities which share a UUID with an entity from an earlier region need a new one
+    duplicate_uuids: set[str] = set()
+    file_uuids: list[str] = []
+    for uuid in results["uuid_list"]:
+        if uuid in known_uuids:
+            duplicate_uuids.add(uuid)
+            continue
+        known_uuids.add(uuid)
+        file_uuids.append(uuid)
+    modified = False
+    if duplicate_uuids:
+        fix_duplicate_uuids(task["file_path"], duplicate_uuids, known_uuids, file_uuids)
+        modified = True
+    target["uuid_list"].extend(file_uuids)
+    results["uuid_list"] = file_uuids
+
+    if results["flags"]["locked_containers"]:
+        target["flags"]["locked_containers"] = True
+
+    return modified
+
+def fix_duplicate_uuids(file_path: Path, duplicate_uuids: set[str], known_uuids: set[str], file_uuids: list[str]):
+    log(f" Fixing duplicate UUIDs in {file_path.parent.name}/{file_path.name}")
 
     try:
         region_file = region.RegionFile(file_path)
-        source_region_file = region.RegionFile(source_file_path)
     except:
         return
+    region_writer = RegionWriter(region_file)
     for chunk_metadata in cast(list[region.ChunkMetadata], region_file.get_metadata()):
+        if not duplicate_uuids:
+            break
         try:
             chunk = region_file.get_nbt(chunk_metadata.x, chunk_metadata.z)
         except:
             continue
-        try:
-            source_chunk = source_region_file.get_nbt(chunk_metadata.x, chunk_metadata.z)
-        except:
-            source_chunk = chunk
-        if not chunk or not source_chunk:
-            continue
-        if "block_entities" not in chunk:
+        if not chunk:
             continue
-        if defaults.DEBUG_MODE:
-            print(f"  Fixing chunk {chunk_metadata.x}, {chunk_metadata.z}")
-        chunk["DataVersion"] = NBT.TAG_Int(defaults.DATA_VERSION)
-        block_entities: NBT.TAG_List = chunk["block_entities"]
-        if block_entities == None or len(block_entities) == 0:
+        if replace_duplicate_uuids(chunk, duplicate_uuids, known_uuids, file_uuids):
+            region_writer.write_chunk(chunk_metadata.x, chunk_metadata.z, chunk)
+    region_writer.save()
+
+def replace_duplicate_uuids(chunk: NBT.NBTFile, duplicate_uuids: set[str], known_uuids: set[str], file_uuids: list[str]) -> bool:
+    # Only entities and their passengers are in the UUID list, other UUIDs in the chunk refer to them
+    if "Entities" not in chunk:
+        return False
+    modified = False
+    for entity in chunk["Entities"]:
+        if replace_duplicate_entity_uuids(entity, duplicate_uuids, known_uuids, file_uuids):
+            modified = True
+    return modified
+
+def replace_duplicate_entity_uuids(entity: NBT.TAG_Compound, duplicate_uuids: set[str], known_uuids: set[str], file_uuids: list[str]) -> bool:
+    modified = False
+    if "UUID" in entity and isinstance(entity["UUID"], NBT.TAG_Int_Array):
+        uuid = utils.uuid_from_int_array(entity["UUID"].value)
+        if uuid in duplicate_uuids:
+            duplicate_uuids.remove(uuid)
+            new_uuid = utils.new_uuid()
+            entity["UUID"].value = new_uuid
+            uuid = utils.uuid_from_int_array(new_uuid)
+            known_uuids.add(uuid)
+            file_uuids.append(uuid)
+            modified = True
+    if "Passengers" in entity:
+        for passenger in entity["Passengers"]:
+            if replace_duplicate_entity_uuids(passenger, duplicate_uuids, known_uuids, file_uuids):
+                modified = True
+    return modified
+
+def fix_region_chunk(chunk: NBT.NBTFile, source_region_file: "SourceRegionFile", chunk_x: int, chunk_z: int, dimension: str):
+    global spawner_bossbar_list
+
+    if "block_entities" not in chunk:
+        return
+    if defaults.DEBUG_MODE:
+        print(f"  Fixing chunk {chunk_x}, {chunk_z}")
+    block_entities: NBT.TAG_List = chunk["block_entities"]
+    if block_entities == None or len(block_entities) == 0:
+        return
+    chunk["DataVersion"] = NBT.TAG_Int(defaults.DATA_VERSION)
+
+    # chunk["Status"] = NBT.TAG_String("minecraft:full")
+    # if "hasLegacyStructureData" in chunk:
+    #     del chunk["hasLegacyStructureData"]
+    # if "LightPopulated" in chunk:
+    #     chunk["isLightOn"] = NBT.TAG_Byte(chunk["LightPopulated"].value)
+    #     del chunk["LightPopulated"]
+    # if "TerrainPopulated" in chunk:
+    #     del chunk["TerrainPopulated"]
+    # if "V" in chunk:
+    #     del chunk["V"]
+    # if "yPos" not in chunk:
+    #     chunk["yPos"] = NBT.TAG_Int(-4)
+    # if "HeightMap" in chunk:
+    #     del chunk["HeightMap"]
+
+    # Get list of scheduled command blocks
+    scheduled_blocks = get_block_ticks(chunk, source_region_file, chunk_x, chunk_z)
+    block_states = ChunkBlockStates(chunk)
+
+    # Iterate through block entities
+    block_entity: NBT.TAG_Compound
+    for block_entity in block_entities:
+        if "id" not in block_entity:
             continue
+        if "keepPacked" not in block_entity:
+            block_entity["keepPacked"] = NBT.TAG_Byte(0)
+        if "CommandStats" in block_entity and not option_manager.FIXES["stats"]:
+            log("WARNING: Stats fixer not enabled but stats have been found!")
+
+        fix_block_entity(block_entity)
+
+        if block_entity["id"].value == "minecraft:command_block":
+
+            if "LastOutput" in block_entity:
+                try:
+                    block_entity["LastOutput"] = json_text_component.update_from_lib_format(block_entity["LastOutput"], pack_version.get(), [], False)
+                except Exception:
+                    log(f"ERROR: An error occurred while updating a JSON text component: {block_entity["LastOutput"].value}")
+                    utils.log_error()
+
+            if "auto" not in block_entity:
+                block_entity["auto"] = NBT.TAG_Byte(0)
+            if "conditionMet" not in block_entity:
+                block_entity["conditionMet"] = NBT.TAG_Byte(1)
+            if "LastExecution" not in block_entity:
+                block_entity["LastExecution"] = NBT.TAG_Long(TIME)
+            if "UpdateLastExecution" not in block_entity:
+                block_entity["UpdateLastExecution"] = NBT.TAG_Byte(1)
+
+            if "powered" not in block_entity:
+                block_entity["powered"] = NBT.TAG_Byte(0)
+                if (
+                    "x" in block_entity and
+                    "y" in block_entity and
+                    "z" in block_entity
+                ):
+                    if (
+                        block_entity["x"].value,
+                        block_entity["y"].value,
+                        block_entity["z"].value
+                    ) in scheduled_blocks:
+                        block_entity["powered"] = NBT.TAG_Byte(1)
 
-        # chunk["Status"] = NBT.TAG_String("minecraft:full")
-        # if "hasLegacyStructureData" in chunk:
-        #     del chunk["hasLegacyStructureData"]
-        # if "LightPopulated" in chunk:
-        #     chunk["isLightOn"] = NBT.TAG_Byte(chunk["LightPopulated"].value)
-        #     del chunk["LightPopulated"]
-        # if "TerrainPopulated" in chunk:
-        #     del chunk["TerrainPopulated"]
-        # if "V" in chunk:
-        #     del chunk["V"]
-        # if "yPos" not in chunk:
-        #     chunk["yPos"] = NBT.TAG_Int(-4)
-        # if "HeightMap" in chunk:
-        #     del chunk["HeightMap"]
-
-        # Get list of scheduled command blocks
-        scheduled_blocks = get_block_ticks(chunk, source_chunk)
-
-        # Iterate through block entities
-        block_entity: NBT.TAG_Compound
-        for block_entity in block_entities:
-            if "id" not in block_entity:
-                continue
-            if "keepPacked" not in block_entity:
-                block_entity["keepPacked"] = NBT.TAG_Byte(0)
-            if "CommandStats" in block_entity and not option_manager.FIXES["stats"]:
-                log("WARNING: Stats fixer not enabled but stats have been found!")
-
-            fix_block_entity(block_entity)
-
-            if block_entity["id"].value == "minecraft:command_block":
-
-                if "LastOutput" in block_entity:
-                    try:
-                        block_entity["LastOutput"] = json_text_component.update_from_lib_format(block_entity["LastOutput"], pack_version, [], False)
-                    except Exception:
-                        log(f"ERROR: An error occurred while updating a JSON text component: {block_entity["LastOutput"].value}")
-                        utils.log_error()
-
-                if "auto" not in block_entity:
-                    block_entity["auto"] = NBT.TAG_Byte(0)
-                if "conditionMet" not in block_entity:
-                    block_entity["conditionMet"] = NBT.TAG_Byte(1)
-                if "LastExecution" not in block_entity:
-                    block_entity["LastExecution"] = NBT.TAG_Long(TIME)
-                if "UpdateLastExecution" not in block_entity:
-                    block_entity["UpdateLastExecution"] = NBT.TAG_Byte(1)
-
-                if "powered" not in block_entity:
-                    block_entity["powered"] = NBT.TAG_Byte(0)
+                    block_data = block_states.get_block_data(block_entity["x"].value, block_entity["y"].value, block_entity["z"].value)
                     if (
-                        "x" in block_entity and
-                        "y" in block_entity and
-                        "z" in block_entity
+                        pack_version.get() <= 809 and
+                        block_data["Name"].value == "minecraft:command_block" and
+                        "Properties" in block_data and
+                        "facing" in block_data["Properties"] and
+                        block_data["Properties"]["facing"].value == "up"
                     ):
-                        if (
-                            block_entity["x"].value,
-                            block_entity["y"].value,
-                            block_entity["z"].value
-                        ) in scheduled_blocks:
-                            block_entity["powered"] = NBT.TAG_Byte(1)
-
-                        block_data = get_block_data(chunk, block_entity["x"].value, block_entity["y"].value, block_entity["z"].value)
-                        if (
-                            pack_version <= 809 and
-                            block_data["Name"].value == "minecraft:command_block" and
-                            "Properties" in block_data and
-                            "facing" in block_data["Properties"] and
-                            block_data["Properties"]["facing"].value == "up"
-                        ):
-                            block_entity["powered"] = NBT.TAG_Byte(1)
-
-            if block_entity["id"].value == "minecraft:mob_spawner":
-
-                if "SpawnData" in block_entity:
-                    if "entity" in block_entity["SpawnData"]:
-                        entity = block_entity["SpawnData"]["entity"]
-
-                        if (
-                            "id" in entity and
-                            entity["id"].value in ["minecraft:wither", "minecraft:ender_dragon"] and
-                            pack_version <= 809
-                        ):
-                            spawner = NBT.TAG_Compound()
-                            spawner["x"] = NBT.TAG_Int(0)
-                            spawner["y"] = NBT.TAG_Int(0)
-                            spawner["z"] = NBT.TAG_Int(0)
-                            spawner["Dimension"] = NBT.TAG_String(dimension)
-                            spawner["UUID"] = NBT.TAG_Int_Array(name="UUID")
-                            spawner["UUID"].value = [0,0,0,0]
-
-                            if "x" in block_entity:
-                                spawner["x"] = block_entity["x"]
-                            if "y" in block_entity:
-                                spawner["y"] = block_entity["y"]
-                            if "z" in block_entity:
-                                spawner["z"] = block_entity["z"]
-
-                            spawner_bossbar_list.append(spawner)
-
-                        fix_spawner_entity(entity)
+                        block_entity["powered"] = NBT.TAG_Byte(1)
 
-                if "SpawnPotentials" in block_entity:
-                    for spawn_potential in block_entity["SpawnPotentials"]:
-                        if "data" in spawn_potential and "entity" in spawn_potential["data"]:
-                            entity = spawn_potential["data"]["entity"]
+        if block_entity["id"].value == "minecraft:mob_spawner":
 
-                            fix_spawner_entity(entity)
+            if "SpawnData" in block_entity:
+                if "entity" in block_entity["SpawnData"]:
+                    entity = block_entity["SpawnData"]["entity"]
 
-            if block_entity["id"].value == "minecraft:sign":
-                for i in range(1,5):
-                    key = f'Text{i}'
-                    if key in block_entity:
-                        del block_entity[key]
+                    if (
+                        "id" in entity and
+                        entity["id"].value in ["minecraft:wither", "minecraft:ender_dragon"] and
+                        pack_version.get() <= 809
+                    ):
+                        spawner = NBT.TAG_Compound()
+                        spawner["x"] = NBT.TAG_Int(0)
+                        spawner["y"] = NBT.TAG_Int(0)
+                        spawner["z"] = NBT.TAG_Int(0)
+                        spawner["Dimension"] = NBT.TAG_String(dimension)
+                        spawner["UUID"] = NBT.TAG_Int_Array(name="UUID")
+                        spawner["UUID"].value = [0,0,0,0]
+
+                        if "x" in block_entity:
+                            spawner["x"] = block_entity["x"]
+                        if "y" in block_entity:
+                            spawner["y"] = block_entity["y"]
+                        if "z" in block_entity:
+                            spawner["z"] = block_entity["z"]
+
+                        spawner_bossbar_list.append(spawner)
+
+                    fix_spawner_entity(entity)
+
+            if "SpawnPotentials" in block_entity:
+                for spawn_potential in block_entity["SpawnPotentials"]:
+                    if "data" in spawn_potential and "entity" in spawn_potential["data"]:
+                        entity = spawn_potential["data"]["entity"]
 
-                if "is_waxed" not in block_entity:
-                    block_entity["is_waxed"] = NBT.TAG_Byte(1)
+                        fix_spawner_entity(entity)
 
-        # Save chunk
-        region_file.write_chunk(chunk_metadata.x, chunk_metadata.z, chunk)
+        if block_entity["id"].value == "minecraft:sign":
+            for i in range(1,5):
+                key = f'Text{i}'
+                if key in block_entity:
+                    del block_entity[key]
+
+            if "is_waxed" not in block_entity:
+                block_entity["is_waxed"] = NBT.TAG_Byte(1)
+
+class SourceRegionFile:
+    # Opens the source region file and decodes its chunks only once they are needed
+
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+        self.region_file: region.RegionFile | None = None
+        self.opened = False
+
+    def get_nbt(self, chunk_x: int, chunk_z: int) -> NBT.NBTFile | None:
+        if not self.opened:
+            self.opened = True
+            try:
+                self.region_file = region.RegionFile(self.file_path)
+            except:
+                self.region_file = None
+        if not self.region_file:
+            return None
+        try:
+            return self.region_file.get_nbt(chunk_x, chunk_z)
+        except:
+            return None
 
-def get_block_ticks(chunk: NBT.NBTFile, source_chunk: NBT.NBTFile) -> list[tuple[int, int, int]]:
+def get_block_ticks(chunk: NBT.NBTFile, source_region_file: SourceRegionFile, chunk_x: int, chunk_z: int) -> list[tuple[int, int, int]]:
     scheduled_blocks: list[tuple[int, int, int]] = []
     if "block_ticks" not in chunk:
         return scheduled_blocks
     block_ticks = cast(NBT.TAG_List, chunk["block_ticks"])
     if block_ticks == None or len(block_ticks) == 0:
         return scheduled_blocks
+
+    # Only decode the source chunk when there are block ticks to compare against
+    source_chunk = source_region_file.get_nbt(chunk_x, chunk_z)
+    if not source_chunk:
+        source_chunk = chunk
     
     if "block_ticks" in source_chunk:
         source_block_ticks = cast(NBT.TAG_List, source_chunk["block_ticks"])
@@ -369,41 +576,6 @@ def get_block_ticks(chunk: NBT.NBTFile, source_chunk: NBT.NBTFile) -> list[tuple
 
     return scheduled_blocks
 
-def get_block_data(chunk: NBT.NBTFile, x: int, y: int, z: int) -> NBT.TAG_Compound:
-    default_block = NBT.TAG_Compound()
-    default_block["Name"] = NBT.TAG_String("minecraft:air")
-
-    if "sections" not in chunk:
-        return default_block
-    
-    # Find proper section
-    y_section = y//16
-    section: NBT.TAG_Compound
-    for section in chunk["sections"]:
-        if "Y" not in section:
-            continue
-        if section["Y"].value == y_section:
-            break
-    else:
-        return default_block
-    
-    # Extract index from data
-    palette: NBT.TAG_List = section["block_states"]["palette"]
-    palette_length = len(palette)
-    if palette_length == 1:
-        return palette[0]
-    data: NBT.TAG_Long_Array = section["block_states"]["data"]
-    index_size = max(int(math.ceil(math.log2(palette_length))), 4)
-    index_size_divisor = int(2**index_size)
-    indices_per_entry = 64//index_size
-    data_index = ((y%16)*256 + (z%16)*16 + (x%16))//indices_per_entry
-    long_index = ((y%16)*256 + (z%16)*16 + (x%16))%indices_per_entry
-    index = int((data[data_index]//(index_size_divisor**long_index))%index_size_divisor)
-
-    if index >= palette_length:
-        return default_block
-    return palette[index]
-
 def fix_spawner_entity(entity: NBT.TAG_Compound):
     global spawner_position_list
 
@@ -412,7 +584,7 @@ def fix_spawner_entity(entity: NBT.TAG_Compound):
     if (
         "id" in entity and
         "Pos" in entity_output and
-        pack_version <= 809
+        pack_version.get() <= 809
     ):
         if "Tags" not in entity:
             entity["Tags"] = NBT.TAG_List(NBT.TAG_String)
@@ -436,10 +608,10 @@ def fix_block_entity(block_entity: NBT.TAG_Compound):
             fix_item(item, False)
 
     if "CustomName" in block_entity:
-        block_entity["CustomName"] = json_text_component.update_from_lib_format(block_entity["CustomName"], pack_version, [], True)
+        block_entity["CustomName"] = json_text_component.update_from_lib_format(block_entity["CustomName"], pack_version.get(), [], True)
 
     if "lock" in block_entity:
-        if pack_version <= 2101 and option_manager.FIXES["lock_fixer"]:
+        if pack_version.get() <= 2101 and option_manager.FIXES["lock_fixer"]:
             if "components" in block_entity["lock"]:
                 components = block_entity["lock"]["components"]
                 if "minecraft:custom_name" in components:
@@ -452,128 +624,105 @@ def fix_block_entity(block_entity: NBT.TAG_Compound):
 
 
 
-def fix_entity_folder(folder_path: Path, source_folder_path: Path, dimension: str):
-    if not folder_path.exists():
-        return
-
-    for file_path in folder_path.iterdir():
-        fix_entity_file(file_path, source_folder_path / file_path.name, dimension)
-
-def fix_entity_file(file_path: Path, source_file_path: Path, dimension: str):
-    log(f" Fixing entities/{file_path.name}")
-    
+def fix_entity_chunk(chunk: NBT.NBTFile):
     global uuid_dict
     global uuid_list
 
-    try:
-        region_file = region.RegionFile(file_path)
-    except:
+    if "Entities" not in chunk:
         return
-    for chunk_metadata in cast(list[region.ChunkMetadata], region_file.get_metadata()):
-        try:
-            chunk = region_file.get_nbt(chunk_metadata.x, chunk_metadata.z)
-        except:
-            continue
-        if not chunk:
-            continue
-        if "Entities" not in chunk:
-            continue
-        chunk["DataVersion"] = NBT.TAG_Int(defaults.DATA_VERSION)
-        entities: NBT.TAG_List = chunk["Entities"]
-        if entities == None or len(entities) == 0:
-            continue
+    entities: NBT.TAG_List = chunk["Entities"]
+    if entities == None or len(entities) == 0:
+        return
+    chunk["DataVersion"] = NBT.TAG_Int(defaults.DATA_VERSION)
 
-        # Iterate through entities
-        entity: NBT.TAG_Compound
-        for entity in entities:
-            fix_entity_recursive_passenger(entity, False)
+    # Iterate through entities
+    entity: NBT.TAG_Compound
+    for entity in entities:
+        fix_entity_recursive_passenger(entity, False)
 
-            # Apply fixes to root entity (passengers need not apply)
+        # Apply fixes to root entity (passengers need not apply)
 
-            # Fix pre-1.9 NoAI horses
-            if (
-                option_manager.FIXES["no_ai_horse_movement"] and
-                pack_version <= 809 and
-                entity["id"].value == "minecraft:horse" and
-                "NoAI" in entity and
-                entity["NoAI"].value == 1
-            ):
-                horse = NBT.TAG_Compound()
-                horse.tags = entity.tags.copy()
-                for tag in entity:
-                    if tag != "Pos":
-                        del entity[tag]
-                entity["Passengers"] = NBT.TAG_List(NBT.TAG_Compound)
-                entity["Passengers"].append(horse)
-                entity["Pos"][1].value -= 0.14
-
-                entity["transformation"] = NBT.TAG_Compound()
-                entity["transformation"]["left_rotation"] = NBT.TAG_List(NBT.TAG_Float)
-                entity["transformation"]["left_rotation"].tags = [
-                    NBT.TAG_Float(0.0),
-                    NBT.TAG_Float(0.0),
-                    NBT.TAG_Float(0.0),
-                    NBT.TAG_Float(1.0)
-                ]
-                entity["transformation"]["right_rotation"] = NBT.TAG_List(NBT.TAG_Float)
-                entity["transformation"]["right_rotation"].tags = [
-                    NBT.TAG_Float(0.0),
-                    NBT.TAG_Float(0.0),
-                    NBT.TAG_Float(0.0),
-                    NBT.TAG_Float(1.0)
-                ]
-                entity["transformation"]["scale"] = NBT.TAG_List(NBT.TAG_Float)
-                entity["transformation"]["scale"].tags = [
-                    NBT.TAG_Float(1.0),
-                    NBT.TAG_Float(1.0),
-                    NBT.TAG_Float(1.0)
-                ]
-                entity["transformation"]["translation"] = NBT.TAG_List(NBT.TAG_Float)
-                entity["transformation"]["translation"].tags = [
-                    NBT.TAG_Float(0.0),
-                    NBT.TAG_Float(0.0),
-                    NBT.TAG_Float(0.0)
-                ]
-                entity["Motion"] = NBT.TAG_List(NBT.TAG_Double)
-                entity["Motion"].tags = [
-                    NBT.TAG_Double(0.0),
-                    NBT.TAG_Double(0.0),
-                    NBT.TAG_Double(0.0)
-                ]
-                entity["Rotation"] = NBT.TAG_List(NBT.TAG_Float)
-                entity["Rotation"].tags = [
-                    NBT.TAG_Float(0.0),
-                    NBT.TAG_Float(0.0)
-                ]
-
-                entity["Air"] = NBT.TAG_Short(300)
-                entity["alignment"] = NBT.TAG_String("center")
-                entity["background"] = NBT.TAG_Int(1073741824)
-                entity["billboard"] = NBT.TAG_String("fixed")
-                entity["default_background"] = NBT.TAG_Byte(0)
-                entity["FallDistance"] = NBT.TAG_Float(0.0)
-                entity["Fire"] = NBT.TAG_Short(0)
-                entity["glow_color_override"] = NBT.TAG_Int(-1)
-                entity["height"] = NBT.TAG_Float(0.0)
-                entity["id"] = NBT.TAG_String("minecraft:text_display")
-                entity["interpolation_duration"] = NBT.TAG_Int(0)
-                entity["Invulnerable"] = NBT.TAG_Byte(1)
-                entity["line_width"] = NBT.TAG_Int(200)
-                entity["OnGround"] = NBT.TAG_Byte(0)
-                entity["PortalCooldown"] = NBT.TAG_Int(0)
-                entity["see_through"] = NBT.TAG_Byte(0)
-                entity["shadow"] = NBT.TAG_Byte(0)
-                entity["shadow_radius"] = NBT.TAG_Float(0.0)
-                entity["shadow_strength"] = NBT.TAG_Float(1.0)
-                entity["text"] = NBT.TAG_String('{"text":""}')
-                entity["text_opacity"] = NBT.TAG_Byte(-1)
-                entity["view_range"] = NBT.TAG_Float(1.0)
-                entity["width"] = NBT.TAG_Float(0.0)
-                entity["UUID"] = NBT.TAG_Int_Array(name="UUID")
-                entity["UUID"].value = utils.new_uuid()
-
-        # Save chunk
-        region_file.write_chunk(chunk_metadata.x, chunk_metadata.z, chunk)
+        # Fix pre-1.9 NoAI horses
+        if (
+            option_manager.FIXES["no_ai_horse_movement"] and
+            pack_version.get() <= 809 and
+            entity["id"].value == "minecraft:horse" and
+            "NoAI" in entity and
+            entity["NoAI"].value == 1
+        ):
+            horse = NBT.TAG_Compound()
+            horse.tags = entity.tags.copy()
+            for tag in entity:
+                if tag != "Pos":
+                    del entity[tag]
+            entity["Passengers"] = NBT.TAG_List(NBT.TAG_Compound)
+            entity["Passengers"].append(horse)
+            entity["Pos"][1].value -= 0.14
+
+            entity["transformation"] = NBT.TAG_Compound()
+            entity["transformation"]["left_rotation"] = NBT.TAG_List(NBT.TAG_Float)
+            entity["transformation"]["left_rotation"].tags = [
+                NBT.TAG_Float(0.0),
+                NBT.TAG_Float(0.0),
+                NBT.TAG_Float(0.0),
+                NBT.TAG_Float(1.0)
+            ]
+            entity["transformation"]["right_rotation"] = NBT.TAG_List(NBT.TAG_Float)
+            entity["transformation"]["right_rotation"].tags = [
+                NBT.TAG_Float(0.0),
+                NBT.TAG_Float(0.0),
+                NBT.TAG_Float(0.0),
+                NBT.TAG_Float(1.0)
+            ]
+            entity["transformation"]["scale"] = NBT.TAG_List(NBT.TAG_Float)
+            entity["transformation"]["scale"].tags = [
+                NBT.TAG_Float(1.0),
+                NBT.TAG_Float(1.0),
+                NBT.TAG_Float(1.0)
+            ]
+            entity["transformation"]["translation"] = NBT.TAG_List(NBT.TAG_Float)
+            entity["transformation"]["translation"].tags = [
+                NBT.TAG_Float(0.0),
+                NBT.TAG_Float(0.0),
+                NBT.TAG_Float(0.0)
+            ]
+            entity["Motion"] = NBT.TAG_List(NBT.TAG_Double)
+            entity["Motion"].tags = [
+                NBT.TAG_Double(0.0),
+                NBT.TAG_Double(0.0),
+                NBT.TAG_Double(0.0)
+            ]
+            entity["Rotation"] = NBT.TAG_List(NBT.TAG_Float)
+            entity["Rotation"].tags = [
+                NBT.TAG_Float(0.0),
+                NBT.TAG_Float(0.0)
+            ]
+
+            entity["Air"] = NBT.TAG_Short(300)
+            entity["alignment"] = NBT.TAG_String("center")
+            entity["background"] = NBT.TAG_Int(1073741824)
+            entity["billboard"] = NBT.TAG_String("fixed")
+            entity["default_background"] = NBT.TAG_Byte(0)
+            entity["FallDistance"] = NBT.TAG_Float(0.0)
+            entity["Fire"] = NBT.TAG_Short(0)
+            entity["glow_color_override"] = NBT.TAG_Int(-1)
+            entity["height"] = NBT.TAG_Float(0.0)
+            entity["id"] = NBT.TAG_String("minecraft:text_display")
+            entity["interpolation_duration"] = NBT.TAG_Int(0)
+            entity["Invulnerable"] = NBT.TAG_Byte(1)
+            entity["line_width"] = NBT.TAG_Int(200)
+            entity["OnGround"] = NBT.TAG_Byte(0)
+            entity["PortalCooldown"] = NBT.TAG_Int(0)
+            entity["see_through"] = NBT.TAG_Byte(0)
+            entity["shadow"] = NBT.TAG_Byte(0)
+            entity["shadow_radius"] = NBT.TAG_Float(0.0)
+            entity["shadow_strength"] = NBT.TAG_Float(1.0)
+            entity["text"] = NBT.TAG_String('{"text":""}')
+            entity["text_opacity"] = NBT.TAG_Byte(-1)
+            entity["view_range"] = NBT.TAG_Float(1.0)
+            entity["width"] = NBT.TAG_Float(0.0)
+            entity["UUID"] = NBT.TAG_Int_Array(name="UUID")
+            entity["UUID"].value = utils.new_uuid()
 
 def fix_entity_recursive_passenger(entity: NBT.TAG_Compound, is_from_spawner: bool = False) -> dict[str, Any]:
     global uuid_dict
@@ -587,7 +736,7 @@ def fix_entity_recursive_passenger(entity: NBT.TAG_Compound, is_from_spawner: bo
     
     if entity_id == "minecraft:command_block_minecart":
         if "LastOutput" in entity:
-            entity["LastOutput"] = json_text_component.update_from_lib_format(entity["LastOutput"], pack_version, [], False)
+            entity["LastOutput"] = json_text_component.update_from_lib_format(entity["LastOutput"], pack_version.get(), [], False)
 
     if entity_id == "minecraft:item":
         if "Item" not in entity:
@@ -622,11 +771,11 @@ def fix_entity_recursive_passenger(entity: NBT.TAG_Compound, is_from_spawner: bo
                 uuid = utils.uuid_from_int_array(new_uuid)
             uuid_list.append(uuid)
 
-        elif pack_version <= 809:
+        elif pack_version.get() <= 809:
             del entity["UUID"]
 
     if "CustomName" in entity:
-        entity["CustomName"] = json_text_component.update_from_lib_format(entity["CustomName"], pack_version, [], True)
+        entity["CustomName"] = json_text_component.update_from_lib_format(entity["CustomName"], pack_version.get(), [], True)
 
     # if "Equipment" in entity:
     #     if "ArmorItems" not in entity or "HandItems" not in entity:
@@ -745,7 +894,7 @@ def fix_entity_recursive_passenger(entity: NBT.TAG_Compound, is_from_spawner: bo
 
 
 
-    if "Attributes" in entity and pack_version <= 710:
+    if "Attributes" in entity and pack_version.get() <= 710:
         for attribute in entity["Attributes"]:
             if "Name" in attribute and not attribute["Name"].value.startswith("minecraft:"):
                 attribute["Name"] = NBT.TAG_String(f'minecraft:{attribute["Name"].value}')
@@ -785,7 +934,7 @@ def fix_entity_recursive_passenger(entity: NBT.TAG_Compound, is_from_spawner: bo
         "id" in entity and
         entity["id"].value in tables.HOSTILE_MOBS and
         "Pos" in entity and
-        pack_version <= 809 and
+        pack_version.get() <= 809 and
         is_from_spawner
     ):
         output["Pos"] = [
@@ -819,17 +968,17 @@ def fix_item(item: NBT.TAG_Compound, is_from_spawner: bool = False):
             item_components = item["components"]
 
             # Handle can place on and can destroy
-            if pack_version <= 1202:
+            if pack_version.get() <= 1202:
                 for component in ["minecraft:can_place_on", "minecraft:can_destroy"]:
                     if component in item_components:
                         fix_can_place_on(item_components, component)
 
             # Handle custom name
             if "minecraft:custom_name" in item_components:
-                item_components["minecraft:custom_name"] = json_text_component.update_from_lib_format(item_components["minecraft:custom_name"], pack_version, [], True)
+                item_components["minecraft:custom_name"] = json_text_component.update_from_lib_format(item_components["minecraft:custom_name"], pack_version.get(), [], True)
 
                 # Handle lock logic
-                if pack_version <= 2101 and option_manager.FIXES["lock_fixer"]:
+                if pack_version.get() <= 2101 and option_manager.FIXES["lock_fixer"]:
                     if "minecraft:custom_data" not in item_components:
                         item_components["minecraft:custom_data"] = NBT.TAG_Compound()
                     item_components["minecraft:custom_data"]["emu_lock_name"] = nbt_tags.copy_lib_format(item_components["minecraft:custom_name"])
@@ -838,18 +987,18 @@ def fix_item(item: NBT.TAG_Compound, is_from_spawner: bool = False):
             # Handle custom data
             if "minecraft:custom_data" in item_components:
                 custom_data = item_components["minecraft:custom_data"]
-                if "emu_lock_name" in custom_data and pack_version <= 2104:
-                    custom_data["emu_lock_name"] = json_text_component.update_from_lib_format(custom_data["emu_lock_name"], pack_version, [], True)
+                if "emu_lock_name" in custom_data and pack_version.get() <= 2104:
+                    custom_data["emu_lock_name"] = json_text_component.update_from_lib_format(custom_data["emu_lock_name"], pack_version.get(), [], True)
 
             # Handle item name
             if "minecraft:item_name" in item_components:
-                item_components["minecraft:item_name"] = json_text_component.update_from_lib_format(item_components["minecraft:item_name"], pack_version, [], True)
+                item_components["minecraft:item_name"] = json_text_component.update_from_lib_format(item_components["minecraft:item_name"], pack_version.get(), [], True)
 
             # Handle lore
             if "minecraft:lore" in item_components:
                 lore = item_components["minecraft:lore"]
                 for i in range(len(lore)):
-                    lore[i] = json_text_component.update_from_lib_format(lore[i], pack_version, [], True)
+                    lore[i] = json_text_component.update_from_lib_format(lore[i], pack_version.get(), [], True)
                 nbt_tags.conform_lib_format_list(lore)
 
             # Handle written book pages
@@ -857,11 +1006,11 @@ def fix_item(item: NBT.TAG_Compound, is_from_spawner: bool = False):
                 if "pages" in item_components["minecraft:written_book_contents"]:
                     pages: NBT.TAG_List = item_components["minecraft:written_book_contents"]["pages"]
                     for i in range(len(pages)):
-                        pages[i] = json_text_component.update_from_lib_format(pages[i], pack_version, [], False)
+                        pages[i] = json_text_component.update_from_lib_format(pages[i], pack_version.get(), [], False)
                     nbt_tags.conform_lib_format_list(pages)
 
             # Handle item model
-            if pack_version <= 2103 and "minecraft:item_model" in item_components:
+            if pack_version.get() <= 2103 and "minecraft:item_model" in item_components:
                 item_components["minecraft:item_model"].value = item_component.conform_item_model_component(item_components["minecraft:item_model"].value)
 
             # Handle block entity data
@@ -878,13 +1027,13 @@ def fix_item(item: NBT.TAG_Compound, is_from_spawner: bool = False):
 
 
         # Handle old adventure mode
-        if pack_version <= 710 and option_manager.FIXES["old_adventure_mode_items"]:
+        if pack_version.get() <= 710 and option_manager.FIXES["old_adventure_mode_items"]:
             item_id = item["id"].value
             insert_old_adventure_mode_components(item, item_id)
 
     else:
         item_nbt = nbt_tags.convert_from_lib_format(item)
-        item_nbt = items.update_from_nbt(item_nbt, pack_version, [])
+        item_nbt = items.update_from_nbt(item_nbt, pack_version.get(), [])
         new_item = cast(NBT.TAG_Compound, nbt_tags.convert_to_lib_format(item_nbt))
         for key in item:
             del item[key]
@@ -1013,7 +1162,7 @@ def insert_old_adventure_mode_components(item: NBT.TAG_Compound, item_id: str):
 
 def fix_effect(effect: NBT.TAG_Compound) -> NBT.TAG_Compound:
     if "Id" in effect:
-        effect["id"] = NBT.TAG_String(ids.effect(effect["Id"].value, pack_version, []))
+        effect["id"] = NBT.TAG_String(ids.effect(effect["Id"].value, pack_version.get(), []))
         del effect["Id"]
     if "Amplifier" in effect:
         effect["amplifier"] = effect["Amplifier"]
@@ -1056,7 +1205,7 @@ def fix_structure_folder(folder: Path, source_folder: Path, namespace: str):
         file_path = folder / pack_subdir
         log(f" Fixing structure {namespace}:{pack_subdir[:-4]}")
         try:
-            structure.update(file_path, source_file_path, pack_version)
+            structure.update(file_path, source_file_path, pack_version.get())
         except Exception:
             log(f"ERROR: An error occurred when updating structure: {source_file_path.as_posix()}")
             utils.log_error()
@@ -1076,7 +1225,7 @@ def fix_scoreboard_dat(world: Path):
         objective: NBT.TAG_Compound
         for objective in file["data"]["Objectives"]:
             if "Name" in objective and "CriteriaName" in objective:
-                objective["CriteriaName"].value = ids.scoreboard_objective_criteria({"name": objective["Name"].value, "criteria": objective["CriteriaName"].value}, pack_version, [])
+                objective["CriteriaName"].value = ids.scoreboard_objective_criteria({"name": objective["Name"].value, "criteria": objective["CriteriaName"].value}, pack_version.get(), [])
 
     if "PlayerScores" in file["data"]:
         index_list = list(range(len(file["data"]["PlayerScores"])))
@@ -1175,7 +1324,7 @@ def fix_command_storage(world: Path):
             if "contents" in file["data"]:
                 file["data"]["contents"] = nbt_tags.convert_to_lib_format_compound(
                     cast(dict, nbt_tags.process_arbitrary_nbt(
-                        nbt_tags.convert_from_lib_format_compound(file["data"]["contents"]), pack_version
+                        nbt_tags.convert_from_lib_format_compound(file["data"]["contents"]), pack_version.get()
                     ))
                 )
 
@@ -1194,7 +1343,7 @@ def fix_spawn_chunks(world: Path):
     
     spawn_x = (data["SpawnX"].value if "SpawnX" in data else 0)//16
     spawn_z = (data["SpawnZ"].value if "SpawnZ" in data else 0)//16
-    spawn_chunk_radius = int(data["GameRules"]["spawnChunkRadius"].value) if "GameRules" in data and "spawnChunkRadius" in data["GameRules"] else (10 if pack_version < 2005 else 2)
+    spawn_chunk_radius = int(data["GameRules"]["spawnChunkRadius"].value) if "GameRules" in data and "spawnChunkRadius" in data["GameRules"] else (10 if pack_version.get() < 2005 else 2)
 
     # Prepare chunks.dat file
     chunks_dat_path = world / "data" / "chunks.dat"
@@ -0,0 +1,121 @@
+# Easy Map Updater
+# Copyright (C) 2024  Jesse Spicer, and StickyPiston Hosting
+
+
+
+# Import things
+
+import json
+import time
+import hashlib
+from pathlib import Path
+from typing import Any, TypedDict
+from lib import defaults
+from lib.log import log
+
+
+
+# Initialize variables
+
+PROGRAM_PATH = Path(__file__).parent.parent.parent
+MANIFEST_PATH = PROGRAM_PATH / "fix_world_manifest.json"
+SAVE_INTERVAL = 30
+
+class ManifestEntry(TypedDict):
+    size: int
+    mtime: int
+    hash: str
+    fingerprint: str
+    emu_version: int
+    results: Any
+
+
+
+# Define functions
+
+def get_fingerprint(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+def get_file_hash(file_path: Path) -> str:
+    with file_path.open("rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+
+class RegionManifest:
+    # Remembers which region files were fixed with which options, along with what fixing them produced.
+    # A file is unchanged if its size and modification time match, or else if its contents hash the same.
+
+    def __init__(self, world: Path, fingerprint: str):
+        self.world = world
+        self.fingerprint = fingerprint
+        self.files: dict[str, ManifestEntry] = {}
+        self.saved_time = time.time()
+
+        if not MANIFEST_PATH.exists():
+            return
+        try:
+            with MANIFEST_PATH.open("r", encoding="utf-8") as file:
+                manifest = json.load(file)
+        except:
+            log("WARNING: fix_world_manifest.json could not be read, fixing every region file")
+            return
+        if manifest.get("world") == world.as_posix():
+            self.files = manifest["files"]
+
+    def get_key(self, file_path: Path) -> str:
+        return file_path.relative_to(self.world).as_posix()
+
+    def get_entry(self, file_path: Path) -> ManifestEntry | None:
+        # Only entries from a run with the same options and size are usable
+        key = self.get_key(file_path)
+        if key not in self.files:
+            return None
+        entry = self.files[key]
+        if entry["fingerprint"] != self.fingerprint or entry["emu_version"] != defaults.PACK_VERSION:
+            return None
+        if entry["size"] != file_path.stat().st_size:
+            return None
+        return entry
+
+    def is_current(self, file_path: Path) -> bool:
+        entry = self.get_entry(file_path)
+        return entry is not None and entry["mtime"] == file_path.stat().st_mtime_ns
+
+    def get_results(self, file_path: Path) -> Any:
+        # Returns the stored results if the file hasn't changed since it was fixed
+        entry = self.get_entry(file_path)
+        if entry is None:
+            return None
+        if entry["mtime"] != file_path.stat().st_mtime_ns and entry["hash"] != get_file_hash(file_path):
+            return None
+        return entry["results"]
+
+    def record(self, file_path: Path, results: Any):
+        # Hash the file only if it changed since it was last recorded
+        key = self.get_key(file_path)
+        stat = file_path.stat()
+        if self.is_current(file_path):
+            file_hash = self.files[key]["hash"]
+        else:
+            file_hash = get_file_hash(file_path)
+        self.files[key] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": file_hash,
+            "fingerprint": self.fingerprint,
+            "emu_version": defaults.PACK_VERSION,
+            "results": results,
+        }
+
+        # Save every so often so that an interrupted run can pick up where it stopped
+        if time.time() - self.saved_time >= SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        self.saved_time = time.time()
+        with MANIFEST_PATH.open("w", encoding="utf-8", newline="\n") as file:
+            json.dump({
+                "world": self.world.as_posix(),
+                "files": self.files,
+            }, file)
@@ -0,0 +1,124 @@
+# Easy Map Updater
+# Copyright (C) 2024  Jesse Spicer, and StickyPiston Hosting
+
+
+
+# Import things
+
+import os
+import time
+import zlib
+from io import BytesIO
+from pathlib import Path
+from struct import pack
+from nbt import nbt as NBT
+from nbt import region
+
+
+
+# Initialize variables
+
+SECTOR_LENGTH = region.SECTOR_LENGTH
+HEADER_SECTORS = 2
+MAX_CHUNK_SECTORS = 255
+
+
+
+# Define functions
+
+class RegionWriter:
+    # Buffers the chunks written to a region file, then rebuilds the whole file in one pass.
+    # Chunks that were not written are copied over as-is without being decompressed.
+
+    def __init__(self, region_file: region.RegionFile):
+        # The file is rebuilt next to the original, so it has to have been opened from a path
+        if region_file.filename is None or region_file.file is None:
+            raise ValueError("Region file was not opened from a path and can't be rewritten")
+        self.region_file = region_file
+        self.file_path = Path(region_file.filename)
+        self.file = region_file.file
+        self.chunks: dict[tuple[int, int], bytes] = {}
+
+    def get_nbt(self, x: int, z: int) -> NBT.NBTFile:
+        # Buffered chunks take priority over the contents of the file
+        if (x, z) in self.chunks:
+            return NBT.NBTFile(buffer=BytesIO(zlib.decompress(self.chunks[x, z])))
+        return self.region_file.get_nbt(x, z)
+
+    def write_chunk(self, x: int, z: int, chunk: NBT.NBTFile):
+        buffer = BytesIO()
+        chunk.write_file(buffer=buffer)
+        self.write_blockdata(x, z, buffer.getvalue())
+
+    def write_blockdata(self, x: int, z: int, data: bytes):
+        self.chunks[x, z] = zlib.compress(data)
+
+    def save(self):
+        # Nothing to do if no chunks were written
+        if not self.chunks:
+            self.region_file.close()
+            return
+
+        timestamp = int(time.time())
+        locations = bytearray(SECTOR_LENGTH)
+        timestamps = bytearray(SECTOR_LENGTH)
+        sector = HEADER_SECTORS
+
+        temp_path = self.file_path.with_name(f"{self.file_path.name}.tmp")
+        with temp_path.open("wb") as file:
+            file.write(bytes(SECTOR_LENGTH*HEADER_SECTORS))
+
+            for z in range(32):
+                for x in range(32):
+                    if (x, z) in self.chunks:
+                        data = self.chunks[x, z]
+                        block = pack(">IB", len(data) + 1, region.COMPRESSION_ZLIB) + data
+                        chunk_timestamp = timestamp
+                    else:
+                        block = self.read_raw_block(x, z)
+                        chunk_timestamp = self.region_file.metadata[x, z].timestamp
+                    if not block:
+                        continue
+
+                    # Pad chunk to a whole number of sectors
+                    sector_count = (len(block) + SECTOR_LENGTH - 1)//SECTOR_LENGTH
+                    if sector_count > MAX_CHUNK_SECTORS:
+                        temp_path.unlink()
+                        raise region.ChunkDataError(f"Chunk {x}, {z} is too large ({sector_count} sectors exceeds {MAX_CHUNK_SECTORS} maximum)")
+                    file.write(block)
+                    file.write(bytes(sector_count*SECTOR_LENGTH - len(block)))
+
+                    index = 4*(x + 32*z)
+                    locations[index:index + 4] = pack(">IB", sector, sector_count)[1:]
+                    timestamps[index:index + 4] = pack(">I", chunk_timestamp)
+                    sector += sector_count
+
+            file.seek(0)
+            file.write(locations)
+            file.write(timestamps)
+
+        # Swap the new file in, the old one must be closed first
+        self.region_file.close()
+        os.replace(temp_path, self.file_path)
+        self.chunks = {}
+
+    def read_raw_block(self, x: int, z: int) -> bytes:
+        metadata: region.ChunkMetadata = self.region_file.metadata[x, z]
+        if metadata.blockstart < HEADER_SECTORS or metadata.blocklength == 0:
+            return b""
+
+        # Only keep the sectors the chunk needs, unless its header can't be trusted
+        if metadata.status == region.STATUS_CHUNK_OK:
+            sector_count = metadata.requiredblocks()
+        else:
+            sector_count = metadata.blocklength
+        start = metadata.blockstart*SECTOR_LENGTH
+        length = min(sector_count*SECTOR_LENGTH, self.region_file.size - start)
+        if length <= 5:
+            return b""
+
+        self.file.seek(start)
+        block = self.file.read(length)
+        if metadata.status == region.STATUS_CHUNK_OK:
+            block = block[:metadata.length + 4]
+        return block
@@ -10,13 +10,14 @@ from enum import Enum
 from pathlib import Path
 from typing import cast, TypedDict
 from nbt import nbt as NBT
-from nbt import region
 from lib.log import log
 from lib import utils
 from lib.data_pack_files import command
 from lib.data_pack_files import arguments
 from lib.data_pack_files import target_selectors
 from lib.data_pack_files import nbt_tags
+from lib.region_files import world_traversal
+from lib.region_files.world_traversal import ChunkVisitor, RegionTask
 
 
 
@@ -108,36 +109,80 @@ class StatCoordinates(TypedDict):
     command_contents: dict[tuple[int, int, int], str]
     command_modified: list[tuple[int, int, int]]
 
+class StatsResults(TypedDict):
+    discoveries: dict[Discoveries, bool]
+    coordinates: StatCoordinates
+    entity_types: list[str]
+
 def scan(world: Path):
     # Check for errors
     if not world.exists():
         log("ERROR: World does not exist!")
         return
 
-    discoveries = {
-        Discoveries.block_stats_used: False,
-        Discoveries.block_positions_dynamic: False,
-        Discoveries.commands_written_to_sensitive_position: False,
-        Discoveries.commands_written_to_arbitrary_position: False,
-        Discoveries.entity_stats_used: False,
-        Discoveries.entity_types_dynamic: False,
-        Discoveries.complex_stat_usage: False
-    }
-    coordinates: StatCoordinates = {
-        "stats": {}, # This stores the list of stats associated with each registered coordinate
-        "command_contents": {}, # This stores the command name associated with each registered coordinate
-        "command_modified": [] # This stores the list of coordinates which have their commands modified
+    log("Scanning world for usage of stats")
+    world_traversal.traverse(world, [StatsScanner()])
+
+def get_default_results() -> StatsResults:
+    return {
+        "discoveries": {
+            Discoveries.block_stats_used: False,
+            Discoveries.block_positions_dynamic: False,
+            Discoveries.commands_written_to_sensitive_position: False,
+            Discoveries.commands_written_to_arbitrary_position: False,
+            Discoveries.entity_stats_used: False,
+            Discoveries.entity_types_dynamic: False,
+            Discoveries.complex_stat_usage: False
+        },
+        "coordinates": {
+            "stats": {}, # This stores the list of stats associated with each registered coordinate
+            "command_contents": {}, # This stores the command name associated with each registered coordinate
+            "command_modified": [] # This stores the list of coordinates which have their commands modified
+        },
+        "entity_types": [],
     }
-    entity_types: list[str] = []
 
-    log("Scanning world for usage of stats")
-    scan_region_folder(discoveries, coordinates, entity_types, world / "region")
-    scan_entity_folder(discoveries, coordinates, entity_types, world / "entities")
-    scan_region_folder(discoveries, coordinates, entity_types, world / "DIM-1" / "region")
-    scan_entity_folder(discoveries, coordinates, entity_types, world / "DIM-1" / "entities")
-    scan_region_folder(discoveries, coordinates, entity_types, world / "DIM1" / "region")
-    scan_entity_folder(discoveries, coordinates, entity_types, world / "DIM1" / "entities")
+class StatsScanner(ChunkVisitor):
+    # Looks for blocks and entities that use stats, and for commands that manipulate them
+
+    def __init__(self):
+        self.results = get_default_results()
+
+    def begin_file(self, task: RegionTask) -> bool:
+        log(f' Scanning {task["folder"]}/{task["file_path"].name}')
+        return True
+
+    def visit_chunk(self, task: RegionTask, x: int, z: int, chunk: NBT.NBTFile):
+        if task["folder"] == "region":
+            scan_region_chunk(self.results["discoveries"], self.results["coordinates"], self.results["entity_types"], chunk)
+        else:
+            scan_entity_chunk(self.results["discoveries"], self.results["coordinates"], self.results["entity_types"], chunk)
+
+    def reset_results(self):
+        self.results = get_default_results()
+
+    def get_results(self) -> StatsResults:
+        return self.results
+
+    def merge_results(self, task: RegionTask, results: StatsResults) -> bool:
+        for discovery in results["discoveries"]:
+            if results["discoveries"][discovery]:
+                self.results["discoveries"][discovery] = True
+        coordinates = self.results["coordinates"]
+        for coordinate in results["coordinates"]["stats"]:
+            if coordinate not in coordinates["stats"]:
+                coordinates["stats"][coordinate] = results["coordinates"]["stats"][coordinate]
+            else:
+                coordinates["stats"][coordinate].extend(results["coordinates"]["stats"][coordinate])
+        coordinates["command_contents"].update(results["coordinates"]["command_contents"])
+        coordinates["command_modified"].extend(results["coordinates"]["command_modified"])
+        self.results["entity_types"].extend(results["entity_types"])
+        return False
 
+    def finish(self):
+        log_results(self.results["discoveries"], self.results["coordinates"])
+
+def log_results(discoveries: dict[Discoveries, bool], coordinates: StatCoordinates):
     for coordinate in cast(dict[tuple[int, int, int], list[str]], coordinates["stats"]):
         used_stats = utils.deduplicate_list(coordinates["stats"][coordinate])
         if len(used_stats) > 1:
@@ -163,96 +208,60 @@ def scan(world: Path):
 
 
 
-def scan_region_folder(discoveries: dict[Discoveries, bool], coordinates: StatCoordinates, entity_types: list[str], folder_path: Path):
-    if not folder_path.exists():
+def scan_region_chunk(discoveries: dict[Discoveries, bool], coordinates: StatCoordinates, entity_types: list[str], chunk: NBT.NBTFile):
+    if "block_entities" not in chunk:
+        return
+    block_entities: NBT.TAG_List = chunk["block_entities"]
+    if block_entities == None or len(block_entities) == 0:
         return
 
-    for file_path in folder_path.iterdir():
-        scan_region_file(discoveries, coordinates, entity_types, file_path)
-
-def scan_region_file(discoveries: dict[Discoveries, bool], coordinates: StatCoordinates, entity_types: list[str], file_path: Path):
-    log(f" Scanning region/{file_path.name}")
-
-    region_file = region.RegionFile(file_path)
-    chunk_metadata: region.ChunkMetadata
-    for chunk_metadata in region_file.get_metadata():
-        try:
-            chunk = region_file.get_nbt(chunk_metadata.x, chunk_metadata.z)
-        except:
-            continue
-        if not chunk:
-            continue
-        if "block_entities" not in chunk:
-            continue
-        block_entities: NBT.TAG_List = chunk["block_entities"]
-        if block_entities == None or len(block_entities) == 0:
-            continue
-
-        # Iterate through block entities
-        block_entity: NBT.TAG_Compound
-        for block_entity in block_entities:
-            x: int = block_entity["x"].value
-            y: int = block_entity["y"].value
-            z: int = block_entity["z"].value
-
-            used_stats: list[str] = []
-            if "CommandStats" in block_entity:
-                discoveries[Discoveries.block_stats_used] = True
-                key: str
-                for key in block_entity["CommandStats"]:
-                    if key.endswith("Name"):
-                        used_stats.append(key[:-4])
-                log(f'Block using command stats found: {(x,y,z)} {used_stats}')
-                
-                if (x,y,z) not in coordinates["stats"]:
-                    coordinates["stats"][(x,y,z)] = used_stats
-                else:
-                    coordinates["stats"][(x,y,z)].extend(used_stats)
+    # Iterate through block entities
+    block_entity: NBT.TAG_Compound
+    for block_entity in block_entities:
+        x: int = block_entity["x"].value
+        y: int = block_entity["y"].value
+        z: int = block_entity["z"].value
+
+        used_stats: list[str] = []
+        if "CommandStats" in block_entity:
+            discoveries[Discoveries.block_stats_used] = True
+            key: str
+            for key in block_entity["CommandStats"]:
+                if key.endswith("Name"):
+                    used_stats.append(key[:-4])
+            log(f'Block using command stats found: {(x,y,z)} {used_stats}')
+
+            if (x,y,z) not in coordinates["stats"]:
+                coordinates["stats"][(x,y,z)] = used_stats
+            else:
+                coordinates["stats"][(x,y,z)].extend(used_stats)
 
-            if "Command" in block_entity:
-                scan_command(discoveries, coordinates, entity_types, x, y, z, block_entity["Command"].value)
+        if "Command" in block_entity:
+            scan_command(discoveries, coordinates, entity_types, x, y, z, block_entity["Command"].value)
 
 
 
-def scan_entity_folder(discoveries: dict[Discoveries, bool], coordinates: StatCoordinates, entity_types: list[str], folder_path: Path):
-    if not folder_path.exists():
+def scan_entity_chunk(discoveries: dict[Discoveries, bool], coordinates: StatCoordinates, entity_types: list[str], chunk: NBT.NBTFile):
+    if "Entities" not in chunk:
+        return
+    entities: NBT.TAG_List = chunk["Entities"]
+    if entities == None or len(entities) == 0:
         return
 
-    for file_path in folder_path.iterdir():
-        scan_entity_file(discoveries, coordinates, entity_types, file_path)
-
-def scan_entity_file(discoveries: dict[Discoveries, bool], coordinates: StatCoordinates, entity_types: list[str], file_path: Path):
-    log(f" Scanning entities/{file_path.name}")
-
-    region_file = region.RegionFile(file_path)
-    chunk_metadata: region.ChunkMetadata
-    for chunk_metadata in region_file.get_metadata():
-        try:
-            chunk = region_file.get_nbt(chunk_metadata.x, chunk_metadata.z)
-        except:
-            continue
-        if not chunk:
-            continue
-        if "Entities" not in chunk:
-            continue
-        entities: NBT.TAG_List = chunk["Entities"]
-        if entities == None or len(entities) == 0:
-            continue
-
-        # Iterate through block entities
-        entity: NBT.TAG_Compound
-        for entity in entities:
-            entity_id: str = entity["id"].value
-
-            used_stats: list[str] = []
-            if "CommandStats" in entity:
-                discoveries[Discoveries.entity_stats_used] = True
-                entity_types.append(entity_id)
-                key: str
-                for key in entity["CommandStats"]:
-                    if key.endswith("Name"):
-                        used_stats.append(key[:-4])
-                log(f'Entity using command stats found: {entity_id} {used_stats}')
+    # Iterate through block entities
+    entity: NBT.TAG_Compound
+    for entity in entities:
+        entity_id: str = entity["id"].value
+
+        used_stats: list[str] = []
+        if "CommandStats" in entity:
+            discoveries[Discoveries.entity_stats_used] = True
+            entity_types.append(entity_id)
+            key: str
+            for key in entity["CommandStats"]:
+                if key.endswith("Name"):
+                    used_stats.append(key[:-4])
+            log(f'Entity using command stats found: {entity_id} {used_stats}')
 
 
 
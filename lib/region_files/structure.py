@@ -7,6 +7,7 @@
 
 from pathlib import Path
 from typing import cast
+from contextvars import ContextVar
 from nbt import nbt as NBT
 from lib.log import log
 from lib import defaults
@@ -17,15 +18,14 @@ from lib.data_pack_files import blocks
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
 # Define functions
 
 def update(file_path: Path, source_file_path: Path, version: int):
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     if version <= 1202:
         log(f"WARNING: Structures are not handled for pre-1.13 yet!")
@@ -70,7 +70,7 @@ def update(file_path: Path, source_file_path: Path, version: int):
 
             block_entity = cast(NBT.TAG_Compound, block["nbt"])
             block_nbt = nbt_tags.convert_from_lib_format_compound(block_entity)
-            block_nbt = cast(dict, nbt_tags.direct_update(block_nbt, pack_version, [], "block", block_id or "minecraft:stone", False))
+            block_nbt = cast(dict, nbt_tags.direct_update(block_nbt, pack_version.get(), [], "block", block_id or "minecraft:stone", False))
             block["nbt"] = nbt_tags.convert_to_lib_format_compound(block_nbt)
 
 
@@ -81,7 +81,7 @@ def update(file_path: Path, source_file_path: Path, version: int):
 
             entity_data = cast(NBT.TAG_Compound, entity["nbt"])
             entity_nbt = nbt_tags.convert_from_lib_format_compound(entity_data)
-            entity_nbt = cast(dict, nbt_tags.direct_update(entity_nbt, pack_version, [], "entity", entity_nbt["id"] if "id" in entity_nbt else "minecraft:pig", False))
+            entity_nbt = cast(dict, nbt_tags.direct_update(entity_nbt, pack_version.get(), [], "entity", entity_nbt["id"] if "id" in entity_nbt else "minecraft:pig", False))
             entity["nbt"] = nbt_tags.convert_to_lib_format_compound(entity_nbt)
 
 
@@ -103,7 +103,7 @@ def update_palette_block(block: NBT.TAG_Compound):
         "block_states": block_states,
         "nbt": None,
         "read": False,
-    }, pack_version, [])
+    }, pack_version.get(), [])
 
     block["Name"] = NBT.TAG_String(updated_block["id"])
     if updated_block["block_states"]:
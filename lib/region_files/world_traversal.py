@@ -0,0 +1,279 @@
+# Easy Map Updater
+# Copyright (C) 2024  Jesse Spicer, and StickyPiston Hosting
+
+
+
+# Import things
+
+import os
+import copy
+from pathlib import Path
+from typing import cast, Any, TypedDict
+from concurrent.futures import ProcessPoolExecutor
+from nbt import nbt as NBT
+from nbt import region
+from lib import defaults
+from lib import option_manager
+from lib import side_effects
+from lib import translation_cache
+from lib import update_report
+from lib import log as log_module
+from lib.log import log
+from lib.region_files import chunk_scanner
+from lib.region_files.region_writer import RegionWriter
+
+
+
+# Initialize variables
+
+LIST_NAMES = {
+    "region": "block_entities",
+    "entities": "Entities",
+}
+
+class RegionTask(TypedDict):
+    folder: str
+    file_path: Path
+    dimension: str
+
+worker_visitors: list["ChunkVisitor"] = []
+
+
+
+# Define functions
+
+class ChunkVisitor:
+    # Something that looks at the chunks of the world during a traversal.
+    # Every chunk is decoded once and handed to all visitors that need it:
+    # - Visitors with mutates set run first, in the order they were registered, and may modify the chunk.
+    #   The chunk is written back once afterwards if its contents changed.
+    # - Read-only visitors run after that so they see the chunk as it was saved, they must not modify it.
+    # When using multiple workers, each file is visited by a copy of the visitor in a worker process.
+    # The copy starts with reset_results, and what get_results returns is passed to merge_results in the main process in file order.
+    # Read-only visitors also go over files through copies when there is a visitor that mutates, so that they can go over a file again.
+
+    mutates = False
+    folders = ["region", "entities"]
+
+    def prepare_worker(self):
+        # Called on copies of the visitor that only gather results for merge_results, in worker processes or when a file is read again.
+        # Restore any module state that the visitor relies on here.
+        pass
+
+    def begin_file(self, task: RegionTask) -> bool:
+        # Returning false skips the file for this visitor
+        return True
+
+    def needs_chunk(self, task: RegionTask, data: bytes) -> bool:
+        # Decide from the raw chunk data whether the chunk has to be parsed for this visitor
+        return chunk_scanner.has_list_entries(data, LIST_NAMES[task["folder"]])
+
+    def visit_chunk(self, task: RegionTask, x: int, z: int, chunk: NBT.NBTFile):
+        pass
+
+    def end_file(self, task: RegionTask) -> bool:
+        # Called once the file has been saved.
+        # Returning true means that the file was modified again, so read-only visitors will go over it again
+        return False
+
+    def reset_results(self):
+        pass
+
+    def get_results(self) -> Any:
+        return None
+
+    def merge_results(self, task: RegionTask, results: Any) -> bool:
+        # Returning true means that the file was modified again, so read-only visitors will go over it again
+        return False
+
+    def finish(self):
+        pass
+
+
+
+def traverse(world: Path, visitors: list[ChunkVisitor]):
+    tasks = get_region_tasks(world)
+    workers = option_manager.get_workers()
+    if workers > 1 and len(tasks) > 1:
+        traverse_parallel(tasks, visitors, workers)
+    else:
+        for task in tasks:
+            traverse_file_in_order(task, visitors)
+
+    for visitor in visitors:
+        visitor.finish()
+    translation_cache.flush()
+
+def get_region_tasks(world: Path) -> list[RegionTask]:
+    tasks: list[RegionTask] = []
+    for dimension_path, dimension in [
+        (world,           "minecraft:overworld" ),
+        (world / "DIM-1", "minecraft:the_nether"),
+        (world / "DIM1",  "minecraft:the_end"   ),
+    ]:
+        get_dimension_tasks(tasks, dimension_path, dimension)
+    dimensions = world / "dimensions"
+    if dimensions.exists():
+        for dimension_namespace in dimensions.iterdir():
+            for dimension_path in dimension_namespace.iterdir():
+                get_dimension_tasks(tasks, dimension_path, "custom")
+    return tasks
+
+def get_dimension_tasks(tasks: list[RegionTask], dimension_path: Path, dimension: str):
+    for folder in LIST_NAMES:
+        folder_path = dimension_path / folder
+        if not folder_path.exists():
+            continue
+        for file_path in folder_path.iterdir():
+            tasks.append({
+                "folder": folder,
+                "file_path": file_path,
+                "dimension": dimension,
+            })
+
+def traverse_file_in_order(task: RegionTask, visitors: list[ChunkVisitor]):
+    # Files can be modified again once they are saved, so read-only visitors only merge their results afterwards
+    if not any(visitor.mutates for visitor in visitors) or all(visitor.mutates for visitor in visitors):
+        traverse_file(task, visitors)
+        return
+    read_only_visitors = get_read_only_copies(visitors)
+    for visitor in read_only_visitors:
+        visitor.reset_results()
+    if traverse_file(task, [visitor for visitor in visitors if visitor.mutates] + read_only_visitors):
+        read_only_visitors = get_read_only_copies(visitors)
+        read_only_results = get_file_results(task, read_only_visitors)
+    else:
+        read_only_results = [visitor.get_results() for visitor in read_only_visitors]
+    for visitor, visitor_results in zip([visitor for visitor in visitors if not visitor.mutates], read_only_results):
+        visitor.merge_results(task, visitor_results)
+
+def traverse_file(task: RegionTask, visitors: list[ChunkVisitor]) -> bool:
+    # Returns whether a visitor modified the file again once it was saved
+    active_visitors: list[ChunkVisitor] = []
+    for visitor in visitors:
+        if task["folder"] in visitor.folders and visitor.begin_file(task):
+            active_visitors.append(visitor)
+    if not active_visitors:
+        return False
+
+    try:
+        region_file = region.RegionFile(task["file_path"])
+    except:
+        return end_file(task, active_visitors)
+    region_writer = None
+    if any(visitor.mutates for visitor in active_visitors):
+        region_writer = RegionWriter(region_file)
+    visited_count = 0
+    written_count = 0
+    for chunk_metadata in cast(list[region.ChunkMetadata], region_file.get_metadata()):
+        # Skip chunks that no visitor needs before parsing them
+        data = chunk_scanner.get_chunk_data(region_file, chunk_metadata.x, chunk_metadata.z)
+        if not data:
+            continue
+        visited_count += 1
+        chunk_visitors = [visitor for visitor in active_visitors if visitor.needs_chunk(task, data)]
+        if not chunk_visitors:
+            continue
+        chunk = chunk_scanner.parse_chunk(data)
+        if not chunk:
+            continue
+
+        # Let visitors modify the chunk, then save it before read-only visitors see it
+        for visitor in chunk_visitors:
+            if visitor.mutates:
+                visitor.visit_chunk(task, chunk_metadata.x, chunk_metadata.z, chunk)
+        if region_writer and chunk_scanner.write_chunk_if_modified(region_writer, chunk_metadata.x, chunk_metadata.z, chunk, data):
+            written_count += 1
+        for visitor in chunk_visitors:
+            if not visitor.mutates:
+                visitor.visit_chunk(task, chunk_metadata.x, chunk_metadata.z, chunk)
+
+    update_report.count("files_read")
+    update_report.count("bytes_read", os.path.getsize(task["file_path"]))
+    update_report.count("chunks_read", visited_count)
+    if region_writer:
+        region_writer.save()
+        log(f"  Rewrote {written_count} of {visited_count} chunks")
+        if written_count:
+            update_report.count("files_written")
+            update_report.count("bytes_written", os.path.getsize(task["file_path"]))
+            update_report.count("chunks_written", written_count)
+    else:
+        region_file.close()
+    return end_file(task, active_visitors)
+
+def end_file(task: RegionTask, visitors: list[ChunkVisitor]) -> bool:
+    modified = False
+    for visitor in visitors:
+        if visitor.end_file(task):
+            modified = True
+    return modified
+
+def get_read_only_copies(visitors: list[ChunkVisitor]) -> list[ChunkVisitor]:
+    read_only_visitors = [copy.copy(visitor) for visitor in visitors if not visitor.mutates]
+    for visitor in read_only_visitors:
+        visitor.prepare_worker()
+    return read_only_visitors
+
+
+
+def traverse_parallel(tasks: list[RegionTask], visitors: list[ChunkVisitor], workers: int):
+    log(f" Using {workers} workers")
+
+    # Workers open their own connection to the translation cache
+    translation_cache.close()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=initialize_worker,
+        initargs=(visitors, option_manager.FIXES, defaults.DEBUG_MODE)
+    ) as executor:
+        results_list = list(executor.map(traverse_file_worker, tasks))
+
+    # Replay messages and merge results in task order so that the output matches a serial run
+    for task, (results, effects, counters) in zip(tasks, results_list):
+        side_effects.replay(effects)
+        update_report.add_counters(counters)
+        modified = False
+        for visitor, visitor_results in zip(visitors, results):
+            if visitor.mutates and visitor.merge_results(task, visitor_results):
+                modified = True
+
+        # The results of read-only visitors are outdated if the file was modified again
+        if modified:
+            read_only_results = iter(get_file_results(task, get_read_only_copies(visitors)))
+            results = [
+                visitor_results if visitor.mutates else next(read_only_results)
+                for visitor, visitor_results in zip(visitors, results)
+            ]
+        for visitor, visitor_results in zip(visitors, results):
+            if not visitor.mutates:
+                visitor.merge_results(task, visitor_results)
+
+def initialize_worker(visitors: list[ChunkVisitor], fixes: dict[str, Any], debug_mode: bool):
+    # Worker processes may not inherit the state of the main process
+    global worker_visitors
+    worker_visitors = visitors
+    option_manager.FIXES = fixes
+    defaults.DEBUG_MODE = debug_mode
+    for visitor in worker_visitors:
+        visitor.prepare_worker()
+
+    # Leave messages and changes to shared files for the main process, so that they are logged with the right file
+    side_effects.deferred.set(True)
+    log_module.muted.set(True)
+
+def traverse_file_worker(task: RegionTask) -> tuple[list[Any], list[side_effects.Effect], dict[str, int]]:
+    counters = update_report.get_counters()
+    side_effects.start_recording()
+    try:
+        results = get_file_results(task, worker_visitors)
+    finally:
+        effects = side_effects.stop_recording()
+    translation_cache.flush()
+    return results, effects, update_report.get_counter_changes(counters)
+
+def get_file_results(task: RegionTask, visitors: list[ChunkVisitor]) -> list[Any]:
+    for visitor in visitors:
+        visitor.reset_results()
+    traverse_file(task, visitors)
+    return [visitor.get_results() for visitor in visitors]
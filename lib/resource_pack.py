@@ -10,6 +10,7 @@ import json
 import shutil
 from pathlib import Path
 from typing import cast, Any
+from contextvars import ContextVar
 from PIL import Image, ImageDraw, ImageChops
 from lib.log import log
 from lib.resource_pack_files import atlas_logger
@@ -26,7 +27,7 @@ from lib import utils
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 PACK_FORMAT = defaults.RESOURCE_PACK_FORMAT
 PROGRAM_PATH = Path(__file__).parent
 
@@ -40,8 +41,7 @@ with (PROGRAM_PATH / "resource_pack_files" / "file_legend.json").open("r", encod
 def update(pack: Path, version: int):
     log("Updating resource pack")
 
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     og_pack = pack.parent / f'{pack.name}_original'
 
@@ -68,10 +68,10 @@ def update(pack: Path, version: int):
     try:
         update_pack_mcmeta(og_pack, pack)
         update_file_names(og_pack, pack)
-        fonts.update(pack, pack_version)
-        models.update(pack, pack_version)
+        fonts.update(pack, pack_version.get())
+        models.update(pack, pack_version.get())
         atlas_logger.log_atlas(og_pack, pack, version)
-        shaders.update(pack, pack_version)
+        shaders.update(pack, pack_version.get())
         finalize.delete_ds_store(pack)
         log("Resource pack updated")
     except Exception:
@@ -132,7 +132,7 @@ def update_file_names(og_pack: Path, pack: Path):
         path = subdir.split("/")
         # Search for the file in the legend to rename it
         for version in FILE_LEGEND:
-            if pack_version > int(version):
+            if pack_version.get() > int(version):
                 continue
             legend = FILE_LEGEND[version]
             for folder in path[:-1]:
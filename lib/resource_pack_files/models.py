@@ -8,6 +8,7 @@
 import json
 from typing import cast
 from pathlib import Path
+from contextvars import ContextVar
 from lib.data_pack_files import miscellaneous
 from lib.resource_pack_files import model_tables
 from lib.resource_pack_files import miscellaneous as rp_miscellaneous
@@ -21,7 +22,7 @@ from lib import option_manager
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 PROGRAM_PATH = Path(__file__).parent
 
 pack_path: Path
@@ -36,8 +37,7 @@ builtin_models: list[str] = []
 def update(pack: Path, version: int):
     log("Updating models")
 
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     global pack_path
     pack_path = pack
@@ -49,7 +49,7 @@ def update(pack: Path, version: int):
     builtin_models = []
 
     process_models(pack)
-    if pack_version <= 2103:
+    if pack_version.get() <= 2103:
         create_item_definitions(pack)
     else:
         update_item_definitions(pack)
@@ -87,7 +87,7 @@ def process_model(model_path: Path, namespace: str, model_type_folder: Path):
 
     # Create item definition if the model has no overrides and is a block reference model
     if (
-        pack_version <= 2103 and
+        pack_version.get() <= 2103 and
         "overrides" not in model_json and
         "parent" in model_json and
         model_json["parent"] in model_tables.BLOCK_MODEL_REPLACEMENTS.values()
@@ -97,7 +97,7 @@ def process_model(model_path: Path, namespace: str, model_type_folder: Path):
     modified = update_texture_names(model_json, modified)
     if model_type == "item":
         modified = extract_overrides(model_json, namespaced_id, modified)
-        if pack_version <= 2103 and "parent" in model_json:
+        if pack_version.get() <= 2103 and "parent" in model_json:
             updated_parent = change_block_model_reference(model_json["parent"])
             if model_json["parent"] != updated_parent:
                 model_json["parent"] = updated_parent
@@ -136,7 +136,7 @@ def update_texture_names(model_json: dict, modified: bool) -> bool:
             continue
         texture = miscellaneous.namespace(texture)
         texture += ".png"
-        new_texture = rp_miscellaneous.update_texture_path(texture, pack_version)
+        new_texture = rp_miscellaneous.update_texture_path(texture, pack_version.get())
         if texture != new_texture:
             model_json["textures"][key] = new_texture[:-4]
             modified = True
@@ -675,7 +675,7 @@ def process_item_definition(item_path: Path):
     if not load_bool:
         return
     
-    if option_manager.FIXES["oversized_in_gui"] and pack_version <= 2105 and "oversized_in_gui" not in item_json:
+    if option_manager.FIXES["oversized_in_gui"] and pack_version.get() <= 2105 and "oversized_in_gui" not in item_json:
         item_json["oversized_in_gui"] = True
         modified = True
 
@@ -7,6 +7,7 @@
 
 import json
 from pathlib import Path
+from contextvars import ContextVar
 from lib import json_manager
 from lib.log import log
 from lib import defaults
@@ -15,7 +16,7 @@ from lib import defaults
 
 # Initialize variables
 
-pack_version = defaults.PACK_VERSION
+pack_version: ContextVar[int] = ContextVar("pack_version", default=defaults.PACK_VERSION)
 
 
 
@@ -24,11 +25,10 @@ pack_version = defaults.PACK_VERSION
 def update(pack: Path, version: int):
     log("Updating shaders")
 
-    global pack_version
-    pack_version = version
+    pack_version.set(version)
 
     # Update shader references
-    if pack_version <= 2101:
+    if pack_version.get() <= 2101:
         update_shader_references(pack)
 
 
@@ -0,0 +1,95 @@
+# Easy Map Updater
+# Copyright (C) 2024  Jesse Spicer, and StickyPiston Hosting
+
+
+
+# Import things
+
+from typing import Any, Callable
+from contextvars import ContextVar
+from lib import log
+
+
+
+# Initialize variables
+
+# Each effect is a call along with whether it already ran when it was recorded
+Effect = tuple[Callable[..., Any], tuple, bool]
+
+recordings: ContextVar[list[list[Effect]] | None] = ContextVar("recordings", default=None)
+deferred: ContextVar[bool] = ContextVar("deferred", default=False)
+replaying: ContextVar[bool] = ContextVar("replaying", default=False)
+
+
+
+# Define functions
+
+def get_recordings() -> list[list[Effect]]:
+    # Each context gets its own stack of recordings
+    current_recordings = recordings.get()
+    if current_recordings is None:
+        current_recordings = []
+        recordings.set(current_recordings)
+    return current_recordings
+
+def start_recording():
+    # Record log messages and calls which modify files, so they can be replayed without redoing the work that caused them
+    current_recordings = get_recordings()
+    current_recordings.append([])
+    log.recorded_logs.set(current_recordings[-1])
+
+def stop_recording() -> list[Effect]:
+    # Recordings can be nested, the outer recording includes the effects of the inner one
+    current_recordings = get_recordings()
+    effects = current_recordings.pop()
+    if current_recordings:
+        current_recordings[-1].extend(effects)
+        log.recorded_logs.set(current_recordings[-1])
+    else:
+        log.recorded_logs.set(None)
+    return effects
+
+def record(function: Callable[..., Any], *arguments: Any):
+    # Called at the start of functions which modify files, the messages they log are recorded separately
+    current_recordings = get_recordings()
+    if current_recordings and not replaying.get():
+        current_recordings[-1].append((function, arguments, True))
+
+def defer(function: Callable[..., Any], *arguments: Any) -> bool:
+    # Called at the start of functions which modify files and return nothing, returns true if the function should return right away.
+    # The call is replayed along with what it logs, so it's run here without recording its messages,
+    # or left for the main process to replay if this is a worker process.
+    effect: Effect = (function, arguments, False)
+    current_recordings = get_recordings()
+    if deferred.get():
+        if current_recordings and not replaying.get():
+            current_recordings[-1].append(effect)
+        return True
+    if replaying.get() or not current_recordings:
+        return False
+    current_recordings[-1].append(effect)
+    replay_effect(effect)
+    return True
+
+def replay(effects: list[Effect]):
+    current_recordings = get_recordings()
+    if current_recordings and not replaying.get():
+        current_recordings[-1].extend(effects)
+    for effect in effects:
+        replay_effect(effect)
+
+def replay_effect(effect: Effect):
+    function, arguments, ran = effect
+    recorded_logs = log.recorded_logs.get()
+    was_replaying = replaying.get()
+    muted = log.muted.get()
+    log.recorded_logs.set(None)
+    replaying.set(True)
+    # The messages of calls which already ran were recorded along with them
+    log.muted.set(muted or ran)
+    try:
+        function(*arguments)
+    finally:
+        log.recorded_logs.set(recorded_logs)
+        replaying.set(was_replaying)
+        log.muted.set(muted)
@@ -0,0 +1,230 @@
+# Easy Map Updater
+# Copyright (C) 2024  Jesse Spicer, and StickyPiston Hosting
+
+
+
+# Import things
+
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable
+from lib import defaults
+from lib import option_manager
+from lib import side_effects
+from lib import update_report
+from lib.log import log
+
+
+
+# Initialize variables
+
+PROGRAM_PATH = Path(__file__).parent.parent
+CACHE_PATH = PROGRAM_PATH / "translation_cache.db"
+SOURCE_FOLDER = PROGRAM_PATH / "lib" / "data_pack_files"
+SOURCE_PATHS = [
+    PROGRAM_PATH / "lib" / "data_pack.py",
+    PROGRAM_PATH / "lib" / "defaults.py",
+    PROGRAM_PATH / "lib" / "json_manager.py",
+    PROGRAM_PATH / "lib" / "side_effects.py",
+    PROGRAM_PATH / "lib" / "utils.py",
+]
+# Raise this when the format of stored results changes, so that older entries are ignored
+CACHE_VERSION = 2
+MAX_CACHE_SIZE = 512*1024*1024
+FLUSH_INTERVAL = 1000
+
+# SQLite connections can only be used by the thread that opened them
+thread_state = threading.local()
+enabled = True
+source_hash = ""
+pending_entries: dict[str, bytes] = {}
+used_keys: set[str] = set()
+flush_lock = threading.Lock()
+fingerprinted_fixes: dict[str, Any] | None = None
+fingerprinted_debug_mode = False
+options_fingerprint = ""
+context_options_fingerprint: ContextVar[str] = ContextVar("context_options_fingerprint", default="")
+
+
+
+# Define functions
+
+def get_source_hash() -> str:
+    # Results are only valid for the code and tables they were made with
+    global source_hash
+    if not source_hash:
+        source = hashlib.sha256(f"{CACHE_VERSION} {defaults.PACK_VERSION}".encode("utf-8"))
+        for file_path in get_source_paths():
+            source.update(file_path.relative_to(PROGRAM_PATH).as_posix().encode("utf-8"))
+            source.update(file_path.read_bytes())
+        source_hash = source.hexdigest()
+    return source_hash
+
+def get_source_paths() -> list[Path]:
+    file_paths = list(SOURCE_PATHS)
+    for pattern in ["**/*.py", "**/*.json"]:
+        file_paths.extend(file_path for file_path in SOURCE_FOLDER.glob(pattern) if file_path.is_file())
+    return sorted(file_paths, key=lambda file_path: file_path.as_posix())
+
+def get_options_fingerprint() -> str:
+    # An update context keeps the fingerprint of the options it was made with
+    fingerprint = context_options_fingerprint.get()
+    if fingerprint:
+        return fingerprint
+
+    # The options are fingerprinted again whenever they are reloaded
+    global fingerprinted_fixes
+    global fingerprinted_debug_mode
+    global options_fingerprint
+    if fingerprinted_fixes is not option_manager.FIXES or fingerprinted_debug_mode != defaults.DEBUG_MODE:
+        fingerprinted_fixes = option_manager.FIXES
+        fingerprinted_debug_mode = defaults.DEBUG_MODE
+        options_fingerprint = hashlib.sha256(json.dumps({
+            "fixes": option_manager.FIXES,
+            "map_name": option_manager.get_map_name(),
+            "resource_pack": option_manager.get_resource_pack(),
+            "debug_mode": defaults.DEBUG_MODE,
+        }, sort_keys=True).encode("utf-8")).hexdigest()
+    return options_fingerprint
+
+def reset_options_fingerprint():
+    global fingerprinted_fixes
+    fingerprinted_fixes = None
+
+def get_key(kind: str, parts: Any) -> str:
+    return hashlib.sha256(json.dumps(
+        [kind, parts, get_source_hash(), get_options_fingerprint()],
+        sort_keys=True, default=str
+    ).encode("utf-8")).hexdigest()
+
+
+
+def get_connection() -> sqlite3.Connection | None:
+    global enabled
+    connection: sqlite3.Connection | None = getattr(thread_state, "connection", None)
+    if connection is None and enabled:
+        try:
+            connection = sqlite3.connect(CACHE_PATH, timeout=60)
+            connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, size INTEGER, used REAL)")
+            connection.commit()
+        except:
+            log("WARNING: translation_cache.db could not be opened, updating without it")
+            connection = None
+            enabled = False
+        thread_state.connection = connection
+    return connection
+
+def get(kind: str, parts: Any) -> Any:
+    key = get_key(kind, parts)
+    value = pending_entries.get(key)
+    if value is not None:
+        update_report.count("translation_cache_hits")
+        return pickle.loads(value)
+    cache = get_connection()
+    if cache is None:
+        return None
+    try:
+        row = cache.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            update_report.count("translation_cache_misses")
+            return None
+        with flush_lock:
+            used_keys.add(key)
+        update_report.count("translation_cache_hits")
+        return pickle.loads(row[0])
+    except:
+        return None
+
+def put(kind: str, parts: Any, value: Any):
+    if not enabled:
+        return
+    try:
+        key = get_key(kind, parts)
+        entry = pickle.dumps(value)
+    except:
+        return
+    with flush_lock:
+        pending_entries[key] = entry
+    if len(pending_entries) >= FLUSH_INTERVAL:
+        flush()
+
+def call(kind: str, parts: Any, issues: list | None, function: Callable[..., Any], *arguments: Any) -> Any:
+    # Reuse the stored result of a call, replaying the issues it reported and what it logged and created
+    entry = get(kind, parts)
+    if entry is not None:
+        result, new_issues, effects = entry
+        if issues is not None:
+            issues.extend(new_issues)
+        side_effects.replay(effects)
+        return result
+
+    issue_count = len(issues) if issues is not None else 0
+    side_effects.start_recording()
+    try:
+        result = function(*arguments)
+    finally:
+        effects = side_effects.stop_recording()
+    put(kind, parts, (result, issues[issue_count:] if issues is not None else [], effects))
+    return result
+
+
+
+def flush():
+    # Write new entries, and evict the least recently used entries once the cache is too big
+    global pending_entries
+    global used_keys
+    cache = get_connection()
+    if cache is None or not (pending_entries or used_keys):
+        return
+
+    # Take the entries first, so that other threads can keep adding to new ones
+    with flush_lock:
+        entries = pending_entries
+        keys = used_keys
+        pending_entries = {}
+        used_keys = set()
+    current_time = time.time()
+    try:
+        cache.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", [
+            (key, value, len(value), current_time) for key, value in entries.items()
+        ])
+        cache.executemany("UPDATE entries SET used = ? WHERE key = ?", [
+            (current_time, key) for key in keys
+        ])
+        total_size: int = cache.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total_size > MAX_CACHE_SIZE:
+            evicted_keys: list[tuple[str]] = []
+            for key, size in cache.execute("SELECT key, size FROM entries ORDER BY used").fetchall():
+                if total_size <= MAX_CACHE_SIZE*0.9:
+                    break
+                evicted_keys.append((key,))
+                total_size -= size
+            cache.executemany("DELETE FROM entries WHERE key = ?", evicted_keys)
+        cache.commit()
+    except:
+        log("WARNING: translation_cache.db could not be written")
+
+def close():
+    flush()
+    connection: sqlite3.Connection | None = getattr(thread_state, "connection", None)
+    if connection is not None:
+        connection.close()
+        thread_state.connection = None
+
+def clear():
+    global pending_entries
+    global used_keys
+    global enabled
+    close()
+    pending_entries = {}
+    used_keys = set()
+    enabled = True
+    for file_path in [CACHE_PATH, CACHE_PATH.parent / f"{CACHE_PATH.name}-journal"]:
+        if file_path.exists():
+            file_path.unlink()
@@ -0,0 +1,62 @@
+# Easy Map Updater
+# Copyright (C) 2024  Jesse Spicer, and StickyPiston Hosting
+
+
+
+# Import things
+
+from contextvars import copy_context
+from typing import Any, Callable
+from lib import log
+from lib import side_effects
+from lib import translation_cache
+from lib.data_pack_files import command
+from lib.data_pack_files import mcfunction
+from lib.data_pack_files import json_text_component
+from lib.data_pack_files import nbt_tags
+
+
+
+# Define functions
+
+class UpdateContext:
+    # The state of a single run of updates, and the entry points to run updates with it.
+    # The updaters keep their version and function ID in context variables, and each run gets its own copy of them.
+    # Each thread also has its own connection to the translation cache, so runs in other threads can update other files or versions at the same time.
+
+    version: int
+    function_id: str
+    options_fingerprint: str
+    issues: list[dict[str, str | int]]
+    logs: list[str] | None
+
+    def __init__(self, version: int, function_id: str = "", issues: list[dict[str, str | int]] | None = None, logs: list[str] | None = None):
+        self.version = version
+        self.function_id = function_id
+        self.options_fingerprint = translation_cache.get_options_fingerprint()
+        self.issues = [] if issues is None else issues
+        # Messages are collected here instead of being logged if a list is given
+        self.logs = logs
+
+    def update_command(self, line: str) -> str:
+        return self.run(command.update, line, self.version, self.function_id)
+
+    def update_function(self, contents: str) -> str:
+        return self.run(mcfunction.update_contents, contents, self.version, self.function_id)
+
+    def update_text_component(self, string: str, params: dict) -> str:
+        return self.run(json_text_component.update, string, self.version, self.issues, params)
+
+    def update_nbt(self, snbt: str | dict, source: str) -> str:
+        return self.run(nbt_tags.update, snbt, self.version, self.issues, source)
+
+    def run(self, function: Callable[..., Any], *arguments: Any) -> Any:
+        # Nothing the function changes in the context variables is visible after it returns
+        return copy_context().run(self.run_in_context, function, arguments)
+
+    def run_in_context(self, function: Callable[..., Any], arguments: tuple) -> Any:
+        translation_cache.context_options_fingerprint.set(self.options_fingerprint)
+        side_effects.recordings.set(None)
+        log.recorded_logs.set(None)
+        log.sink.set(self.logs)
+        return function(*arguments)
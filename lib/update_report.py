@@ -0,0 +1,181 @@
+# Easy Map Updater
+# Copyright (C) 2024  Jesse Spicer, and StickyPiston Hosting
+
+
+
+# Import things
+
+import os
+import json
+import time
+from pathlib import Path
+from datetime import datetime
+from typing import TypedDict
+from lib.log import log
+
+
+
+# Initialize variables
+
+PROGRAM_PATH = Path(__file__).parent.parent
+REPORT_PATH = PROGRAM_PATH / "update_report.json"
+SUMMARY_COUNTERS = [
+    ("Files",       ["files_read", "files_written"]),
+    ("Chunks",      ["chunks_read", "chunks_written"]),
+    ("MB read",     ["bytes_read"]),
+    ("MB written",  ["bytes_written"]),
+    ("Cache hits",  ["translation_cache_hits"]),
+    ("Cmd reused",  ["command_cache_hits"]),
+]
+
+class TimingReport(TypedDict):
+    stage: int
+    name: str
+    wall_time: float
+    cpu_time: float
+    counters: dict[str, int]
+
+class SectionReport(TimingReport):
+    actions: list[TimingReport]
+
+class Snapshot(TypedDict):
+    wall_time: float
+    cpu_time: float
+    counters: dict[str, int]
+
+counters: dict[str, int] = {}
+sections: list[SectionReport] = []
+update_start: Snapshot | None = None
+action_start: Snapshot | None = None
+started = ""
+
+
+
+# Define functions
+
+def count(name: str, amount: int = 1):
+    counters[name] = counters.get(name, 0) + amount
+
+def get_counters() -> dict[str, int]:
+    return counters.copy()
+
+def get_counter_changes(before: dict[str, int]) -> dict[str, int]:
+    # Worker processes send back what they counted so that the main process can add it
+    return {
+        name: counters[name] - before.get(name, 0)
+        for name in counters
+        if counters[name] != before.get(name, 0)
+    }
+
+def add_counters(changes: dict[str, int]):
+    for name in changes:
+        count(name, changes[name])
+
+
+
+def get_snapshot() -> Snapshot:
+    # Worker processes are included in the CPU time once they have exited
+    times = os.times()
+    return {
+        "wall_time": time.perf_counter(),
+        "cpu_time": times.user + times.system + times.children_user + times.children_system,
+        "counters": get_counters(),
+    }
+
+def get_timing(stage: int, name: str, start: Snapshot, end: Snapshot) -> TimingReport:
+    return {
+        "stage": stage,
+        "name": name,
+        "wall_time": round(end["wall_time"] - start["wall_time"], 3),
+        "cpu_time": round(end["cpu_time"] - start["cpu_time"], 3),
+        "counters": {
+            counter: end["counters"][counter] - start["counters"].get(counter, 0)
+            for counter in sorted(end["counters"])
+            if end["counters"][counter] != start["counters"].get(counter, 0)
+        },
+    }
+
+def start():
+    global sections
+    global update_start
+    global action_start
+    global started
+    sections = []
+    update_start = get_snapshot()
+    action_start = update_start
+    started = datetime.now().isoformat(timespec="seconds")
+
+def finish_action(stage: int, name: str, section_name: str):
+    # Actions run back to back, so each one lasts until the next stage is reached
+    global action_start
+    if action_start is None:
+        return
+    action_end = get_snapshot()
+    action = get_timing(stage, name, action_start, action_end)
+    action_start = action_end
+
+    section_stage = stage//100*100
+    if not sections or sections[-1]["stage"] != section_stage:
+        sections.append({
+            "stage": section_stage,
+            "name": section_name,
+            "wall_time": 0.0,
+            "cpu_time": 0.0,
+            "counters": {},
+            "actions": [],
+        })
+    section = sections[-1]
+    section["actions"].append(action)
+    section["wall_time"] = round(section["wall_time"] + action["wall_time"], 3)
+    section["cpu_time"] = round(section["cpu_time"] + action["cpu_time"], 3)
+    for counter in action["counters"]:
+        section["counters"][counter] = section["counters"].get(counter, 0) + action["counters"][counter]
+
+def finish(version: int):
+    # Write the report and log a summary of it
+    global update_start
+    global action_start
+    if update_start is None:
+        return
+    total = get_timing(0, "Total", update_start, get_snapshot())
+    update_start = None
+    action_start = None
+
+    report = {
+        "started": started,
+        "version": version,
+        "wall_time": total["wall_time"],
+        "cpu_time": total["cpu_time"],
+        "counters": total["counters"],
+        "sections": sections,
+    }
+    try:
+        with REPORT_PATH.open("w", encoding="utf-8", newline="\n") as file:
+            json.dump(report, file, indent=4)
+    except:
+        log("WARNING: update_report.json could not be written")
+    log_summary(total)
+
+def log_summary(total: TimingReport):
+    print("")
+    lines = ["Update report:", get_summary_line("Stage", "Wall", "CPU", [heading for heading, names in SUMMARY_COUNTERS])]
+    for section in sections:
+        lines.append(get_summary_row(f'{section["stage"]} {section["name"]}', section))
+        for action in section["actions"]:
+            lines.append(get_summary_row(f'  {action["stage"]} {action["name"]}', action))
+    lines.append(get_summary_row("Total", total))
+    lines.append(f"Full report written to {REPORT_PATH.name}")
+    log(lines)
+
+def get_summary_row(name: str, timing: TimingReport) -> str:
+    values: list[str] = []
+    for heading, names in SUMMARY_COUNTERS:
+        value = sum(timing["counters"].get(counter, 0) for counter in names)
+        if heading.startswith("MB"):
+            values.append(f"{value/1024/1024:.1f}")
+        else:
+            values.append(str(value))
+    return get_summary_line(name, f'{timing["wall_time"]:.1f}s', f'{timing["cpu_time"]:.1f}s', values)
+
+def get_summary_line(name: str, wall_time: str, cpu_time: str, values: list[str]) -> str:
+    return f'{name[:40]:<40} {wall_time:>9} {cpu_time:>9}' + "".join(f" {value:>11}" for value in values)
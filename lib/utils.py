@@ -5,6 +5,7 @@
 
 # Import things
 
+import os
 import math
 import traceback
 from pathlib import Path
@@ -12,7 +13,8 @@ from nbt import nbt as NBT
 import random
 random.seed()
 from lib import defaults
-from lib.log import log, get_log_path
+from lib.log import log, get_log_path, flush_logs
+from lib import update_report
 
 
 
@@ -296,6 +298,7 @@ def log_error(halt: bool = True):
     log(f'ERROR:\n{traceback.format_exc()}')
     log(f'Error logged to: {get_log_path().as_posix()}')
     log(f'Please report the issue on the E.M.U. Discord server: {defaults.DISCORD_INVITE}', halt)
+    flush_logs()
 
 
 
@@ -308,7 +311,10 @@ def safe_file_read(file_path: Path) -> str:
     for file_encoding in FILE_ENCODINGS:
         try:
             with file_path.open("r", encoding=file_encoding) as file:
-                return file.read()
+                contents = file.read()
+                update_report.count("files_read")
+                update_report.count("bytes_read", os.fstat(file.fileno()).st_size)
+                return contents
         except:
             continue
 
@@ -323,6 +329,8 @@ def safe_file_write(file_path: Path, contents: str):
                     file.read()
             with file_path.open("w", encoding=file_encoding, newline="\n") as file:
                 file.write(contents)
+                update_report.count("files_written")
+                update_report.count("bytes_written", file.tell())
             return
         except:
             continue